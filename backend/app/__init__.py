@@ -41,6 +41,70 @@ def create_app(config_name=None):
     from app.api import api_bp
     app.register_blueprint(api_bp, url_prefix='/api')
     
+    # Keep materialized KPI figures in step with writes
+    from app.services.kpi_snapshot_service import KPISnapshotService
+    KPISnapshotService.register_listeners()
+    
+    # Stored month buckets behind the index-backed monthly trends
+    from app.utils import month_buckets
+    month_buckets.register_listeners()
+    
+    # Escalation status history, timing metrics and their monthly rollups
+    from app.services.escalation_event_service import EscalationEventService
+    EscalationEventService.register_listeners()
+    
+    # Near-duplicate signatures, re-indexed whenever an escalation's text changes
+    from app.services.escalation_duplicate_service import EscalationDuplicateService
+    EscalationDuplicateService.register_listeners()
+    
+    # Track committed tables and invalidate cached responses that read them
+    from app.utils import change_tracking
+    from app.utils.cache import response_cache
+    from app.utils.data_versions import data_versions
+    change_tracking.register_listeners()
+    response_cache.init_app(app)
+    data_versions.init_app(app)
+    
+    # Deactivated and revoked users, checked against token claims instead of loading the user per request
+    from app.utils.auth import token_revocations
+    token_revocations.init_app(app)
+    
+    # Role permissions compiled to bitmasks, reloaded when the stored table changes
+    from app.utils.permissions import permission_store
+    permission_store.init_app(app)
+    
+    # Bounded pool for password hashing, off the request threads
+    from app.utils.passwords import password_hasher
+    password_hasher.init_app(app)
+    
+    # Token-bucket limits and load shedding for expensive reads
+    from app.utils.rate_limit import rate_limiter
+    rate_limiter.init_app(app)
+    
+    # Bounded pool for fanning out independent dashboard queries
+    from app.utils.concurrency import section_executor
+    section_executor.init_app(app)
+    
+    # Keep escalation SLA states current as targets approach
+    from app.services.sla_tracker_service import sla_tracker
+    sla_tracker.init_app(app)
+    
+    # Workload-aware assignment of new escalations
+    from app.services.escalation_assignment_service import assignment_engine
+    assignment_engine.init_app(app)
+    
+    # Batched background writer for the audit trail
+    from app.services.audit_service import audit_writer
+    audit_writer.init_app(app)
+    
+    # Push KPI changes to connected dashboards
+    from app.services.kpi_stream_service import kpi_stream
+    kpi_stream.init_app(app)
+    
+    # Register management commands
+    from app.cli import register_commands
+    register_commands(app)
+    
     # JWT error handlers
     @jwt.expired_token_loader
     def expired_token_callback(jwt_header, jwt_payload):
@@ -58,13 +122,18 @@ def create_app(config_name=None):
     with app.app_context():
         try:
             # Import all models to ensure they're registered
-            from app.models import *
+            import app.models as models  # noqa: F401
             
             db.create_all()
             
+            # Full-text index behind escalation search (not expressible in the models)
+            from app.services.escalation_search_service import EscalationSearchService
+            EscalationSearchService.ensure_index()
+            
             # Create default users
             from app.services.user_service import UserService
             UserService.create_default_users()
+            UserService.create_default_permissions()
             
             app.logger.info("Database initialized successfully")
         except Exception as e:
@@ -15,5 +15,6 @@ from app.api import (
     project_allocations,
     skills,
     personal_info,
-    resignations
+    resignations,
+    audit
 )
@@ -0,0 +1,46 @@
+from flask import request
+from app.api import api_bp
+from app.services.audit_service import AuditService, AUDIT_PAGE_SIZE, AUDIT_MAX_PAGE_SIZE
+from app.utils.response import error_response, cursor_paginated_response
+from app.utils.exceptions import ValidationError
+from app.utils.auth import role_required, audit_log
+from datetime import datetime
+import logging
+
+logger = logging.getLogger(__name__)
+
+def _datetime_arg(name):
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise ValidationError(f"{name} must be an ISO 8601 date or datetime", name)
+
+@api_bp.route('/audit-events', methods=['GET'])
+@role_required(['leadership'], 'read', 'settings')
+def get_audit_events():
+    """Get one page of audit events, newest first, by user, resource type, action and time range"""
+    try:
+        filters = {
+            'user_id': request.args.get('user_id', type=int),
+            'resource_type': request.args.get('resource_type'),
+            'action': request.args.get('action'),
+            'start': _datetime_arg('start'),
+            'end': _datetime_arg('end')
+        }
+
+        limit = request.args.get('limit', AUDIT_PAGE_SIZE, type=int)
+        limit = max(1, min(limit or AUDIT_PAGE_SIZE, AUDIT_MAX_PAGE_SIZE))
+
+        events, next_cursor = AuditService.get_events(filters, request.args.get('cursor'), limit)
+
+        audit_log('READ', 'audit_events', details=f"Retrieved {len(events)} audit events")
+        return cursor_paginated_response(events, next_cursor, limit, 'Audit events retrieved successfully')
+
+    except ValidationError as e:
+        return error_response(e.message, 400)
+    except Exception as e:
+        logger.error(f"Error retrieving audit events: {e}")
+        return error_response('Failed to retrieve audit events', 500)
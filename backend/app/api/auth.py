@@ -1,11 +1,15 @@
 
 from flask import request, jsonify, g
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.api import api_bp
 from app.services.user_service import UserService
-from app.utils.response import success_response, error_response
+from app.utils.response import success_response, error_response, retry_later_response
+from app.utils.exceptions import TooManyRequestsError
 from app.utils.validators import validate_email, validate_required_fields
-from app.utils.auth import role_required, audit_log, get_current_user
+from app.utils.auth import (
+    role_required, audit_log, get_current_user, issue_access_token, authenticate_from_claims, validate_permissions
+)
+from app.utils.permissions import permission_store
 import logging
 
 logger = logging.getLogger(__name__)
@@ -27,21 +31,13 @@ def login():
         if not validate_email(email):
             return error_response('Invalid email format', 400)
         
-        user = UserService.authenticate_user(email, password)
+        user = UserService.authenticate_user(email, password, request.remote_addr)
         
         if user:
-            # Create access token with additional claims
-            additional_claims = {
-                'role': user.role,
-                'email': user.email,
-                'name': user.name
-            }
-            access_token = create_access_token(
-                identity=user.id,
-                additional_claims=additional_claims
-            )
+            # Role and active flag travel as claims, so guarded requests need no user lookup
+            access_token = issue_access_token(user)
             
-            audit_log('LOGIN', 'auth', user.id, f"User {user.email} logged in successfully")
+            audit_log('LOGIN', 'auth', user.id, f"User {user.email} logged in successfully", user_id=user.id)
             
             return success_response({
                 'access_token': access_token,
@@ -53,6 +49,8 @@ def login():
         logger.warning(f"Failed login attempt for email: {email}")
         return error_response('Invalid credentials', 401)
         
+    except TooManyRequestsError as e:
+        return retry_later_response(e.message, e.retry_after)
     except ValueError as e:
         logger.error(f"Login validation error: {e}")
         return error_response(str(e), 400)
@@ -148,6 +146,69 @@ def get_all_users():
         logger.error(f"Error retrieving users: {e}")
         return error_response('Failed to retrieve users', 500)
 
+@api_bp.route('/auth/users/<int:user_id>/permissions', methods=['GET'])
+@jwt_required()
+def get_user_effective_permissions(user_id):
+    """Get what a user's role currently allows; users may read their own, HR and Leadership anyone's"""
+    try:
+        current_user, refusal = authenticate_from_claims()
+        if refusal:
+            error, status = refusal
+            return error_response(error, status)
+        if not current_user:
+            return error_response('User not found', 404)
+        if current_user.id != user_id and not (
+            current_user.role in ('hr', 'leadership') and validate_permissions(current_user.role, 'users', 'read')
+        ):
+            return error_response('Insufficient permissions', 403)
+        
+        permissions = UserService.get_effective_permissions(user_id)
+        
+        audit_log('READ', 'users', user_id, 'Retrieved effective permissions', user_id=current_user.id)
+        return success_response(permissions, 'Effective permissions retrieved successfully')
+        
+    except ValueError as e:
+        return error_response(str(e), 404)
+    except Exception as e:
+        logger.error(f"Error retrieving permissions for user {user_id}: {e}")
+        return error_response('Failed to retrieve permissions', 500)
+
+@api_bp.route('/auth/roles/permissions', methods=['GET'])
+@role_required(['hr', 'leadership'], 'read', 'users')
+def get_role_permissions():
+    """Get the permission table of every role"""
+    try:
+        matrix = permission_store.matrix
+        permissions = {role: matrix.as_dict(role) for role in matrix.roles}
+        
+        audit_log('READ', 'settings', details='Retrieved role permissions')
+        return success_response(permissions, 'Role permissions retrieved successfully')
+        
+    except Exception as e:
+        logger.error(f"Error retrieving role permissions: {e}")
+        return error_response('Failed to retrieve role permissions', 500)
+
+@api_bp.route('/auth/roles/<role>/permissions', methods=['PUT'])
+@role_required(['leadership'], 'write', 'settings')
+def update_role_permissions(role):
+    """Grant or deny actions for a role; applies to every worker without a deploy"""
+    try:
+        data = request.get_json()
+        
+        if not data:
+            return error_response('Request body is required', 400)
+        
+        permissions = UserService.set_role_permissions(role, data, g.current_user.email)
+        
+        audit_log('UPDATE', 'settings', role, f"Updated permissions for role {role}: {data}")
+        return success_response(permissions, 'Role permissions updated successfully')
+        
+    except ValueError as e:
+        return error_response(str(e), 400)
+    except Exception as e:
+        logger.error(f"Error updating permissions for role {role}: {e}")
+        return error_response('Role permission update failed', 500)
+
 @api_bp.route('/auth/users/<int:user_id>', methods=['PUT'])
 @role_required(['hr', 'leadership'], 'write', 'users')
 def update_user(user_id):
@@ -212,15 +273,37 @@ def change_password():
         if not current_user.check_password(data['current_password']):
             return error_response('Current password is incorrect', 400)
         
-        # Update password
-        current_user.set_password(data['new_password'])
-        current_user.save()
+        # Update password; this revokes earlier tokens, so the caller gets a fresh one
+        user = UserService.update_user(current_user.id, password=data['new_password'])
         
         audit_log('CHANGE_PASSWORD', 'users', current_user.id, "Password changed")
-        return success_response(None, 'Password changed successfully')
+        return success_response({'access_token': issue_access_token(user)}, 'Password changed successfully')
         
     except ValueError as e:
         return error_response(str(e), 400)
     except Exception as e:
         logger.error(f"Error changing password: {e}")
         return error_response('Password change failed', 500)
+
+@api_bp.route('/auth/logout', methods=['POST'])
+@jwt_required()
+def logout():
+    """Sign out everywhere: every access token issued to the caller so far is refused"""
+    try:
+        current_user, refusal = authenticate_from_claims()
+        if refusal:
+            error, status = refusal
+            return error_response(error, status)
+        if not current_user:
+            return error_response('User not found', 404)
+        
+        UserService.revoke_tokens(current_user.id)
+        
+        audit_log('LOGOUT', 'auth', current_user.id, f"User {current_user.email} signed out")
+        return success_response(None, 'Logged out successfully')
+        
+    except ValueError as e:
+        return error_response(str(e), 404)
+    except Exception as e:
+        logger.error(f"Logout error: {e}")
+        return error_response('Logout failed', 500)
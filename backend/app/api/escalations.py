@@ -1,54 +1,116 @@
 
 from flask import request, g
 from app.api import api_bp
-from app.services.escalation_service import EscalationService
-from app.utils.response import success_response, error_response
+from app.services.escalation_service import EscalationService, ESCALATION_PAGE_SIZE, ESCALATION_MAX_PAGE_SIZE
+from app.services.escalation_communication_service import EscalationCommunicationService
+from app.services.escalation_bulk_service import EscalationBulkService, IMPORT_ENUM_FIELDS, IMPORT_DATE_FIELDS
+from app.services.escalation_event_service import EscalationEventService
+from app.services.escalation_assignment_service import assignment_engine
+from app.services.escalation_duplicate_service import EscalationDuplicateService, DUPLICATE_LIMIT
+from app.services.escalation_search_service import EscalationSearchService, SEARCH_PAGE_SIZE, SEARCH_MAX_PAGE_SIZE
+from app.utils.response import success_response, error_response, cursor_paginated_response
+from app.utils.exceptions import ValidationError, ResourceNotFoundError
 from app.utils.validators import validate_required_fields
-from app.utils.auth import role_required, audit_log
+from app.utils.auth import role_required, audit_log, audited_read
+from app.utils.data_versions import data_versions
+from app.models import (
+    Escalation, Project, EscalationCommunication, EscalationEvent, EscalationMonthlyRollup, EscalationResolutionBucket,
+    EscalationSignature
+)
+from app.models.escalation import SLAState, EscalationStatus
+from datetime import datetime
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Tables escalation reads depend on; the ETag changes when either is committed
+ESCALATION_TABLES = (Escalation, Project)
+COMMUNICATION_TABLES = (Escalation, EscalationCommunication)
+EVENT_TABLES = (Escalation, EscalationEvent)
+ROLLUP_TABLES = (EscalationMonthlyRollup, EscalationResolutionBucket, Project)
+DUPLICATE_TABLES = (Escalation, EscalationSignature)
+
+# Most months a resolution trend may span
+TREND_MAX_MONTHS = 60
+
 @api_bp.route('/escalations', methods=['GET'])
 @role_required(['leadership', 'resource_manager', 'delivery_owner'], 'read', 'escalations')
+@audited_read('escalations')
+@data_versions.conditional(ESCALATION_TABLES)
 def get_escalations():
-    """Get all escalations with filtering and pagination"""
-    try:
-        # Get query parameters for filtering
-        filters = {}
-        if request.args.get('status'):
-            filters['status'] = request.args.get('status')
-        if request.args.get('priority'):
-            filters['priority'] = request.args.get('priority')
-        if request.args.get('project_id'):
-            filters['project_id'] = int(request.args.get('project_id'))
-        if request.args.get('assigned_to'):
-            filters['assigned_to'] = request.args.get('assigned_to')
+    """Get one page of escalations with filtering, sorting and cursor pagination"""
+    try:
+        filters = _list_filters()
         
         # Get sorting parameters
         sort_by = request.args.get('sort_by', 'raised_date')
         sort_order = request.args.get('sort_order', 'desc')
         
-        escalations = EscalationService.get_all_escalations(filters, sort_by, sort_order)
-        escalations_data = []
+        limit = request.args.get('limit', ESCALATION_PAGE_SIZE, type=int)
+        limit = max(1, min(limit or ESCALATION_PAGE_SIZE, ESCALATION_MAX_PAGE_SIZE))
         
-        for escalation in escalations:
-            escalation_dict = escalation.to_dict()
-            if escalation.project:
-                escalation_dict['project_name'] = escalation.project.project_name
-                escalation_dict['client_name'] = escalation.project.client_name
-            else:
-                escalation_dict['project_name'] = 'Unknown'
-                escalation_dict['client_name'] = 'Unknown'
-            escalations_data.append(escalation_dict)
+        escalations_data, next_cursor = EscalationService.get_all_escalations(
+            filters, sort_by, sort_order, request.args.get('cursor'), limit
+        )
         
         audit_log('READ', 'escalations', details=f"Retrieved {len(escalations_data)} escalations")
-        return success_response(escalations_data, 'Escalations retrieved successfully')
+        return cursor_paginated_response(escalations_data, next_cursor, limit, 'Escalations retrieved successfully')
         
+    except ValidationError as e:
+        return error_response(e.message, 400)
     except Exception as e:
         logger.error(f"Error retrieving escalations: {e}")
         return error_response('Failed to retrieve escalations', 500)
 
+@api_bp.route('/escalations/search', methods=['GET'])
+@role_required(['leadership', 'resource_manager', 'delivery_owner'], 'read', 'escalations')
+@audited_read('escalations')
+@data_versions.conditional(ESCALATION_TABLES)
+def search_escalations():
+    """Full-text search over escalations, best match first, with highlighted snippets"""
+    try:
+        limit = request.args.get('limit', SEARCH_PAGE_SIZE, type=int)
+        limit = max(1, min(limit or SEARCH_PAGE_SIZE, SEARCH_MAX_PAGE_SIZE))
+        
+        results, next_cursor = EscalationSearchService.search(
+            request.args.get('q'), _list_filters(), request.args.get('cursor'), limit
+        )
+        
+        audit_log('READ', 'escalations', details=f"Searched escalations, {len(results)} matches")
+        return cursor_paginated_response(results, next_cursor, limit, 'Escalation search completed successfully')
+        
+    except ValidationError as e:
+        return error_response(e.message, 400)
+    except Exception as e:
+        logger.error(f"Error searching escalations: {e}")
+        return error_response('Failed to search escalations', 500)
+
+def _list_filters():
+    """Escalation list filters from the query string"""
+    filters = {}
+    if request.args.get('status'):
+        filters['status'] = request.args.get('status')
+    if request.args.get('priority'):
+        filters['priority'] = request.args.get('priority')
+    if request.args.get('project_id'):
+        filters['project_id'] = request.args.get('project_id', type=int)
+        if filters['project_id'] is None:
+            raise ValidationError('project_id must be an integer', 'project_id')
+    if request.args.get('assigned_to'):
+        filters['assigned_to'] = request.args.get('assigned_to')
+    filters['raised_from'] = _date_arg('raised_from')
+    filters['raised_to'] = _date_arg('raised_to')
+    return filters
+
+def _date_arg(name):
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, '%Y-%m-%d')
+    except ValueError:
+        raise ValidationError(f"{name} must be a date in YYYY-MM-DD format", name)
+
 @api_bp.route('/escalations', methods=['POST'])
 @role_required(['resource_manager', 'delivery_owner'], 'write', 'escalations')
 def create_escalation():
@@ -61,10 +123,12 @@ def create_escalation():
         
         validate_required_fields(data, ['title', 'project_id', 'priority', 'escalation_type'])
         
+        values = _escalation_values(data)
+        
         # Set the user who raised the escalation
-        data['raised_by'] = g.current_user.email
+        values['raised_by'] = g.current_user.email
         
-        escalation = EscalationService.create_escalation(**data)
+        escalation = EscalationService.create_escalation(values)
         
         audit_log('CREATE', 'escalations', escalation.id, f"Created escalation: {escalation.title}")
         return success_response(
@@ -73,14 +137,164 @@ def create_escalation():
             201
         )
         
+    except ValidationError as e:
+        return error_response(e.message, 400)
     except ValueError as e:
         return error_response(str(e), 400)
     except Exception as e:
         logger.error(f"Error creating escalation: {e}")
         return error_response('Escalation creation failed', 500)
 
+@api_bp.route('/escalations/import', methods=['POST'])
+@role_required(['resource_manager', 'delivery_owner'], 'write', 'escalations')
+def import_escalations():
+    """Create or update escalations in bulk from an NDJSON or CSV upload, keyed on external_id"""
+    try:
+        rows = EscalationBulkService.parse(request.get_data(), request.content_type)
+        if not rows:
+            return error_response('Request body is required', 400)
+        
+        atomic = request.args.get('atomic', 'false').lower() == 'true'
+        report = EscalationBulkService.import_escalations(rows, atomic=atomic)
+        
+        if not report['written'] and report['failed']:
+            return error_response(f"Import rejected: {report['failed']} rows failed validation", 422, report)
+        
+        audit_log('BULK_IMPORT', 'escalations', details=(
+            f"Imported escalations: {report['created']} created, {report['updated']} updated, {report['failed']} failed"
+        ))
+        return success_response(report, 'Escalations imported successfully')
+        
+    except ValidationError as e:
+        return error_response(e.message, 400)
+    except Exception as e:
+        logger.error(f"Error importing escalations: {e}")
+        return error_response('Escalation import failed', 500)
+
+@api_bp.route('/escalations/status', methods=['POST'])
+@role_required(['resource_manager', 'delivery_owner'], 'write', 'escalations')
+def batch_update_escalation_status():
+    """Move many escalations to one status in a single statement"""
+    try:
+        data = request.get_json()
+        
+        if not data:
+            return error_response('Request body is required', 400)
+        
+        validate_required_fields(data, ['ids', 'status'])
+        
+        ids = data['ids']
+        if not isinstance(ids, list) or not all(isinstance(item, int) for item in ids):
+            raise ValidationError('ids must be a list of integers', 'ids')
+        
+        status = _status_value(data['status'], 'status')
+        from_statuses = None
+        if data.get('from_status'):
+            values = data['from_status'] if isinstance(data['from_status'], list) else data['from_status'].split(',')
+            from_statuses = [_status_value(value, 'from_status') for value in values]
+        
+        result = EscalationBulkService.transition_status(ids, status, from_statuses)
+        
+        audit_log('BULK_UPDATE', 'escalations', details=(
+            f"Moved {len(result['updated'])} escalations to {status.value}"
+        ))
+        return success_response(result, 'Escalation statuses updated successfully')
+        
+    except ValidationError as e:
+        return error_response(e.message, 400)
+    except ValueError as e:
+        return error_response(str(e), 400)
+    except Exception as e:
+        logger.error(f"Error updating escalation statuses: {e}")
+        return error_response('Escalation status update failed', 500)
+
+# Columns kept in step by listeners and background services rather than by clients
+MANAGED_FIELDS = ('id', 'raised_month', 'sla_state', 'status_changed_at', 'possible_duplicate_of')
+
+def _escalation_values(data):
+    """Column values from a create or update body, with enum and date fields converted"""
+    columns = Escalation.__table__.c
+    unknown = [key for key in data if key not in columns or key in MANAGED_FIELDS]
+    if unknown:
+        raise ValidationError(f"Unknown fields: {', '.join(sorted(unknown))}")
+
+    values = {}
+    for key, value in data.items():
+        if value is not None and key in IMPORT_ENUM_FIELDS:
+            enum_class = IMPORT_ENUM_FIELDS[key]
+            try:
+                value = enum_class(str(value).strip().lower())
+            except ValueError:
+                raise ValidationError(
+                    f"{key} must be one of: {', '.join(member.value for member in enum_class)}", key
+                )
+        elif value is not None and key in IMPORT_DATE_FIELDS + ('date_acknowledged', 'actual_resolution_date'):
+            try:
+                value = datetime.fromisoformat(str(value).strip().replace('Z', '+00:00')).replace(tzinfo=None)
+            except ValueError:
+                raise ValidationError(f"{key} must be an ISO 8601 date or datetime", key)
+        values[key] = value
+    return values
+
+def _status_value(value, field):
+    try:
+        return EscalationStatus(str(value).strip().lower())
+    except ValueError:
+        raise ValidationError(
+            f"{field} must be one of: {', '.join(member.value for member in EscalationStatus)}", field
+        )
+
+@api_bp.route('/escalations/sla', methods=['GET'])
+@role_required(['leadership', 'resource_manager', 'delivery_owner'], 'read', 'escalations')
+@audited_read('escalations')
+@data_versions.conditional(ESCALATION_TABLES)
+def get_escalation_sla_watchlist():
+    """Get escalations about to breach (or already breached) their target, nearest target first"""
+    try:
+        state = request.args.get('state', SLAState.AT_RISK.value)
+        if state not in (SLAState.AT_RISK.value, SLAState.BREACHED.value):
+            raise ValidationError('state must be at_risk or breached', 'state')
+        
+        limit = request.args.get('limit', ESCALATION_PAGE_SIZE, type=int)
+        limit = max(1, min(limit or ESCALATION_PAGE_SIZE, ESCALATION_MAX_PAGE_SIZE))
+        
+        escalations_data = EscalationService.get_sla_watchlist(SLAState(state), limit)
+        
+        audit_log('READ', 'escalations', details=f"Retrieved {len(escalations_data)} {state} escalations")
+        return success_response(escalations_data, 'SLA watchlist retrieved successfully')
+        
+    except ValidationError as e:
+        return error_response(e.message, 400)
+    except Exception as e:
+        logger.error(f"Error retrieving SLA watchlist: {e}")
+        return error_response('Failed to retrieve SLA watchlist', 500)
+
+@api_bp.route('/escalations/workload', methods=['GET'])
+@role_required(['leadership', 'resource_manager', 'delivery_owner'], 'read', 'escalations')
+def get_escalation_workload():
+    """Get each assignee's priority-weighted open escalation load, optionally for one project's team"""
+    try:
+        project_id = None
+        if request.args.get('project_id'):
+            project_id = request.args.get('project_id', type=int)
+            if project_id is None:
+                raise ValidationError('project_id must be an integer', 'project_id')
+        
+        workload = assignment_engine.workload(project_id)
+        
+        audit_log('READ', 'escalations', details=f"Retrieved workload for {len(workload)} assignees")
+        return success_response(workload, 'Escalation workload retrieved successfully')
+        
+    except ValidationError as e:
+        return error_response(e.message, 400)
+    except Exception as e:
+        logger.error(f"Error retrieving escalation workload: {e}")
+        return error_response('Failed to retrieve escalation workload', 500)
+
 @api_bp.route('/escalations/<int:escalation_id>', methods=['GET'])
 @role_required(['leadership', 'resource_manager', 'delivery_owner'], 'read', 'escalations')
+@audited_read('escalations')
+@data_versions.conditional(ESCALATION_TABLES)
 def get_escalation(escalation_id):
     """Get escalation by ID"""
     try:
@@ -100,6 +314,130 @@ def get_escalation(escalation_id):
         logger.error(f"Error retrieving escalation {escalation_id}: {e}")
         return error_response('Failed to retrieve escalation', 500)
 
+@api_bp.route('/escalations/<int:escalation_id>/events', methods=['GET'])
+@role_required(['leadership', 'resource_manager', 'delivery_owner'], 'read', 'escalations')
+@audited_read('escalations')
+@data_versions.conditional(EVENT_TABLES)
+def get_escalation_events(escalation_id):
+    """Get an escalation's status history with the time spent in each status"""
+    try:
+        events = EscalationEventService.get_events(escalation_id)
+        
+        audit_log('READ', 'escalations', escalation_id, f"Retrieved {len(events)} status events")
+        return success_response(events, 'Escalation events retrieved successfully')
+        
+    except ResourceNotFoundError as e:
+        return error_response(e.message, 404)
+    except Exception as e:
+        logger.error(f"Error retrieving events for escalation {escalation_id}: {e}")
+        return error_response('Failed to retrieve escalation events', 500)
+
+@api_bp.route('/escalations/<int:escalation_id>/duplicates', methods=['GET'])
+@role_required(['leadership', 'resource_manager', 'delivery_owner'], 'read', 'escalations')
+@audited_read('escalations')
+@data_versions.conditional(DUPLICATE_TABLES)
+def get_escalation_duplicates(escalation_id):
+    """Get likely duplicates of an escalation in the same project or customer, most similar first"""
+    try:
+        limit = request.args.get('limit', DUPLICATE_LIMIT, type=int)
+        limit = max(1, min(limit or DUPLICATE_LIMIT, ESCALATION_MAX_PAGE_SIZE))
+        
+        duplicates = EscalationDuplicateService.get_duplicates(escalation_id, limit)
+        
+        audit_log('READ', 'escalations', escalation_id, f"Retrieved {len(duplicates)} likely duplicates")
+        return success_response(duplicates, 'Likely duplicate escalations retrieved successfully')
+        
+    except ResourceNotFoundError as e:
+        return error_response(e.message, 404)
+    except Exception as e:
+        logger.error(f"Error retrieving duplicates of escalation {escalation_id}: {e}")
+        return error_response('Failed to retrieve likely duplicate escalations', 500)
+
+@api_bp.route('/escalations/resolution-trends', methods=['GET'])
+@role_required(['leadership', 'resource_manager', 'delivery_owner'], 'read', 'escalations')
+@audited_read('escalations')
+@data_versions.conditional(ROLLUP_TABLES)
+def get_escalation_resolution_trends():
+    """Get monthly response and resolution times with resolution percentiles, optionally for one project or client"""
+    try:
+        months = request.args.get('months', 12, type=int)
+        if not months or not 1 <= months <= TREND_MAX_MONTHS:
+            raise ValidationError(f"months must be between 1 and {TREND_MAX_MONTHS}", 'months')
+        
+        project_id = None
+        if request.args.get('project_id'):
+            project_id = request.args.get('project_id', type=int)
+            if project_id is None:
+                raise ValidationError('project_id must be an integer', 'project_id')
+        
+        try:
+            percentiles = [float(value) for value in request.args.get('percentiles', '50,90').split(',') if value.strip()]
+        except ValueError:
+            percentiles = None
+        if not percentiles or not all(0 < value < 100 for value in percentiles):
+            raise ValidationError('percentiles must be a comma-separated list of numbers between 0 and 100', 'percentiles')
+        
+        trends = EscalationEventService.get_resolution_trends(
+            months, project_id, request.args.get('client'), percentiles
+        )
+        
+        audit_log('READ', 'escalations', details='Retrieved escalation resolution trends')
+        return success_response(trends, 'Escalation resolution trends retrieved successfully')
+        
+    except ValidationError as e:
+        return error_response(e.message, 400)
+    except Exception as e:
+        logger.error(f"Error retrieving escalation resolution trends: {e}")
+        return error_response('Failed to retrieve escalation resolution trends', 500)
+
+@api_bp.route('/escalations/<int:escalation_id>/communications', methods=['GET'])
+@role_required(['leadership', 'resource_manager', 'delivery_owner'], 'read', 'escalations')
+@audited_read('escalation_communications')
+@data_versions.conditional(COMMUNICATION_TABLES)
+def get_escalation_communications(escalation_id):
+    """Get an escalation's communication log, newest first, with cursor pagination"""
+    try:
+        limit = request.args.get('limit', ESCALATION_PAGE_SIZE, type=int)
+        limit = max(1, min(limit or ESCALATION_PAGE_SIZE, ESCALATION_MAX_PAGE_SIZE))
+        
+        entries, next_cursor = EscalationCommunicationService.get_communications(
+            escalation_id, request.args.get('cursor'), limit
+        )
+        
+        audit_log('READ', 'escalation_communications', escalation_id)
+        return cursor_paginated_response(entries, next_cursor, limit, 'Communications retrieved successfully')
+        
+    except ResourceNotFoundError as e:
+        return error_response(e.message, 404)
+    except ValidationError as e:
+        return error_response(e.message, 400)
+    except Exception as e:
+        logger.error(f"Error retrieving communications for escalation {escalation_id}: {e}")
+        return error_response('Failed to retrieve communications', 500)
+
+@api_bp.route('/escalations/<int:escalation_id>/communications', methods=['POST'])
+@role_required(['resource_manager', 'delivery_owner'], 'write', 'escalations')
+def add_escalation_communication(escalation_id):
+    """Append an entry to an escalation's communication log"""
+    try:
+        data = request.get_json()
+        
+        if not data:
+            return error_response('Request body is required', 400)
+        
+        entry = EscalationCommunicationService.add_communication(escalation_id, data, g.current_user)
+        
+        audit_log('CREATE', 'escalation_communications', entry.id, f"Logged {entry.channel or 'communication'} on escalation {escalation_id}")
+        return success_response(entry.to_dict(), 'Communication logged successfully', 201)
+        
+    except ResourceNotFoundError as e:
+        return error_response(e.message, 404)
+    except ValidationError as e:
+        return error_response(e.message, 400)
+    except Exception as e:
+        logger.error(f"Error logging communication on escalation {escalation_id}: {e}")
+        return error_response('Failed to log communication', 500)
+
 @api_bp.route('/escalations/<int:escalation_id>', methods=['PUT'])
 @role_required(['resource_manager', 'delivery_owner'], 'write', 'escalations')
 def update_escalation(escalation_id):
@@ -110,10 +448,7 @@ def update_escalation(escalation_id):
         if not data:
             return error_response('Request body is required', 400)
         
-        # Add updated_by information
-        data['updated_by'] = g.current_user.email
-        
-        escalation = EscalationService.update_escalation(escalation_id, **data)
+        escalation = EscalationService.update_escalation(escalation_id, _escalation_values(data))
         
         audit_log('UPDATE', 'escalations', escalation_id, f"Updated escalation: {escalation.title}")
         return success_response(
@@ -121,12 +456,34 @@ def update_escalation(escalation_id):
             'Escalation updated successfully'
         )
         
+    except ValidationError as e:
+        return error_response(e.message, 400)
     except ValueError as e:
         return error_response(str(e), 400)
     except Exception as e:
         logger.error(f"Error updating escalation {escalation_id}: {e}")
         return error_response('Escalation update failed', 500)
 
+@api_bp.route('/escalations/<int:escalation_id>/assign', methods=['POST'])
+@role_required(['resource_manager', 'delivery_owner'], 'write', 'escalations')
+def assign_escalation(escalation_id):
+    """Assign an escalation to the given assignee, or to the least-loaded other member of its project's team"""
+    try:
+        data = request.get_json(silent=True) or {}
+        
+        escalation = EscalationService.assign_escalation(escalation_id, data.get('assigned_to'))
+        
+        audit_log('UPDATE', 'escalations', escalation_id, f"Assigned escalation to {escalation.assigned_to}")
+        return success_response(escalation.to_dict(), 'Escalation assigned successfully')
+        
+    except ValidationError as e:
+        return error_response(e.message, 409)
+    except ValueError as e:
+        return error_response(str(e), 404)
+    except Exception as e:
+        logger.error(f"Error assigning escalation {escalation_id}: {e}")
+        return error_response('Escalation assignment failed', 500)
+
 @api_bp.route('/escalations/<int:escalation_id>', methods=['DELETE'])
 @role_required(['resource_manager'], 'delete', 'escalations')
 def delete_escalation(escalation_id):
@@ -145,6 +502,8 @@ def delete_escalation(escalation_id):
 
 @api_bp.route('/escalations/analytics', methods=['GET'])
 @role_required(['leadership', 'resource_manager', 'delivery_owner'], 'read', 'escalations')
+@audited_read('escalations_analytics')
+@data_versions.conditional(ESCALATION_TABLES)
 def get_escalation_analytics():
     """Get escalation analytics for charts and reports"""
     try:
@@ -159,6 +518,8 @@ def get_escalation_analytics():
 
 @api_bp.route('/escalations/dashboard-kpis', methods=['GET'])
 @role_required(['leadership', 'resource_manager', 'delivery_owner', 'finance_head'], 'read', 'escalations')
+@audited_read('escalations_kpis')
+@data_versions.conditional(ESCALATION_TABLES)
 def get_escalation_dashboard_kpis():
     """Get escalation KPIs specifically for main dashboard"""
     try:
@@ -173,6 +534,8 @@ def get_escalation_dashboard_kpis():
 
 @api_bp.route('/escalations/summary', methods=['GET'])
 @role_required(['leadership', 'resource_manager', 'delivery_owner'], 'read', 'escalations')
+@audited_read('escalations_summary')
+@data_versions.conditional(ESCALATION_TABLES)
 def get_escalation_summary():
     """Get escalation summary for quick overview"""
     try:
@@ -1,16 +1,61 @@
 
-from flask import request, g
+from flask import request, g, make_response, Response
 from app.api import api_bp
 from app.services.kpi_service import KPIService
 from app.services.escalation_service import EscalationService
+from app.services.dashboard_service import DashboardService
+from app.services.kpi_history_service import KPIHistoryService, COMPARISON_METRICS
+from app.services.kpi_stream_service import kpi_stream
 from app.utils.response import success_response, error_response
-from app.utils.auth import role_required, audit_log
+from app.utils.auth import role_required, audit_log, audited_read, validate_permissions
+from app.utils.cache import response_cache
+from app.utils.rate_limit import rate_limiter
+from app.utils.data_versions import data_versions
+from app.utils.exceptions import ValidationError
+from app.models import Resource, Project, ProjectAllocation, Financials, BenchCosting, Escalation, KPIDailySnapshot
+from app import db
+from datetime import datetime, timedelta
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Tables each group of KPI endpoints reads; commits to any of them invalidate the cached responses
+SUMMARY_TABLES = (Resource, Project, Financials, Escalation)
+DASHBOARD_TABLES = (Resource, Project, ProjectAllocation, Financials, Escalation, KPIDailySnapshot)
+RESOURCE_TABLES = (Resource, ProjectAllocation)
+PROJECT_TABLES = (Project, ProjectAllocation)
+FINANCIAL_TABLES = (Financials, BenchCosting, Project)
+ESCALATION_TABLES = (Escalation, Project)
+HISTORY_TABLES = (KPIDailySnapshot,)
+CHART_TABLES = (Resource, Project, ProjectAllocation, Financials, BenchCosting, Escalation)
+
+RESOURCE_CHART_ROLES = ['leadership', 'resource_manager']
+PROJECT_CHART_ROLES = ['leadership', 'resource_manager', 'delivery_owner']
+FINANCIAL_CHART_ROLES = ['leadership', 'finance_head']
+
+# Charts served by /kpis/charts: name -> (allowed roles, permission resource, loader).
+# Loaders sharing a base query reuse it within the request.
+CHARTS = {
+    'department-distribution': (RESOURCE_CHART_ROLES, 'resources', KPIService.get_department_distribution),
+    'location-distribution': (RESOURCE_CHART_ROLES, 'resources', KPIService.get_location_distribution),
+    'experience-distribution': (RESOURCE_CHART_ROLES, 'resources', KPIService.get_experience_distribution),
+    'bench-aging': (RESOURCE_CHART_ROLES, 'resources', KPIService.get_bench_aging),
+    'utilization-trends': (RESOURCE_CHART_ROLES, 'resources', KPIService.get_utilization_trends),
+    'project-health': (PROJECT_CHART_ROLES, 'projects', KPIService.get_health_distribution),
+    'project-status': (PROJECT_CHART_ROLES, 'projects', KPIService.get_status_distribution),
+    'project-types': (PROJECT_CHART_ROLES, 'projects', KPIService.get_type_distribution),
+    'client-distribution': (PROJECT_CHART_ROLES, 'projects', KPIService.get_client_distribution),
+    'revenue-trends': (FINANCIAL_CHART_ROLES, 'financials', KPIService.get_revenue_trends),
+    'top-projects': (FINANCIAL_CHART_ROLES, 'financials', KPIService.get_top_project_financials),
+    'bench-cost-trends': (FINANCIAL_CHART_ROLES, 'financials', KPIService.get_bench_cost_trends),
+    'escalation-trends': (PROJECT_CHART_ROLES, 'escalations', EscalationService.get_monthly_trend)
+}
+
 @api_bp.route('/kpis/summary', methods=['GET'])
 @role_required(['leadership', 'resource_manager', 'delivery_owner', 'finance_head'], 'read', 'kpis')
+@audited_read('kpis_summary')
+@data_versions.conditional(SUMMARY_TABLES)
+@response_cache.cached(SUMMARY_TABLES)
 def get_kpi_summary():
     """Get comprehensive KPI summary including escalation metrics"""
     try:
@@ -25,37 +70,53 @@ def get_kpi_summary():
 
 @api_bp.route('/kpis/dashboard', methods=['GET'])
 @role_required(['leadership', 'resource_manager', 'delivery_owner', 'finance_head'], 'read', 'kpis')
+@rate_limiter.limit('dashboard')
+@audited_read('dashboard_kpis')
+@data_versions.conditional(DASHBOARD_TABLES)
+@response_cache.cached(DASHBOARD_TABLES)
 def get_dashboard_kpis():
     """Get comprehensive dashboard KPIs with escalation integration"""
     try:
-        # Get all KPI data
-        summary_kpis = KPIService.get_kpi_summary()
-        resource_analytics = KPIService.get_resource_analytics()
-        project_analytics = KPIService.get_project_analytics()
-        financial_analytics = KPIService.get_financial_analytics()
-        escalation_kpis = EscalationService.get_dashboard_kpis()
-        escalation_analytics = EscalationService.get_escalation_analytics()
-        
-        dashboard_data = {
-            'summary': summary_kpis,
-            'resources': resource_analytics,
-            'projects': project_analytics,
-            'financials': financial_analytics,
-            'escalations': {
-                'kpis': escalation_kpis,
-                'analytics': escalation_analytics
-            }
-        }
+        # Sections run concurrently; a failed or slow one is reported in 'sections' instead of failing the response
+        dashboard_data, complete = DashboardService.get_dashboard_kpis()
         
         audit_log('READ', 'dashboard_kpis')
-        return success_response(dashboard_data, 'Dashboard KPIs retrieved successfully')
+        response = make_response(success_response(dashboard_data, 'Dashboard KPIs retrieved successfully'))
+        if not complete:
+            # Keep partial results out of the response cache
+            response.headers['Cache-Control'] = 'no-store'
+        return response
         
     except Exception as e:
         logger.error(f"Error retrieving dashboard KPIs: {e}")
         return error_response('Failed to retrieve dashboard KPIs', 500)
 
+@api_bp.route('/kpis/stream', methods=['GET'])
+@role_required(['leadership', 'resource_manager', 'delivery_owner', 'finance_head'], 'read', 'kpis',
+               locations=['headers', 'query_string'])
+def stream_kpis():
+    """Stream summary KPI changes as server-sent events (token may be passed as ?jwt= for EventSource)"""
+    subscription = kpi_stream.subscribe()
+    if subscription is None:
+        response = make_response(error_response('Too many open KPI streams, retry shortly', 503))
+        response.headers['Retry-After'] = str(kpi_stream.heartbeat_seconds)
+        return response
+    
+    audit_log('READ', 'kpi_stream')
+    
+    # An idle stream must not pin a pooled connection
+    db.session.remove()
+    
+    response = Response(kpi_stream.stream(subscription), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # Disable proxy buffering (nginx)
+    return response
+
 @api_bp.route('/kpis/resources', methods=['GET'])
 @role_required(['leadership', 'resource_manager'], 'read', 'resources')
+@audited_read('resource_kpis')
+@data_versions.conditional(RESOURCE_TABLES)
+@response_cache.cached(RESOURCE_TABLES)
 def get_resource_kpis():
     """Get resource-specific KPIs and analytics"""
     try:
@@ -70,6 +131,9 @@ def get_resource_kpis():
 
 @api_bp.route('/kpis/projects', methods=['GET'])
 @role_required(['leadership', 'resource_manager', 'delivery_owner'], 'read', 'projects')
+@audited_read('project_kpis')
+@data_versions.conditional(PROJECT_TABLES)
+@response_cache.cached(PROJECT_TABLES)
 def get_project_kpis():
     """Get project-specific KPIs and analytics"""
     try:
@@ -84,6 +148,9 @@ def get_project_kpis():
 
 @api_bp.route('/kpis/financials', methods=['GET'])
 @role_required(['leadership', 'finance_head'], 'read', 'financials')
+@audited_read('financial_kpis')
+@data_versions.conditional(FINANCIAL_TABLES)
+@response_cache.cached(FINANCIAL_TABLES)
 def get_financial_kpis():
     """Get financial KPIs and analytics"""
     try:
@@ -98,6 +165,9 @@ def get_financial_kpis():
 
 @api_bp.route('/kpis/escalations', methods=['GET'])
 @role_required(['leadership', 'resource_manager', 'delivery_owner'], 'read', 'escalations')
+@audited_read('escalation_kpis')
+@data_versions.conditional(ESCALATION_TABLES)
+@response_cache.cached(ESCALATION_TABLES)
 def get_escalation_kpis():
     """Get escalation KPIs and analytics with dashboard integration"""
     try:
@@ -116,16 +186,128 @@ def get_escalation_kpis():
         logger.error(f"Error retrieving escalation KPIs: {e}")
         return error_response('Failed to retrieve escalation KPIs', 500)
 
+# Default window and resolution for history queries
+HISTORY_DEFAULT_DAYS = 365
+HISTORY_DEFAULT_POINTS = 120
+HISTORY_MAX_POINTS = 1000
+
+def _date_arg(name, default):
+    value = request.args.get(name)
+    if not value:
+        return default
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise ValidationError(f"{name} must be a date in YYYY-MM-DD format", name)
+
+def _metrics_arg(default=None):
+    metrics = [metric.strip() for metric in request.args.get('metrics', '').split(',') if metric.strip()]
+    if not metrics and default is None:
+        raise ValidationError('metrics is required', 'metrics')
+    return metrics or list(default)
+
+@api_bp.route('/kpis/history', methods=['GET'])
+@role_required(['leadership', 'resource_manager', 'delivery_owner', 'finance_head'], 'read', 'kpis')
+@audited_read('kpi_history')
+@data_versions.conditional(HISTORY_TABLES)
+@response_cache.cached(HISTORY_TABLES)
+def get_kpi_history():
+    """Get daily KPI values over a date range, downsampled to at most `points` per metric"""
+    try:
+        metrics = _metrics_arg()
+        end = _date_arg('end', datetime.utcnow().date())
+        start = _date_arg('start', end - timedelta(days=HISTORY_DEFAULT_DAYS))
+        if start > end:
+            raise ValidationError('start must be on or before end', 'start')
+        
+        points = request.args.get('points', HISTORY_DEFAULT_POINTS, type=int)
+        points = max(1, min(points or HISTORY_DEFAULT_POINTS, HISTORY_MAX_POINTS))
+        aggregate = request.args.get('aggregate', 'avg')
+        
+        history = KPIHistoryService.get_history(metrics, start, end, points, aggregate)
+        
+        audit_log('READ', 'kpi_history')
+        return success_response({
+            'start': start.isoformat(),
+            'end': end.isoformat(),
+            'aggregate': aggregate,
+            'series': history
+        }, 'KPI history retrieved successfully')
+        
+    except ValidationError as e:
+        return error_response(e.message, 400)
+    except Exception as e:
+        logger.error(f"Error retrieving KPI history: {e}")
+        return error_response('Failed to retrieve KPI history', 500)
+
+@api_bp.route('/kpis/history/compare', methods=['GET'])
+@role_required(['leadership', 'resource_manager', 'delivery_owner', 'finance_head'], 'read', 'kpis')
+@audited_read('kpi_comparisons')
+@data_versions.conditional(HISTORY_TABLES)
+@response_cache.cached(HISTORY_TABLES)
+def get_kpi_comparisons():
+    """Get month-over-month and year-over-year changes for KPIs"""
+    try:
+        metrics = _metrics_arg(default=COMPARISON_METRICS)
+        day = _date_arg('date', datetime.utcnow().date())
+        
+        comparisons = KPIHistoryService.get_comparisons(metrics, day)
+        
+        audit_log('READ', 'kpi_comparisons')
+        return success_response(comparisons, 'KPI comparisons retrieved successfully')
+        
+    except ValidationError as e:
+        return error_response(e.message, 400)
+    except Exception as e:
+        logger.error(f"Error retrieving KPI comparisons: {e}")
+        return error_response('Failed to retrieve KPI comparisons', 500)
+
 # Chart-specific endpoints
+@api_bp.route('/kpis/charts', methods=['GET'])
+@role_required(['leadership', 'resource_manager', 'delivery_owner', 'finance_head'], 'read', 'kpis')
+@audited_read('kpi_charts')
+@data_versions.conditional(CHART_TABLES)
+@response_cache.cached(CHART_TABLES)
+def get_charts():
+    """Get several charts in one request, e.g. ?names=department-distribution,bench-aging"""
+    try:
+        names = [name.strip() for name in request.args.get('names', '').split(',') if name.strip()]
+        if not names:
+            return error_response('names is required', 400)
+        
+        unknown = [name for name in names if name not in CHARTS]
+        if unknown:
+            return error_response('Unknown charts', 400, {'names': unknown, 'available': sorted(CHARTS)})
+        
+        role = g.current_user.role
+        denied = [
+            name for name in names
+            if role not in CHARTS[name][0] or not validate_permissions(role, CHARTS[name][1], 'read')
+        ]
+        if denied:
+            return error_response('Insufficient permissions', 403, {'names': denied})
+        
+        charts = {name: CHARTS[name][2]() for name in dict.fromkeys(names)}
+        
+        audit_log('READ', 'kpi_charts', details=','.join(charts))
+        return success_response(charts, 'Charts retrieved successfully')
+        
+    except Exception as e:
+        logger.error(f"Error retrieving charts: {e}")
+        return error_response('Failed to retrieve charts', 500)
+
 @api_bp.route('/kpis/charts/department-distribution', methods=['GET'])
 @role_required(['leadership', 'resource_manager'], 'read', 'resources')
+@audited_read('department_distribution')
+@data_versions.conditional(RESOURCE_TABLES)
+@response_cache.cached(RESOURCE_TABLES)
 def get_department_distribution():
     """Get department-wise resource distribution"""
     try:
-        analytics = KPIService.get_resource_analytics()
+        distribution = KPIService.get_department_distribution()
         
         audit_log('READ', 'department_distribution')
-        return success_response(analytics['department_distribution'], 'Department distribution retrieved successfully')
+        return success_response(distribution, 'Department distribution retrieved successfully')
         
     except Exception as e:
         logger.error(f"Error retrieving department distribution: {e}")
@@ -133,13 +315,16 @@ def get_department_distribution():
 
 @api_bp.route('/kpis/charts/location-distribution', methods=['GET'])
 @role_required(['leadership', 'resource_manager'], 'read', 'resources')
+@audited_read('location_distribution')
+@data_versions.conditional(RESOURCE_TABLES)
+@response_cache.cached(RESOURCE_TABLES)
 def get_location_distribution():
     """Get location-wise resource distribution"""
     try:
-        analytics = KPIService.get_resource_analytics()
+        distribution = KPIService.get_location_distribution()
         
         audit_log('READ', 'location_distribution')
-        return success_response(analytics['location_distribution'], 'Location distribution retrieved successfully')
+        return success_response(distribution, 'Location distribution retrieved successfully')
         
     except Exception as e:
         logger.error(f"Error retrieving location distribution: {e}")
@@ -147,13 +332,16 @@ def get_location_distribution():
 
 @api_bp.route('/kpis/charts/bench-aging', methods=['GET'])
 @role_required(['leadership', 'resource_manager'], 'read', 'resources')
+@audited_read('bench_aging')
+@data_versions.conditional(RESOURCE_TABLES)
+@response_cache.cached(RESOURCE_TABLES)
 def get_bench_aging_analysis():
     """Get bench aging analysis"""
     try:
-        analytics = KPIService.get_resource_analytics()
+        bench_aging = KPIService.get_bench_aging()
         
         audit_log('READ', 'bench_aging')
-        return success_response(analytics['bench_aging'], 'Bench aging analysis retrieved successfully')
+        return success_response(bench_aging, 'Bench aging analysis retrieved successfully')
         
     except Exception as e:
         logger.error(f"Error retrieving bench aging analysis: {e}")
@@ -161,13 +349,16 @@ def get_bench_aging_analysis():
 
 @api_bp.route('/kpis/charts/revenue-trends', methods=['GET'])
 @role_required(['leadership', 'finance_head'], 'read', 'financials')
+@audited_read('revenue_trends')
+@data_versions.conditional(FINANCIAL_TABLES)
+@response_cache.cached(FINANCIAL_TABLES)
 def get_revenue_trends():
     """Get revenue trends"""
     try:
-        analytics = KPIService.get_financial_analytics()
+        trends = KPIService.get_revenue_trends()
         
         audit_log('READ', 'revenue_trends')
-        return success_response(analytics['monthly_trends'], 'Revenue trends retrieved successfully')
+        return success_response(trends, 'Revenue trends retrieved successfully')
         
     except Exception as e:
         logger.error(f"Error retrieving revenue trends: {e}")
@@ -175,13 +366,16 @@ def get_revenue_trends():
 
 @api_bp.route('/kpis/charts/project-health', methods=['GET'])
 @role_required(['leadership', 'resource_manager', 'delivery_owner'], 'read', 'projects')
+@audited_read('project_health')
+@data_versions.conditional(PROJECT_TABLES)
+@response_cache.cached(PROJECT_TABLES)
 def get_project_health_metrics():
     """Get project health metrics"""
     try:
-        analytics = KPIService.get_project_analytics()
+        health = KPIService.get_health_distribution()
         
         audit_log('READ', 'project_health')
-        return success_response(analytics['health_distribution'], 'Project health metrics retrieved successfully')
+        return success_response(health, 'Project health metrics retrieved successfully')
         
     except Exception as e:
         logger.error(f"Error retrieving project health metrics: {e}")
@@ -189,13 +383,16 @@ def get_project_health_metrics():
 
 @api_bp.route('/kpis/charts/escalation-trends', methods=['GET'])
 @role_required(['leadership', 'resource_manager', 'delivery_owner'], 'read', 'escalations')
+@audited_read('escalation_trends')
+@data_versions.conditional(ESCALATION_TABLES)
+@response_cache.cached(ESCALATION_TABLES)
 def get_escalation_trends():
     """Get escalation trends for charts"""
     try:
-        analytics = EscalationService.get_escalation_analytics()
+        trends = EscalationService.get_monthly_trend()
         
         audit_log('READ', 'escalation_trends')
-        return success_response(analytics['monthly_trends'], 'Escalation trends retrieved successfully')
+        return success_response(trends, 'Escalation trends retrieved successfully')
         
     except Exception as e:
         logger.error(f"Error retrieving escalation trends: {e}")
@@ -5,9 +5,17 @@ from app.services.resource_service import ResourceService
 from app.utils.response import success_response, error_response
 from app.utils.validators import validate_required_fields
 from app.utils.auth import role_required
+from app.utils.data_versions import data_versions
+from app.utils.rate_limit import rate_limiter
+from app.models import Resource, PersonalInfo
+
+# Tables resource reads depend on; the ETag changes when either is committed
+RESOURCE_TABLES = (Resource, PersonalInfo)
 
 @api_bp.route('/resources', methods=['GET'])
 @role_required(['leadership', 'resource_manager'], 'read')
+@rate_limiter.limit('listing')
+@data_versions.conditional(RESOURCE_TABLES)
 def get_resources():
     """Get all resources"""
     try:
@@ -69,6 +77,7 @@ def create_resource():
 
 @api_bp.route('/resources/<int:resource_id>', methods=['GET'])
 @role_required(['leadership', 'resource_manager'], 'read')
+@data_versions.conditional(RESOURCE_TABLES)
 def get_resource(resource_id):
     """Get resource by ID"""
     try:
@@ -100,6 +109,7 @@ def get_resource(resource_id):
 
 @api_bp.route('/resources/employee/<string:employee_id>', methods=['GET'])
 @role_required(['leadership', 'resource_manager'], 'read')
+@data_versions.conditional(RESOURCE_TABLES)
 def get_resource_by_employee_id(employee_id):
     """Get resource by employee ID"""
     try:
@@ -159,6 +169,7 @@ def delete_resource(resource_id):
 
 @api_bp.route('/resources/bench', methods=['GET'])
 @role_required(['leadership', 'resource_manager'], 'read')
+@data_versions.conditional(RESOURCE_TABLES)
 def get_bench_resources():
     """Get all bench resources"""
     try:
@@ -182,6 +193,7 @@ def get_bench_resources():
 
 @api_bp.route('/resources/billable', methods=['GET'])
 @role_required(['leadership', 'resource_manager'], 'read')
+@data_versions.conditional(RESOURCE_TABLES)
 def get_billable_resources():
     """Get all billable resources"""
     try:
@@ -205,6 +217,7 @@ def get_billable_resources():
 
 @api_bp.route('/resources/interns', methods=['GET'])
 @role_required(['leadership', 'resource_manager'], 'read')
+@data_versions.conditional(RESOURCE_TABLES)
 def get_intern_resources():
     """Get all intern resources"""
     try:
@@ -0,0 +1,138 @@
+
+import click
+from flask.cli import AppGroup
+import logging
+
+logger = logging.getLogger(__name__)
+
+kpi_snapshots_cli = AppGroup('kpi-snapshots', help='Manage the materialized KPI snapshot')
+
+@kpi_snapshots_cli.command('rebuild')
+def rebuild_kpi_snapshot():
+    """Recompute the KPI snapshot from the base tables"""
+    from app.services.kpi_snapshot_service import KPISnapshotService
+    
+    snapshot = KPISnapshotService.rebuild()
+    click.echo(f"KPI snapshot rebuilt at {snapshot.rebuilt_at.isoformat()}")
+
+kpi_history_cli = AppGroup('kpi-history', help='Record and backfill daily KPI history')
+
+@kpi_history_cli.command('capture')
+@click.option('--date', 'day', type=click.DateTime(formats=['%Y-%m-%d']), help='Day to record the values under (default: today, UTC)')
+def capture_kpi_history(day):
+    """Record the current summary KPIs; run once a day from cron"""
+    from app.services.kpi_history_service import KPIHistoryService
+    
+    day = day.date() if day else None
+    values = KPIHistoryService.capture(day)
+    click.echo(f"Captured {len(values)} KPI values")
+
+@kpi_history_cli.command('backfill')
+@click.option('--start', type=click.DateTime(formats=['%Y-%m-%d']), required=True)
+@click.option('--end', type=click.DateTime(formats=['%Y-%m-%d']), help='Last day to backfill (default: yesterday, UTC)')
+@click.option('--overwrite', is_flag=True, help='Replace days that already have captured values')
+def backfill_kpi_history(start, end, overwrite):
+    """Rebuild financial and escalation history from dated rows"""
+    from app.services.kpi_history_service import KPIHistoryService
+    from datetime import datetime, timedelta
+    
+    end = end.date() if end else datetime.utcnow().date() - timedelta(days=1)
+    days = KPIHistoryService.backfill(start.date(), end, overwrite=overwrite)
+    click.echo(f"Backfilled {days} days")
+
+month_buckets_cli = AppGroup('month-buckets', help='Maintain the stored yyyymm columns behind monthly trends')
+
+@month_buckets_cli.command('backfill')
+@click.option('--overwrite', is_flag=True, help='Recompute every row, not just missing or out-of-date buckets')
+def backfill_month_buckets(overwrite):
+    """Fill month buckets for rows loaded outside the application"""
+    from app.utils import month_buckets
+    
+    updated = month_buckets.backfill(overwrite=overwrite)
+    for table, rows in updated.items():
+        click.echo(f"{table}: {rows} rows updated")
+
+query_plans_cli = AppGroup('query-plans', help='Guard the hot queries against full table scans')
+
+@query_plans_cli.command('check')
+@click.argument('names', nargs=-1)
+@click.option('--verbose', is_flag=True, help='Print the plan of passing queries too')
+def check_query_plans(names, verbose):
+    """EXPLAIN the hot service queries; exits 1 if any reads its table without an index"""
+    from app.services.query_plan_service import QueryPlanService
+    
+    results = QueryPlanService.check(set(names))
+    failed = [result for result in results if not result['ok']]
+    for result in results:
+        click.echo(f"{'ok  ' if result['ok'] else 'FAIL'} {result['name']} ({result['table']})")
+        if verbose or not result['ok']:
+            for line in result['plan']:
+                click.echo(f"       {line}")
+    
+    click.echo(f"{len(results) - len(failed)}/{len(results)} hot queries use an index")
+    if failed:
+        raise SystemExit(1)
+
+sla_cli = AppGroup('sla', help='Escalation SLA tracking')
+
+@sla_cli.command('resync')
+def resync_sla_states():
+    """Recompute the SLA state of every open escalation (e.g. after adding the column or a bulk SQL load)"""
+    from app.services.sla_tracker_service import sla_tracker
+    
+    moved = sla_tracker.resync()
+    click.echo(f"{moved} escalations changed SLA state")
+
+escalation_communications_cli = AppGroup('escalation-communications', help='Escalation communication log')
+
+@escalation_communications_cli.command('migrate')
+@click.option('--batch-size', default=500, show_default=True, help='Escalations converted per transaction')
+def migrate_escalation_communications(batch_size):
+    """Split the old escalations.communication_log JSON into escalation_communications rows"""
+    from app.services.escalation_communication_service import EscalationCommunicationService
+    
+    escalations, entries = EscalationCommunicationService.migrate_legacy_logs(batch_size)
+    click.echo(f"Migrated {entries} entries from {escalations} escalations")
+
+escalation_search_cli = AppGroup('escalation-search', help='Escalation full-text index')
+
+@escalation_search_cli.command('rebuild')
+def rebuild_escalation_search():
+    """Create the full-text index if missing and re-index every escalation"""
+    from app.services.escalation_search_service import EscalationSearchService
+    
+    indexed = EscalationSearchService.rebuild()
+    click.echo(f"Indexed {indexed} escalations")
+
+escalation_rollups_cli = AppGroup('escalation-rollups', help='Monthly escalation timing rollups')
+
+@escalation_rollups_cli.command('rebuild')
+def rebuild_escalation_rollups():
+    """Fill missing response/resolution hours from their dates and recompute the monthly rollups"""
+    from app.services.escalation_event_service import EscalationEventService
+    
+    counted = EscalationEventService.rebuild_rollups()
+    click.echo(f"Rebuilt escalation rollups from {counted} escalations")
+
+escalation_duplicates_cli = AppGroup('escalation-duplicates', help='Escalation near-duplicate index')
+
+@escalation_duplicates_cli.command('rebuild')
+@click.option('--batch-size', default=1000, show_default=True, help='Escalations indexed per transaction')
+def rebuild_escalation_duplicates(batch_size):
+    """Recompute the MinHash signature and LSH bands of every escalation"""
+    from app.services.escalation_duplicate_service import EscalationDuplicateService
+    
+    indexed = EscalationDuplicateService.rebuild(batch_size)
+    click.echo(f"Indexed signatures for {indexed} escalations")
+
+def register_commands(app):
+    """Register management commands with the Flask CLI"""
+    app.cli.add_command(kpi_snapshots_cli)
+    app.cli.add_command(kpi_history_cli)
+    app.cli.add_command(month_buckets_cli)
+    app.cli.add_command(query_plans_cli)
+    app.cli.add_command(sla_cli)
+    app.cli.add_command(escalation_communications_cli)
+    app.cli.add_command(escalation_search_cli)
+    app.cli.add_command(escalation_rollups_cli)
+    app.cli.add_command(escalation_duplicates_cli)
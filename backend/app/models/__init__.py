@@ -1,19 +1,29 @@
 
 from .user import User
+from .role_permission import RolePermission
 from .resource import Resource, ResourceSkillAssessment  
 from .project import Project, ProjectMilestone, ProjectRisk, ProjectDeliverable, ClientFeedback
 from .project_allocation import ProjectAllocation
 from .financial import Financials
 from .bench_costing import BenchCosting
 from .escalation import Escalation
+from .escalation_communication import EscalationCommunication
+from .escalation_event import EscalationEvent
+from .escalation_rollup import EscalationMonthlyRollup, EscalationResolutionBucket
+from .escalation_signature import EscalationSignature, EscalationLSHBand
 from .skills_master import SkillsMaster
 from .resource_skills import ResourceSkills
 from .resource_resignation import ResourceResignation
 from .personal_info import PersonalInfo
+from .kpi_snapshot import KPISnapshot
+from .kpi_daily_snapshot import KPIDailySnapshot
+from .audit_event import AuditEvent
+from .data_version import DataVersion
 
 __all__ = [
-    'User', 'Resource', 'ResourceSkillAssessment', 'Project', 'ProjectMilestone', 
+    'User', 'RolePermission', 'Resource', 'ResourceSkillAssessment', 'Project', 'ProjectMilestone', 
     'ProjectRisk', 'ProjectDeliverable', 'ClientFeedback', 'ProjectAllocation', 
-    'Financials', 'BenchCosting', 'Escalation', 'SkillsMaster', 'ResourceSkills',
-    'ResourceResignation', 'PersonalInfo'
+    'Financials', 'BenchCosting', 'Escalation', 'EscalationCommunication', 'EscalationEvent',
+    'EscalationMonthlyRollup', 'EscalationResolutionBucket', 'EscalationSignature', 'EscalationLSHBand', 'SkillsMaster', 'ResourceSkills',
+    'ResourceResignation', 'PersonalInfo', 'KPISnapshot', 'KPIDailySnapshot', 'AuditEvent', 'DataVersion'
 ]
@@ -0,0 +1,43 @@
+from app import db
+from datetime import datetime
+
+class AuditEvent(db.Model):
+    """One audited action, written in batches by app.services.audit_service.AuditWriter"""
+    __tablename__ = 'audit_events'
+
+    id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True)
+    occurred_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    user_id = db.Column(db.Integer)  # No foreign key, so batches never wait on users
+    user_email = db.Column(db.String(120))
+    action = db.Column(db.String(50), nullable=False)
+    resource_type = db.Column(db.String(50), nullable=False)
+    resource_id = db.Column(db.String(100))
+    details = db.Column(db.Text)
+    method = db.Column(db.String(10))
+    path = db.Column(db.String(255))
+    ip_address = db.Column(db.String(45))
+
+    # The query API filters by user or resource type within a time range, newest first
+    __table_args__ = (
+        db.Index('idx_audit_events_user_occurred', 'user_id', 'occurred_at', 'id'),
+        db.Index('idx_audit_events_resource_occurred', 'resource_type', 'occurred_at', 'id'),
+        db.Index('idx_audit_events_occurred', 'occurred_at', 'id'),
+    )
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'occurred_at': self.occurred_at.isoformat() if self.occurred_at else None,
+            'user_id': self.user_id,
+            'user_email': self.user_email,
+            'action': self.action,
+            'resource_type': self.resource_type,
+            'resource_id': self.resource_id,
+            'details': self.details,
+            'method': self.method,
+            'path': self.path,
+            'ip_address': self.ip_address
+        }
+
+    def __repr__(self):
+        return f'<AuditEvent {self.action} {self.resource_type} {self.resource_id}>'
@@ -10,11 +10,11 @@ class BenchCosting(db.Model):
     month_year = db.Column(db.Date, nullable=False)
     
     # Cost Details
-    bench_cost = db.Column(db.Decimal(12, 2))
-    salary_cost = db.Column(db.Decimal(12, 2))
-    benefits_cost = db.Column(db.Decimal(12, 2))
-    overhead_cost = db.Column(db.Decimal(12, 2))
-    training_cost = db.Column(db.Decimal(12, 2))
+    bench_cost = db.Column(db.Numeric(12, 2))
+    salary_cost = db.Column(db.Numeric(12, 2))
+    benefits_cost = db.Column(db.Numeric(12, 2))
+    overhead_cost = db.Column(db.Numeric(12, 2))
+    training_cost = db.Column(db.Numeric(12, 2))
     
     # Time Tracking
     bench_days = db.Column(db.Integer, default=0)
@@ -39,7 +39,11 @@ class BenchCosting(db.Model):
     resource = db.relationship('Resource', back_populates='bench_costs')
     
     # Unique constraint
-    __table_args__ = (db.UniqueConstraint('resource_id', 'month_year'),)
+    __table_args__ = (
+        db.UniqueConstraint('resource_id', 'month_year'),
+        # Trailing-window trends filter on month_year alone
+        db.Index('idx_bench_costing_month', 'month_year'),
+    )
     
     def to_dict(self):
         return {
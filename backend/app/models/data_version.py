@@ -0,0 +1,11 @@
+from app import db
+
+class DataVersion(db.Model):
+    """Version counter per table, incremented in the same transaction as every commit that writes to it"""
+    __tablename__ = 'data_versions'
+
+    table_name = db.Column(db.String(100), primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<DataVersion {self.table_name}={self.version}>'
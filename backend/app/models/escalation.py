@@ -1,7 +1,7 @@
 
 from app import db
 from datetime import datetime
-from sqlalchemy import Enum, Text, JSON
+from sqlalchemy import Enum, Text
 import enum
 
 class EscalationType(enum.Enum):
@@ -41,6 +41,11 @@ class EscalationStatus(enum.Enum):
     CLOSED = 'closed'
     CANCELLED = 'cancelled'
 
+class SLAState(enum.Enum):
+    ON_TRACK = 'on_track'
+    AT_RISK = 'at_risk'
+    BREACHED = 'breached'
+
 class ResolutionStatus(enum.Enum):
     PENDING = 'pending'
     FIXED = 'fixed'
@@ -53,6 +58,8 @@ class Escalation(db.Model):
     
     # Primary identifiers
     id = db.Column(db.Integer, primary_key=True)
+    external_id = db.Column(db.String(100), unique=True)  # Ticket ID in the client's system; the bulk import key
+    possible_duplicate_of = db.Column(db.Integer, db.ForeignKey('escalations.id', ondelete='SET NULL'))  # Flagged on create
     title = db.Column(db.String(200), nullable=False)
     description = db.Column(Text)
     
@@ -75,13 +82,16 @@ class Escalation(db.Model):
     # Status Tracking
     status = db.Column(Enum(EscalationStatus), nullable=False, default=EscalationStatus.OPEN)
     resolution_status = db.Column(Enum(ResolutionStatus), default=ResolutionStatus.PENDING)
+    sla_state = db.Column(Enum(SLAState))  # Maintained by app.services.sla_tracker_service; NULL once closed
     
     # Timeline
     raised_date = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    raised_month = db.Column(db.Integer)  # yyyymm of raised_date, kept in step by app.utils.month_buckets
     date_acknowledged = db.Column(db.DateTime)
     target_resolution_date = db.Column(db.DateTime)
     actual_resolution_date = db.Column(db.DateTime)
     resolved_date = db.Column(db.DateTime)
+    status_changed_at = db.Column(db.DateTime)  # Last status change, stamped by app.services.escalation_event_service
     date_closed = db.Column(db.DateTime)
     response_time_hours = db.Column(db.Numeric(8, 2))
     resolution_time_hours = db.Column(db.Numeric(8, 2))
@@ -101,7 +111,7 @@ class Escalation(db.Model):
     # Communication
     client_communication = db.Column(Text)
     internal_notes = db.Column(Text)
-    communication_log = db.Column(JSON)  # Array of communication entries
+    # Communication entries live in escalation_communications (see EscalationCommunication)
     
     # Approval and Sign-off
     client_signoff_required = db.Column(db.Boolean, default=False)
@@ -114,10 +124,33 @@ class Escalation(db.Model):
     
     # Relationships
     project = db.relationship('Project', back_populates='escalations')
+    communications = db.relationship(
+        'EscalationCommunication', back_populates='escalation', cascade='all, delete-orphan', lazy='dynamic'
+    )
+    events = db.relationship(
+        'EscalationEvent', back_populates='escalation', cascade='all, delete-orphan', lazy='dynamic'
+    )
+    
+    __table_args__ = (
+        # Covers the monthly trend (range on raised_month, counts by status) without touching the table
+        db.Index('idx_escalations_raised_month_status', 'raised_month', 'status'),
+        # Keyset for the paginated escalation list
+        db.Index('idx_escalations_raised_date_id', 'raised_date', 'id'),
+        # Overdue counts: status IN (...) AND target_resolution_date < now
+        db.Index('idx_escalations_status_target', 'status', 'target_resolution_date'),
+        db.Index('idx_escalations_priority_status', 'priority', 'status'),
+        # List filters, already in keyset order within each value
+        db.Index('idx_escalations_project_raised', 'project_id', 'raised_date'),
+        db.Index('idx_escalations_assigned_raised', 'assigned_to', 'raised_date'),
+        # SLA counts and the at-risk list, soonest target first
+        db.Index('idx_escalations_sla_state_target', 'sla_state', 'target_resolution_date'),
+    )
     
     def to_dict(self):
         return {
             'id': self.id,
+            'external_id': self.external_id,
+            'possible_duplicate_of': self.possible_duplicate_of,
             'title': self.title,
             'description': self.description,
             'project_id': self.project_id,
@@ -134,11 +167,13 @@ class Escalation(db.Model):
             'severity': self.severity.value if self.severity else None,
             'status': self.status.value if self.status else None,
             'resolution_status': self.resolution_status.value if self.resolution_status else None,
+            'sla_state': self.sla_state.value if self.sla_state else None,
             'raised_date': self.raised_date.isoformat() if self.raised_date else None,
             'date_acknowledged': self.date_acknowledged.isoformat() if self.date_acknowledged else None,
             'target_resolution_date': self.target_resolution_date.isoformat() if self.target_resolution_date else None,
             'actual_resolution_date': self.actual_resolution_date.isoformat() if self.actual_resolution_date else None,
             'resolved_date': self.resolved_date.isoformat() if self.resolved_date else None,
+            'status_changed_at': self.status_changed_at.isoformat() if self.status_changed_at else None,
             'date_closed': self.date_closed.isoformat() if self.date_closed else None,
             'response_time_hours': float(self.response_time_hours) if self.response_time_hours else None,
             'resolution_time_hours': float(self.resolution_time_hours) if self.resolution_time_hours else None,
@@ -152,7 +187,6 @@ class Escalation(db.Model):
             'preventive_measures': self.preventive_measures,
             'client_communication': self.client_communication,
             'internal_notes': self.internal_notes,
-            'communication_log': self.communication_log,
             'client_signoff_required': self.client_signoff_required,
             'client_signoff_date': self.client_signoff_date.isoformat() if self.client_signoff_date else None,
             'client_satisfaction_rating': float(self.client_satisfaction_rating) if self.client_satisfaction_rating else None,
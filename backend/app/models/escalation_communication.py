@@ -0,0 +1,45 @@
+from app import db
+from datetime import datetime
+from sqlalchemy import Text, JSON
+
+class EscalationCommunication(db.Model):
+    """One entry in an escalation's communication log; rows are only ever appended"""
+    __tablename__ = 'escalation_communications'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    escalation_id = db.Column(db.Integer, db.ForeignKey('escalations.id', ondelete='CASCADE'), nullable=False)
+    channel = db.Column(db.String(50))  # email, call, meeting, note, ...
+    author = db.Column(db.String(100))
+    recipients = db.Column(db.String(500))
+    subject = db.Column(db.String(200))
+    message = db.Column(Text)
+    details = db.Column(JSON)  # Fields of migrated entries that have no column of their own
+    occurred_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    created_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # Relationships
+    escalation = db.relationship('Escalation', back_populates='communications')
+    
+    # Keyset for paging through one escalation's log
+    __table_args__ = (
+        db.Index('idx_escalation_communications_escalation_occurred', 'escalation_id', 'occurred_at', 'id'),
+    )
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'escalation_id': self.escalation_id,
+            'channel': self.channel,
+            'author': self.author,
+            'recipients': self.recipients,
+            'subject': self.subject,
+            'message': self.message,
+            'details': self.details,
+            'occurred_at': self.occurred_at.isoformat() if self.occurred_at else None,
+            'created_by': self.created_by,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+    
+    def __repr__(self):
+        return f'<EscalationCommunication {self.escalation_id}: {self.channel}>'
@@ -0,0 +1,38 @@
+from app import db
+from datetime import datetime
+from sqlalchemy import Enum
+from app.models.escalation import EscalationStatus
+
+class EscalationEvent(db.Model):
+    """One status change of an escalation, with the time spent in the status it left"""
+    __tablename__ = 'escalation_events'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    escalation_id = db.Column(db.Integer, db.ForeignKey('escalations.id', ondelete='CASCADE'), nullable=False)
+    from_status = db.Column(Enum(EscalationStatus))  # NULL for the escalation being raised
+    to_status = db.Column(Enum(EscalationStatus), nullable=False)
+    occurred_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    hours_in_previous_status = db.Column(db.Float)
+    changed_by = db.Column(db.String(100))
+    
+    # Relationships
+    escalation = db.relationship('Escalation', back_populates='events')
+    
+    # An escalation's history in order
+    __table_args__ = (
+        db.Index('idx_escalation_events_escalation_occurred', 'escalation_id', 'occurred_at', 'id'),
+    )
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'escalation_id': self.escalation_id,
+            'from_status': self.from_status.value if self.from_status else None,
+            'to_status': self.to_status.value if self.to_status else None,
+            'occurred_at': self.occurred_at.isoformat() if self.occurred_at else None,
+            'hours_in_previous_status': round(self.hours_in_previous_status, 2) if self.hours_in_previous_status is not None else None,
+            'changed_by': self.changed_by
+        }
+    
+    def __repr__(self):
+        return f'<EscalationEvent {self.escalation_id}: {self.from_status} -> {self.to_status}>'
@@ -0,0 +1,33 @@
+from app import db
+from datetime import datetime
+
+class EscalationMonthlyRollup(db.Model):
+    """Escalation timing totals per month and project, kept current by deltas on write"""
+    __tablename__ = 'escalation_monthly_rollups'
+    
+    month = db.Column(db.Integer, primary_key=True)  # yyyymm
+    project_id = db.Column(db.Integer, db.ForeignKey('projects.id', ondelete='CASCADE'), primary_key=True)
+    
+    raised_count = db.Column(db.Integer, nullable=False, default=0)  # by month raised
+    resolved_count = db.Column(db.Integer, nullable=False, default=0)  # by month resolved
+    resolution_hours_sum = db.Column(db.Float, nullable=False, default=0)
+    responded_count = db.Column(db.Integer, nullable=False, default=0)  # by month acknowledged
+    response_hours_sum = db.Column(db.Float, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    COUNTER_FIELDS = ('raised_count', 'resolved_count', 'resolution_hours_sum', 'responded_count', 'response_hours_sum')
+    
+    def __repr__(self):
+        return f'<EscalationMonthlyRollup {self.month} project {self.project_id}>'
+
+class EscalationResolutionBucket(db.Model):
+    """Histogram of resolution times per month resolved and project; percentiles are read from it"""
+    __tablename__ = 'escalation_resolution_buckets'
+    
+    month = db.Column(db.Integer, primary_key=True)  # yyyymm
+    project_id = db.Column(db.Integer, db.ForeignKey('projects.id', ondelete='CASCADE'), primary_key=True)
+    bucket = db.Column(db.Integer, primary_key=True)  # see app.services.escalation_event_service.resolution_bucket
+    count = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<EscalationResolutionBucket {self.month} project {self.project_id} bucket {self.bucket}>'
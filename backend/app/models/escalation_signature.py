@@ -0,0 +1,32 @@
+from app import db
+from datetime import datetime
+
+class EscalationSignature(db.Model):
+    """MinHash signature of an escalation's title and description, for near-duplicate lookups"""
+    __tablename__ = 'escalation_signatures'
+
+    escalation_id = db.Column(db.Integer, db.ForeignKey('escalations.id', ondelete='CASCADE'), primary_key=True)
+    project_id = db.Column(db.Integer, nullable=False)
+    customer = db.Column(db.String(200))  # Escalation customer, else the project's client; lowercased
+    minhash = db.Column(db.LargeBinary, nullable=False)  # see app.services.escalation_duplicate_service
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<EscalationSignature {self.escalation_id}>'
+
+class EscalationLSHBand(db.Model):
+    """One locality-sensitive hashing band of a signature; escalations sharing a band are duplicate candidates"""
+    __tablename__ = 'escalation_lsh_bands'
+
+    band_hash = db.Column(db.BigInteger, primary_key=True)
+    escalation_id = db.Column(
+        db.Integer, db.ForeignKey('escalation_signatures.escalation_id', ondelete='CASCADE'), primary_key=True
+    )
+
+    # Re-indexing an escalation deletes its bands by id
+    __table_args__ = (
+        db.Index('idx_escalation_lsh_bands_escalation', 'escalation_id'),
+    )
+
+    def __repr__(self):
+        return f'<EscalationLSHBand {self.band_hash}: {self.escalation_id}>'
@@ -8,11 +8,11 @@ class Financials(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     project_id = db.Column(db.Integer, db.ForeignKey('projects.id'), nullable=False)
     month_year = db.Column(db.Date, nullable=False)
-    revenue = db.Column(db.Decimal(12, 2))
-    cost = db.Column(db.Decimal(12, 2))
-    margin = db.Column(db.Decimal(12, 2))
-    invoiced_amount = db.Column(db.Decimal(12, 2))
-    collected_amount = db.Column(db.Decimal(12, 2))
+    revenue = db.Column(db.Numeric(12, 2))
+    cost = db.Column(db.Numeric(12, 2))
+    margin = db.Column(db.Numeric(12, 2))
+    invoiced_amount = db.Column(db.Numeric(12, 2))
+    collected_amount = db.Column(db.Numeric(12, 2))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -20,7 +20,11 @@ class Financials(db.Model):
     project = db.relationship('Project', back_populates='financials')
     
     # Unique constraint
-    __table_args__ = (db.UniqueConstraint('project_id', 'month_year'),)
+    __table_args__ = (
+        db.UniqueConstraint('project_id', 'month_year'),
+        # Trailing-window trends filter on month_year alone
+        db.Index('idx_financials_month_project', 'month_year', 'project_id'),
+    )
     
     def to_dict(self):
         return {
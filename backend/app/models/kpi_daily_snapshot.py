@@ -0,0 +1,26 @@
+from app import db
+from datetime import datetime
+
+class KPIDailySnapshot(db.Model):
+    """One summary KPI value per metric per day; (metric, snapshot_date) is the range-scan key"""
+    __tablename__ = 'kpi_daily_snapshots'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    metric = db.Column(db.String(64), nullable=False)
+    snapshot_date = db.Column(db.Date, nullable=False)
+    value = db.Column(db.Float, nullable=False, default=0)
+    source = db.Column(db.String(20), nullable=False, default='capture')  # capture or backfill
+    captured_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (db.UniqueConstraint('metric', 'snapshot_date', name='unique_kpi_metric_date'),)
+    
+    def to_dict(self):
+        return {
+            'metric': self.metric,
+            'date': self.snapshot_date.isoformat(),
+            'value': self.value,
+            'source': self.source
+        }
+    
+    def __repr__(self):
+        return f'<KPIDailySnapshot {self.metric} {self.snapshot_date}>'
@@ -0,0 +1,75 @@
+
+from app import db
+from datetime import datetime
+
+class KPISnapshot(db.Model):
+    """Materialized dashboard figures, kept current by incremental deltas on write"""
+    __tablename__ = 'kpi_snapshots'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    
+    # Resource figures
+    total_resources = db.Column(db.Integer, nullable=False, default=0)
+    billable_resources = db.Column(db.Integer, nullable=False, default=0)
+    bench_resources = db.Column(db.Integer, nullable=False, default=0)
+    intern_resources = db.Column(db.Integer, nullable=False, default=0)
+    contractor_resources = db.Column(db.Integer, nullable=False, default=0)
+    training_resources = db.Column(db.Integer, nullable=False, default=0)
+    bench_count = db.Column(db.Integer, nullable=False, default=0)
+    bench_days_total = db.Column(db.Integer, nullable=False, default=0)
+    
+    # Project figures
+    active_projects = db.Column(db.Integer, nullable=False, default=0)
+    completed_projects = db.Column(db.Integer, nullable=False, default=0)
+    delayed_projects = db.Column(db.Integer, nullable=False, default=0)
+    at_risk_projects = db.Column(db.Integer, nullable=False, default=0)
+    on_time_projects = db.Column(db.Integer, nullable=False, default=0)
+    active_health_total = db.Column(db.Integer, nullable=False, default=0)
+    
+    # Financial figures (current month)
+    financial_month = db.Column(db.Date)
+    monthly_revenue = db.Column(db.Numeric(15, 2), nullable=False, default=0)
+    monthly_cost = db.Column(db.Numeric(15, 2), nullable=False, default=0)
+    
+    # Escalation figures
+    total_escalations = db.Column(db.Integer, nullable=False, default=0)
+    open_escalations = db.Column(db.Integer, nullable=False, default=0)
+    critical_escalations = db.Column(db.Integer, nullable=False, default=0)
+    overdue_escalations = db.Column(db.Integer, nullable=False, default=0)
+    
+    # Refresh bookkeeping
+    time_refreshed_at = db.Column(db.DateTime)  # Last refresh of time-dependent figures
+    rebuilt_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # Figures that are maintained by adding deltas on write
+    COUNTER_FIELDS = (
+        'total_resources', 'billable_resources', 'bench_resources', 'intern_resources',
+        'contractor_resources', 'training_resources', 'bench_count', 'bench_days_total',
+        'active_projects', 'completed_projects', 'delayed_projects', 'at_risk_projects',
+        'on_time_projects', 'active_health_total',
+        'monthly_revenue', 'monthly_cost',
+        'total_escalations', 'open_escalations', 'critical_escalations', 'overdue_escalations'
+    )
+    
+    def to_figures(self):
+        """Raw figures in the shape KPIService.build_summary expects"""
+        figures = {field: getattr(self, field) or 0 for field in self.COUNTER_FIELDS}
+        figures['financial_month'] = self.financial_month
+        return figures
+    
+    def to_dict(self):
+        data = self.to_figures()
+        data.update({
+            'id': self.id,
+            'monthly_revenue': float(self.monthly_revenue or 0),
+            'monthly_cost': float(self.monthly_cost or 0),
+            'financial_month': self.financial_month.isoformat() if self.financial_month else None,
+            'time_refreshed_at': self.time_refreshed_at.isoformat() if self.time_refreshed_at else None,
+            'rebuilt_at': self.rebuilt_at.isoformat() if self.rebuilt_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        })
+        return data
+
+    def __repr__(self):
+        return f'<KPISnapshot {self.id}>'
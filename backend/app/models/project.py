@@ -149,6 +149,9 @@ class Project(db.Model):
     deliverables_list = db.relationship('ProjectDeliverable', back_populates='project', cascade='all, delete-orphan')
     client_feedback = db.relationship('ClientFeedback', back_populates='project', cascade='all, delete-orphan')
     
+    # Health distribution filters on status and groups on health_status
+    __table_args__ = (db.Index('idx_projects_status_health_status', 'status', 'health_status'),)
+    
     def to_dict(self):
         return {
             'id': self.id,
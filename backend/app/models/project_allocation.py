@@ -18,21 +18,21 @@ class ProjectAllocation(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     project_id = db.Column(db.Integer, db.ForeignKey('projects.id'), nullable=False)
     resource_id = db.Column(db.Integer, db.ForeignKey('resources.id'), nullable=False)
-    allocation_percentage = db.Column(db.Decimal(5, 2), nullable=False)
+    allocation_percentage = db.Column(db.Numeric(5, 2), nullable=False)
     start_date = db.Column(db.Date, nullable=False)
     end_date = db.Column(db.Date)
     planned_end_date = db.Column(db.Date)
     role_in_project = db.Column(db.String(100))
     responsibilities = db.Column(db.Text)
     status = db.Column(Enum(AllocationStatus), default=AllocationStatus.PLANNED)
-    billing_rate = db.Column(db.Decimal(10, 2))
-    cost_rate = db.Column(db.Decimal(10, 2))
-    daily_hours = db.Column(db.Decimal(4, 2), default=8.00)
-    weekly_hours = db.Column(db.Decimal(4, 2), default=40.00)
-    overtime_hours = db.Column(db.Decimal(6, 2), default=0.00)
-    utilization_efficiency = db.Column(db.Decimal(5, 2))
-    skill_match_percentage = db.Column(db.Decimal(5, 2))
-    performance_rating = db.Column(db.Decimal(3, 2))
+    billing_rate = db.Column(db.Numeric(10, 2))
+    cost_rate = db.Column(db.Numeric(10, 2))
+    daily_hours = db.Column(db.Numeric(4, 2), default=8.00)
+    weekly_hours = db.Column(db.Numeric(4, 2), default=40.00)
+    overtime_hours = db.Column(db.Numeric(6, 2), default=0.00)
+    utilization_efficiency = db.Column(db.Numeric(5, 2))
+    skill_match_percentage = db.Column(db.Numeric(5, 2))
+    performance_rating = db.Column(db.Numeric(3, 2))
     allocation_notes = db.Column(db.Text)
     created_by = db.Column(db.Integer)
     approved_by = db.Column(db.Integer)
@@ -44,6 +44,13 @@ class ProjectAllocation(db.Model):
     project = db.relationship('Project', back_populates='allocations')
     resource = db.relationship('Resource', back_populates='allocations')
 
+    # Indexes for the filters the KPI and list queries run
+    __table_args__ = (
+        db.Index('idx_project_allocations_resource_status', 'resource_id', 'status'),
+        db.Index('idx_project_allocations_project_status', 'project_id', 'status'),
+        db.Index('idx_project_allocations_status', 'status'),
+    )
+
     def to_dict(self):
         """Convert to dictionary for JSON serialization"""
         return {
@@ -150,6 +150,13 @@ class Resource(db.Model):
     bench_costs = db.relationship('BenchCosting', back_populates='resource', cascade='all, delete-orphan')
     skill_assessments = db.relationship('ResourceSkillAssessment', back_populates='resource', cascade='all, delete-orphan')
     
+    # Indexes for the filters the KPI and list queries run
+    __table_args__ = (
+        db.Index('idx_resources_employment_status_department', 'employment_status', 'department'),
+        db.Index('idx_resources_status_employment_status', 'status', 'employment_status'),
+        db.Index('idx_resources_resource_type', 'resource_type'),
+    )
+    
     def to_dict(self):
         return {
             'id': self.id,
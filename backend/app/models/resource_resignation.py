@@ -8,6 +8,7 @@ class ResourceResignation(db.Model):
     employee_id = db.Column(db.String(50), nullable=False, index=True)
     emp_name = db.Column(db.String(200), nullable=False)
     date_of_resignation = db.Column(db.Date, nullable=False)
+    resignation_month = db.Column(db.Integer, index=True)  # yyyymm of date_of_resignation
     skill = db.Column(db.String(500), nullable=True)
     client = db.Column(db.String(200), nullable=True)
     project_name = db.Column(db.String(200), nullable=True)
@@ -0,0 +1,24 @@
+from app import db
+from datetime import datetime
+
+class RolePermission(db.Model):
+    """One action a role may take on a resource; a missing row means the action is denied"""
+    __tablename__ = 'role_permissions'
+
+    role = db.Column(db.String(50), primary_key=True)
+    resource = db.Column(db.String(50), primary_key=True)
+    action = db.Column(db.String(20), primary_key=True)
+    updated_by = db.Column(db.String(120))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'role': self.role,
+            'resource': self.resource,
+            'action': self.action,
+            'updated_by': self.updated_by,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+    def __repr__(self):
+        return f'<RolePermission {self.role}: {self.action} {self.resource}>'
@@ -1,7 +1,6 @@
 
 from app import db
 from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
 
 class User(db.Model):
     __tablename__ = 'users'
@@ -12,16 +11,28 @@ class User(db.Model):
     name = db.Column(db.String(100), nullable=False)
     role = db.Column(db.String(50), nullable=False)
     is_active = db.Column(db.Boolean, default=True)
+    tokens_valid_after = db.Column(db.DateTime)  # Access tokens issued earlier are refused
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     def set_password(self, password):
-        """Hash and set password"""
-        self.password_hash = generate_password_hash(password)
+        """Hash and set password with the configured algorithm and cost"""
+        from app.utils.passwords import password_hasher
+        self.password_hash = password_hasher.hash(password)
 
     def check_password(self, password):
         """Check if provided password matches hash"""
-        return check_password_hash(self.password_hash, password)
+        from app.utils.passwords import password_hasher
+        return password_hasher.verify(self.password_hash, password)
+
+    def password_needs_rehash(self):
+        """True when the stored hash predates the configured algorithm or cost"""
+        from app.utils.passwords import password_hasher
+        return password_hasher.needs_rehash(self.password_hash)
+
+    def revoke_tokens(self):
+        """Refuse every access token issued so far, e.g. once its claims are out of date"""
+        self.tokens_valid_after = datetime.utcnow()
 
     def to_dict(self):
         """Convert to dictionary for JSON serialization"""
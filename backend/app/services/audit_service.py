@@ -0,0 +1,196 @@
+from app import db
+from app.models.audit_event import AuditEvent
+from app.utils.exceptions import ValidationError
+from app.utils.pagination import encode_cursor, decode_cursor
+from sqlalchemy import insert, tuple_
+from datetime import datetime
+import atexit
+import queue
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+AUDIT_PAGE_SIZE = 100
+AUDIT_MAX_PAGE_SIZE = 500
+
+# Every event carries every column, so one batch is one executemany; lengths are clipped rather than failing the batch
+EVENT_FIELDS = {
+    'user_id': None, 'user_email': 120, 'action': 50, 'resource_type': 50, 'resource_id': 100,
+    'details': None, 'method': 10, 'path': 255, 'ip_address': 45
+}
+
+def _event_row(occurred_at, fields):
+    row = {'occurred_at': occurred_at}
+    for field, length in EVENT_FIELDS.items():
+        value = fields.get(field)
+        if length is not None and value is not None:
+            value = str(value)[:length]
+        row[field] = value
+    return row
+
+class AuditWriter:
+    """
+    Writes audit events to audit_events off the request path. Requests put events on a bounded
+    queue; one thread per worker inserts them in batches of batch_size, or whatever has arrived
+    after flush_interval. When the queue is full a request waits up to enqueue_timeout for room,
+    then the event is dropped (it is still in the application log) so auditing can never stall a request.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.enabled = True
+        self.batch_size = 200
+        self.flush_interval = 0.5
+        self.enqueue_timeout = 0.05
+        self.dropped = 0
+        self._dropped_lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=10000)
+        self._write_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread = None
+        self._thread_lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = app.config.get('AUDIT_WRITER_ENABLED', True)
+        self.batch_size = app.config.get('AUDIT_BATCH_SIZE', 200)
+        self.flush_interval = app.config.get('AUDIT_FLUSH_MS', 500) / 1000
+        self.enqueue_timeout = app.config.get('AUDIT_ENQUEUE_TIMEOUT_MS', 50) / 1000
+        self._queue = queue.Queue(maxsize=app.config.get('AUDIT_QUEUE_SIZE', 10000))
+        app.extensions['audit_writer'] = self
+
+        if self.enabled:
+            # Started on first request so forked workers each get their own thread
+            app.before_request(self.ensure_started)
+            atexit.register(self.stop)
+
+    def record(self, **event):
+        """Queue one event; returns False when it had to be dropped"""
+        if not self.enabled:
+            return False
+        try:
+            self._queue.put(_event_row(datetime.utcnow(), event), timeout=self.enqueue_timeout)
+            return True
+        except queue.Full:
+            dropped = self._count_dropped(1)
+            if dropped == 1 or dropped % 1000 == 0:
+                logger.warning(f"Audit queue full; {dropped} events dropped so far")
+            return False
+
+    def _count_dropped(self, count):
+        # Request threads and the writer thread both drop events
+        with self._dropped_lock:
+            self.dropped += count
+            return self.dropped
+
+    def ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._thread_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping.clear()
+                self._thread = threading.Thread(target=self._run, name='audit-writer', daemon=True)
+                self._thread.start()
+
+    def flush(self):
+        """Write everything queued so far; returns the number of events written"""
+        written = 0
+        while True:
+            batch = self._take(self.batch_size, deadline=None)
+            if not batch:
+                return written
+            written += self._write(batch)
+
+    def stop(self, timeout=5):
+        """Stop the writer thread and write what is still queued"""
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        if self.app is not None:
+            with self.app.app_context():
+                self.flush()
+
+    def _take(self, size, deadline):
+        """Up to size queued events; waits until deadline for the batch to fill, or not at all without one"""
+        batch = []
+        while len(batch) < size:
+            try:
+                if deadline is None:
+                    batch.append(self._queue.get_nowait())
+                else:
+                    batch.append(self._queue.get(timeout=max(deadline - time.monotonic(), 0)))
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch):
+        # One writer at a time, so a flush at shutdown cannot interleave with the thread's last batch
+        with self._write_lock:
+            for attempt in (1, 2):
+                try:
+                    with db.engine.begin() as connection:
+                        connection.execute(insert(AuditEvent), batch)
+                    return len(batch)
+                except Exception as e:
+                    logger.error(f"Error writing {len(batch)} audit events (attempt {attempt}): {e}")
+            self._count_dropped(len(batch))
+            return 0
+
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+
+            # Fill the batch until it is full or the first event has waited flush_interval
+            batch = [first] + self._take(self.batch_size - 1, time.monotonic() + self.flush_interval)
+            try:
+                with self.app.app_context():
+                    self._write(batch)
+            except Exception as e:
+                logger.error(f"Audit writer pass failed: {e}")
+
+audit_writer = AuditWriter()
+
+class AuditService:
+
+    @staticmethod
+    def get_events(filters=None, cursor=None, limit=AUDIT_PAGE_SIZE):
+        """
+        One page of audit events, newest first, filtered by user_id, resource_type, action and an
+        occurred_at range [start, end). Returns (events, next_cursor).
+        """
+        filters = filters or {}
+        query = AuditEvent.query
+
+        if filters.get('user_id') is not None:
+            query = query.filter(AuditEvent.user_id == filters['user_id'])
+        if filters.get('resource_type'):
+            query = query.filter(AuditEvent.resource_type == filters['resource_type'])
+        if filters.get('action'):
+            query = query.filter(AuditEvent.action == filters['action'])
+        if filters.get('start'):
+            query = query.filter(AuditEvent.occurred_at >= filters['start'])
+        if filters.get('end'):
+            query = query.filter(AuditEvent.occurred_at < filters['end'])
+
+        if cursor:
+            last_time, last_id = decode_cursor(cursor, 2)
+            try:
+                last_time = datetime.fromisoformat(last_time)
+            except (TypeError, ValueError):
+                raise ValidationError('cursor is invalid', 'cursor')
+            query = query.filter(tuple_(AuditEvent.occurred_at, AuditEvent.id) < tuple_(last_time, last_id))
+
+        events = query.order_by(AuditEvent.occurred_at.desc(), AuditEvent.id.desc()).limit(limit + 1).all()
+
+        next_cursor = None
+        if len(events) > limit:
+            last = events[limit - 1]
+            next_cursor = encode_cursor(last.occurred_at, last.id)
+        return [event.to_dict() for event in events[:limit]], next_cursor
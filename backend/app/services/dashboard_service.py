@@ -0,0 +1,52 @@
+from app.services.kpi_service import KPIService
+from app.services.escalation_service import EscalationService
+from app.services.kpi_history_service import KPIHistoryService
+from app.utils.concurrency import section_executor, SECTION_OK
+from functools import partial
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Independent dashboard blocks, each run concurrently on its own connection
+DASHBOARD_SECTIONS = {
+    'summary': partial(KPIService.get_kpi_summary, raise_errors=True),
+    'resources': KPIService.compute_resource_analytics,
+    'projects': KPIService.compute_project_analytics,
+    'financials': KPIService.compute_financial_analytics,
+    # Analytics embeds the escalation KPIs, so one section computes them once per load
+    'escalations': EscalationService.compute_escalation_analytics,
+    'comparisons': KPIHistoryService.get_comparisons
+}
+
+class DashboardService:
+
+    @staticmethod
+    def get_dashboard_kpis():
+        """
+        Get every dashboard block in parallel.
+        Returns (dashboard_data, complete) where complete is False if any block is stale or failed.
+        """
+        results = section_executor.run(DASHBOARD_SECTIONS)
+
+        dashboard_data = {
+            'summary': results['summary']['data'],
+            'resources': results['resources']['data'],
+            'projects': results['projects']['data'],
+            'financials': results['financials']['data'],
+            'escalations': {
+                'kpis': (results['escalations']['data'] or {}).get('kpis'),
+                'analytics': results['escalations']['data']
+            },
+            'comparisons': results['comparisons']['data'],
+            'sections': {
+                name: {
+                    'status': result['status'],
+                    'as_of': result['as_of'],
+                    'elapsed_ms': result['elapsed_ms']
+                }
+                for name, result in results.items()
+            }
+        }
+
+        complete = all(result['status'] == SECTION_OK for result in results.values())
+        return dashboard_data, complete
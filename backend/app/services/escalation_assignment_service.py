@@ -0,0 +1,290 @@
+from app import db
+from app.models.escalation import Escalation, EscalationStatus, EscalationPriority
+from app.models.project_allocation import ProjectAllocation, AllocationStatus
+from app.models.resource import Resource, EmploymentStatus
+from app.utils import unit_of_work
+from app.utils.unit_of_work import committed_getter, TransactionState
+from sqlalchemy import func, case
+from collections import Counter
+import heapq
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Statuses that still need work from the assignee
+LOAD_STATUSES = (
+    EscalationStatus.OPEN, EscalationStatus.ACKNOWLEDGED, EscalationStatus.IN_PROGRESS, EscalationStatus.PENDING_CLIENT
+)
+
+# How much of an assignee's capacity one open escalation takes
+PRIORITY_WEIGHTS = {
+    EscalationPriority.LOW: 1,
+    EscalationPriority.MEDIUM: 2,
+    EscalationPriority.HIGH: 3,
+    EscalationPriority.CRITICAL: 5
+}
+
+# Load changes and teams to refresh after commit, and picks to release when the transaction ends
+PENDING_DELTA = TransactionState('assignment_load_delta', Counter)
+STALE_TEAMS = TransactionState('assignment_stale_teams', set)
+RESERVATIONS = TransactionState('assignment_reservations', Counter)
+
+def _member(enum_class, value):
+    if isinstance(value, str):
+        try:
+            return enum_class(value.lower())
+        except ValueError:
+            return None
+    return value
+
+def priority_weight(priority):
+    return PRIORITY_WEIGHTS.get(_member(EscalationPriority, priority), PRIORITY_WEIGHTS[EscalationPriority.MEDIUM])
+
+def load_contribution(get):
+    """(assignee, weight) an escalation adds to its assignee's open load, or None"""
+    assignee = get('assigned_to')
+    status = get('status')
+    if status is None:
+        status = Escalation.__table__.c.status.default.arg
+    if not assignee or _member(EscalationStatus, status) not in LOAD_STATUSES:
+        return None
+    return assignee, priority_weight(get('priority'))
+
+def _fold(delta, contribution, sign):
+    if contribution:
+        assignee, weight = contribution
+        delta[(assignee, 'load')] += sign * weight
+        delta[(assignee, 'count')] += sign
+
+def _before_flush(session, flush_context, instances):
+    delta = PENDING_DELTA.get(session)
+    teams = STALE_TEAMS.get(session)
+
+    for obj in session.new:
+        if isinstance(obj, Escalation):
+            _fold(delta, load_contribution(lambda key: getattr(obj, key)), 1)
+        elif isinstance(obj, ProjectAllocation):
+            teams.add(obj.project_id)
+
+    for obj in session.dirty:
+        if isinstance(obj, Escalation) and session.is_modified(obj):
+            _fold(delta, load_contribution(lambda key: getattr(obj, key)), 1)
+            _fold(delta, load_contribution(committed_getter(obj)), -1)
+        elif isinstance(obj, ProjectAllocation) and session.is_modified(obj):
+            teams.update((obj.project_id, committed_getter(obj)('project_id')))
+
+    for obj in session.deleted:
+        if isinstance(obj, Escalation):
+            _fold(delta, load_contribution(committed_getter(obj)), -1)
+        elif isinstance(obj, ProjectAllocation):
+            teams.add(committed_getter(obj)('project_id'))
+
+def _after_commit(session):
+    assignment_engine.apply(PENDING_DELTA.pop(session), STALE_TEAMS.pop(session))
+
+def _after_transaction_end(session, transaction):
+    # Runs after commit and rollback alike, and for sessions closed without either
+    if transaction.parent is None:
+        assignment_engine.release(RESERVATIONS.pop(session))
+
+def register_listeners(session=None):
+    """Fold every escalation write into assignee loads once it commits"""
+    unit_of_work.register_listeners(
+        [('after_commit', _after_commit), ('after_transaction_end', _after_transaction_end)],
+        before_flush=_before_flush, states=[PENDING_DELTA, STALE_TEAMS], session=session
+    )
+
+class AssignmentEngine:
+    """
+    Picks the least-loaded member of a project's team for new escalations. Each assignee's open
+    load (priority-weighted) is held in memory and each team keeps a min-heap of its members'
+    loads, so a pick costs O(log n); entries whose load has since changed are dropped as they
+    surface. Loads move with every committed write, and a periodic resync from the database
+    picks up writes made by other workers or outside the application.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.enabled = True
+        self.resync_seconds = 60
+        self._load = Counter()  # assignee -> weighted open load, including reservations
+        self._count = Counter()  # assignee -> open escalations
+        self._reserved = Counter()  # assignee -> weight picked by transactions still in flight
+        self._teams = {}  # project_id -> set of assignees
+        self._heaps = {}  # project_id -> [(load, assignee)]
+        self._member_of = {}  # assignee -> set of project_ids
+        self._synced_at = None
+        self._lock = threading.RLock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = app.config.get('ESCALATION_AUTO_ASSIGN', True)
+        self.resync_seconds = app.config.get('ASSIGNMENT_RESYNC_SECONDS', 60)
+        app.extensions['assignment_engine'] = self
+        register_listeners()
+
+    def pick(self, project_id, priority=None, exclude=None, session=None):
+        """
+        Least-loaded active member of the project's team, ties broken by name, or None when the
+        project has no team. The escalation's weight is reserved against the pick until the
+        transaction ends, so concurrent picks spread across the team.
+        """
+        if project_id is None:
+            return None
+        session = session or db.session
+        self._ensure_synced()
+        members = self._team(project_id)
+        weight = priority_weight(priority)
+
+        with self._lock:
+            # A resync may have dropped the team since it was loaded
+            members = self._teams.get(project_id, members)
+            heap = self._heaps.get(project_id)
+            if heap is None:
+                return None
+
+            skipped, assignee = [], None
+            while heap:
+                load, candidate = heap[0]
+                if candidate not in members or load != self._load[candidate]:
+                    heapq.heappop(heap)
+                elif candidate == exclude:
+                    skipped.append(heapq.heappop(heap))
+                else:
+                    assignee = candidate
+                    break
+            for entry in skipped:
+                heapq.heappush(heap, entry)
+            if assignee is None:
+                return None
+
+            self._reserved[assignee] += weight
+            self._move(assignee, weight)
+
+        RESERVATIONS.get(session)[assignee] += weight
+        return assignee
+
+    def record_bulk_changes(self, old_rows=(), new_rows=(), session=None):
+        """Fold rows written with bulk or Core statements, which the flush listener never sees, into the loads applied at commit"""
+        session = session or db.session
+        delta = PENDING_DELTA.get(session)
+        for row in new_rows:
+            _fold(delta, load_contribution(row.get), 1)
+        for row in old_rows:
+            _fold(delta, load_contribution(row.get), -1)
+
+    def apply(self, delta, stale_teams=None):
+        """Apply a committed transaction's load changes"""
+        with self._lock:
+            for (assignee, field), amount in (delta or {}).items():
+                if not amount:
+                    continue
+                if field == 'load':
+                    self._move(assignee, amount)
+                else:
+                    self._count[assignee] += amount
+            for project_id in stale_teams or ():
+                self._drop_team(project_id)
+
+    def release(self, reserved):
+        """Give back the weight picks reserved, once their transaction has committed or rolled back"""
+        if not reserved:
+            return
+        with self._lock:
+            for assignee, weight in reserved.items():
+                self._reserved[assignee] -= weight
+                self._move(assignee, -weight)
+
+    def workload(self, project_id=None):
+        """Open load per assignee, busiest first; for one project, every member of its team"""
+        self._ensure_synced()
+        members = self._team(project_id) if project_id is not None else None
+        with self._lock:
+            assignees = members if members is not None else [
+                assignee for assignee, count in self._count.items() if count > 0
+            ]
+            rows = [
+                {
+                    'assignee': assignee,
+                    'open_load': self._load[assignee] - self._reserved[assignee],
+                    'open_escalations': self._count[assignee]
+                }
+                for assignee in assignees
+            ]
+        return sorted(rows, key=lambda row: (-row['open_load'], row['assignee']))
+
+    def resync(self):
+        """Reload every assignee's open load with one grouped query and drop the cached teams"""
+        rows = db.session.query(
+            Escalation.assigned_to,
+            func.sum(case(
+                *((Escalation.priority == priority, weight) for priority, weight in PRIORITY_WEIGHTS.items()),
+                else_=PRIORITY_WEIGHTS[EscalationPriority.MEDIUM]
+            )),
+            func.count(Escalation.id)
+        ).filter(
+            Escalation.status.in_(LOAD_STATUSES), Escalation.assigned_to.isnot(None)
+        ).group_by(Escalation.assigned_to).all()
+
+        with self._lock:
+            self._load = Counter({assignee: int(load) for assignee, load, _ in rows})
+            self._count = Counter({assignee: count for assignee, _, count in rows})
+            self._load.update(+self._reserved)
+            self._teams, self._heaps, self._member_of = {}, {}, {}
+            self._synced_at = time.monotonic()
+        return len(rows)
+
+    def _ensure_synced(self):
+        if self._synced_at is None or time.monotonic() - self._synced_at >= self.resync_seconds:
+            try:
+                self.resync()
+            except Exception as e:
+                logger.error(f"Error resyncing assignee loads: {e}")
+                if self._synced_at is None:
+                    raise
+
+    def _team(self, project_id):
+        with self._lock:
+            members = self._teams.get(project_id)
+        if members is not None:
+            return members
+
+        members = frozenset(email for (email,) in db.session.query(Resource.email).join(
+            ProjectAllocation, ProjectAllocation.resource_id == Resource.id
+        ).filter(
+            ProjectAllocation.project_id == project_id,
+            ProjectAllocation.status == AllocationStatus.ACTIVE,
+            Resource.employment_status == EmploymentStatus.ACTIVE
+        ).distinct())
+
+        with self._lock:
+            if project_id not in self._teams:
+                self._teams[project_id] = members
+                self._heaps[project_id] = [(self._load[assignee], assignee) for assignee in members]
+                heapq.heapify(self._heaps[project_id])
+                for assignee in members:
+                    self._member_of.setdefault(assignee, set()).add(project_id)
+            return self._teams[project_id]
+
+    def _drop_team(self, project_id):
+        for assignee in self._teams.pop(project_id, ()):
+            self._member_of.get(assignee, set()).discard(project_id)
+        self._heaps.pop(project_id, None)
+
+    def _move(self, assignee, amount):
+        """Change an assignee's load and push the new value onto every team heap they are in"""
+        self._load[assignee] += amount
+        load = self._load[assignee]
+        for project_id in self._member_of.get(assignee, ()):
+            heap = self._heaps[project_id]
+            heapq.heappush(heap, (load, assignee))
+            # Superseded entries are only dropped as they surface; rebuild before they pile up
+            if len(heap) > 4 * len(self._teams[project_id]) + 16:
+                heap[:] = [(self._load[member], member) for member in self._teams[project_id]]
+                heapq.heapify(heap)
+
+assignment_engine = AssignmentEngine()
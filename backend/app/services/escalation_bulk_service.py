@@ -0,0 +1,401 @@
+from app import db
+from app.models.escalation import (
+    Escalation, EscalationType, EscalationCategory, EscalationPriority, EscalationSeverity, EscalationStatus
+)
+from app.models.project import Project
+from app.services.escalation_assignment_service import assignment_engine
+from app.services.escalation_duplicate_service import EscalationDuplicateService
+from app.services.escalation_event_service import (
+    EscalationEventService, TIMING_COLUMNS, timing_updates, transition_values, elapsed_hours, current_actor
+)
+from app.services.kpi_snapshot_service import KPISnapshotService
+from app.services.sla_tracker_service import sla_tracker, sla_state_for, next_transition, SLA_TRACKED_STATUSES
+from app.utils import change_tracking
+from app.utils.exceptions import ValidationError
+from app.utils.sql import month_bucket, upsert_insert, UPSERT_INSERTS
+from sqlalchemy import update, func
+from datetime import datetime
+import csv
+import io
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+IMPORT_BATCH_SIZE = 500
+IMPORT_MAX_ROWS = 10000
+STATUS_BATCH_MAX_IDS = 1000
+
+# Fields an import row may carry; project_id or project_code picks the project
+IMPORT_TEXT_FIELDS = (
+    'external_id', 'title', 'description', 'customer', 'client_contact_email', 'escalation_owner',
+    'raised_by', 'assigned_to', 'business_impact', 'root_cause', 'resolution_summary'
+)
+IMPORT_ENUM_FIELDS = {
+    'priority': EscalationPriority,
+    'status': EscalationStatus,
+    'escalation_type': EscalationType,
+    'category': EscalationCategory,
+    'severity': EscalationSeverity
+}
+IMPORT_DATE_FIELDS = ('raised_date', 'target_resolution_date', 'resolved_date', 'date_closed')
+IMPORT_REQUIRED_FIELDS = ('external_id', 'title', 'priority')
+
+# Columns the KPI snapshot, SLA state, timing metrics, rollups and assignee loads are derived from
+DERIVED_FROM = tuple(dict.fromkeys(('status', 'priority', 'target_resolution_date', 'assigned_to') + TIMING_COLUMNS))
+
+def _parse_datetime(value):
+    if isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(str(value).strip().replace('Z', '+00:00')).replace(tzinfo=None)
+
+def _clean(values):
+    """Trim keys and values; blank CSV cells and JSON nulls both mean no value given"""
+    return {
+        key.strip(): (value.strip() if isinstance(value, str) else value) or None
+        for key, value in values.items() if key
+    }
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+class EscalationBulkService:
+
+    @staticmethod
+    def parse(body, content_type):
+        """Split an NDJSON or CSV upload into (row number, values or None, error) tuples"""
+        text = body.decode('utf-8-sig') if isinstance(body, bytes) else body
+        content_type = (content_type or '').split(';')[0].strip().lower()
+
+        if content_type in ('text/csv', 'application/csv'):
+            reader = csv.DictReader(io.StringIO(text))
+            return [(number, _clean(values), None) for number, values in enumerate(reader, 1)]
+
+        if content_type in ('application/x-ndjson', 'application/ndjson', 'application/jsonl'):
+            rows = []
+            for number, line in enumerate(text.splitlines(), 1):
+                if not line.strip():
+                    continue
+                try:
+                    values = json.loads(line)
+                except ValueError:
+                    rows.append((number, None, 'not valid JSON'))
+                    continue
+                if not isinstance(values, dict):
+                    rows.append((number, None, 'not a JSON object'))
+                    continue
+                rows.append((number, _clean(values), None))
+            return rows
+
+        raise ValidationError('Content-Type must be text/csv or application/x-ndjson', 'content_type')
+
+    @staticmethod
+    def import_escalations(rows, atomic=False, batch_size=IMPORT_BATCH_SIZE):
+        """
+        Validate every row, then upsert the valid ones on external_id in batched INSERT ... ON CONFLICT
+        statements inside one transaction. With atomic, nothing is written if any row fails.
+        Returns a report with per-row results.
+        """
+        if len(rows) > IMPORT_MAX_ROWS:
+            raise ValidationError(f"At most {IMPORT_MAX_ROWS} rows can be imported at once", 'rows')
+
+        dialect = db.session.get_bind().dialect.name
+        if dialect not in UPSERT_INSERTS:
+            raise RuntimeError(f"Bulk import is not supported on {dialect}")
+
+        projects, existing = EscalationBulkService._lookups(rows, batch_size)
+        now = datetime.utcnow()
+
+        results, records, ignored, seen = [], [], set(), {}
+        for number, values, error in rows:
+            result = {'row': number, 'external_id': (values or {}).get('external_id')}
+            results.append(result)
+            if error:
+                result.update(result='failed', errors={'row': error})
+                continue
+
+            record, errors, unknown = EscalationBulkService._validate(values, projects)
+            ignored.update(unknown)
+            external_id = record.get('external_id')
+            if external_id in seen:
+                errors['external_id'] = f"duplicates row {seen[external_id]}"
+            if errors:
+                result.update(result='failed', errors=errors)
+                continue
+            seen[external_id] = number
+
+            before = existing.get(external_id)
+            if before is None:
+                record.setdefault('status', EscalationStatus.OPEN)
+                record.setdefault('raised_date', now)
+                if 'assigned_to' not in record and assignment_engine.enabled:
+                    assignee = assignment_engine.pick(record['project_id'], record['priority'])
+                    if assignee:
+                        record['assigned_to'] = assignee
+            after = {**(before or {}), **record}
+
+            # Derived columns the ORM listeners would set, since these rows bypass the flush
+            from_status = before['status'] if before else None
+            if from_status != after['status']:
+                record['status_changed_at'] = now if before else record['raised_date']
+            record.update(timing_updates(after, from_status, after['status'], now))
+            after.update(record)
+            record['sla_state'] = sla_state_for(
+                after.get('status'), after.get('target_resolution_date'), now, sla_tracker.at_risk
+            )
+            if 'raised_date' in record:
+                record['raised_month'] = month_bucket(record['raised_date'])
+
+            result['result'] = 'updated' if before else 'created'
+            records.append((result, record, before, after))
+
+        failed = sum(1 for result in results if result['result'] == 'failed')
+        report = {
+            'created': 0,
+            'updated': 0,
+            'failed': failed,
+            'written': False,
+            'ignored_fields': sorted(ignored),
+            'rows': results
+        }
+        if (failed and atomic) or not records:
+            for result, _, _, _ in records:
+                result['result'] = 'skipped'
+            return report
+
+        EscalationBulkService._upsert(dialect, records, now, batch_size)
+
+        for result, record, _, after in records:
+            result['id'] = after['id']
+            report[result['result']] += 1
+            due = next_transition(record['sla_state'], after.get('target_resolution_date'), sla_tracker.at_risk)
+            if due is not None:
+                sla_tracker.schedule(after['id'], due)
+
+        report['written'] = True
+        logger.info(f"Imported escalations: {report['created']} created, {report['updated']} updated, {failed} failed")
+        return report
+
+    @staticmethod
+    def transition_status(ids, status, from_statuses=None):
+        """
+        Move escalations to `status` in a single UPDATE, optionally only those currently in
+        from_statuses. Returns {'updated': [...], 'skipped': [{id, reason}], 'not_found': [...]}.
+        """
+        ids = list(dict.fromkeys(ids))
+        if not ids:
+            raise ValidationError('ids is required', 'ids')
+        if len(ids) > STATUS_BATCH_MAX_IDS:
+            raise ValidationError(f"At most {STATUS_BATCH_MAX_IDS} ids can be updated at once", 'ids')
+
+        current = {
+            row.id: row._asdict() for row in db.session.query(
+                Escalation.id, *(getattr(Escalation, field) for field in DERIVED_FROM)
+            ).filter(Escalation.id.in_(ids))
+        }
+
+        eligible, skipped = [], []
+        for escalation_id, row in current.items():
+            if row['status'] == status:
+                skipped.append({'id': escalation_id, 'reason': f"already {status.value}"})
+            elif from_statuses and row['status'] not in from_statuses:
+                skipped.append({'id': escalation_id, 'reason': f"status is {row['status'].value}"})
+            else:
+                eligible.append(escalation_id)
+
+        now = datetime.utcnow()
+        values = transition_values(status, now)
+        if status == EscalationStatus.CLOSED:
+            values['date_closed'] = func.coalesce(Escalation.date_closed, now)
+        if status not in SLA_TRACKED_STATUSES:
+            values['sla_state'] = None
+
+        updated = []
+        if eligible:
+            # The status guard is repeated so rows changed since they were read are left alone
+            statement = update(Escalation).where(
+                Escalation.id.in_(eligible), Escalation.status != status
+            ).values(**values).returning(Escalation.id, *(getattr(Escalation, field) for field in DERIVED_FROM))
+            if from_statuses:
+                statement = statement.where(Escalation.status.in_(from_statuses))
+
+            try:
+                new_rows = {
+                    row.id: row._asdict() for row in
+                    db.session.execute(statement, execution_options={'synchronize_session': False})
+                }
+                updated = sorted(new_rows)
+                old_rows = [current[escalation_id] for escalation_id in updated]
+                KPISnapshotService.record_bulk_changes(Escalation, old_rows, new_rows.values())
+                assignment_engine.record_bulk_changes(old_rows, new_rows.values())
+                EscalationEventService.record_bulk_changes(old_rows, new_rows.values(), events=[
+                    {
+                        'escalation_id': row['id'],
+                        'from_status': row['status'],
+                        'to_status': status,
+                        'occurred_at': now,
+                        'hours_in_previous_status': elapsed_hours(row['status_changed_at'] or row['raised_date'], now),
+                        'changed_by': current_actor()
+                    }
+                    for row in old_rows
+                ])
+                change_tracking.mark_changed(db.session, Escalation.__tablename__)
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Error updating status of {len(eligible)} escalations: {e}")
+                raise
+
+        skipped += [
+            {'id': escalation_id, 'reason': 'changed concurrently'}
+            for escalation_id in sorted(set(eligible) - set(updated))
+        ]
+        if updated and status in SLA_TRACKED_STATUSES:
+            # Reopened escalations need a per-row SLA state from their targets
+            sla_tracker.advance(updated)
+
+        return {
+            'updated': updated,
+            'skipped': sorted(skipped, key=lambda item: item['id']),
+            'not_found': [escalation_id for escalation_id in ids if escalation_id not in current]
+        }
+
+    @staticmethod
+    def _lookups(rows, batch_size):
+        """Projects referenced by the rows and the existing escalations they update, in a few IN queries"""
+        project_ids, project_codes, external_ids = set(), set(), set()
+        for _, values, _ in rows:
+            values = values or {}
+            if values.get('project_code'):
+                project_codes.add(str(values['project_code']))
+            elif values.get('project_id'):
+                try:
+                    project_ids.add(int(values['project_id']))
+                except (TypeError, ValueError):
+                    pass
+            if values.get('external_id'):
+                external_ids.add(str(values['external_id']))
+
+        projects = {}
+        for chunk in _chunks(sorted(project_ids), batch_size):
+            projects.update({('id', id_): id_ for (id_,) in db.session.query(Project.id).filter(Project.id.in_(chunk))})
+        for chunk in _chunks(sorted(project_codes), batch_size):
+            projects.update({
+                ('code', code): id_ for id_, code in
+                db.session.query(Project.id, Project.project_code).filter(Project.project_code.in_(chunk))
+            })
+
+        existing = {}
+        for chunk in _chunks(sorted(external_ids), batch_size):
+            for row in db.session.query(
+                Escalation.id, Escalation.external_id, *(getattr(Escalation, field) for field in DERIVED_FROM)
+            ).filter(Escalation.external_id.in_(chunk)):
+                existing[row.external_id] = row._asdict()
+        return projects, existing
+
+    @staticmethod
+    def _validate(values, projects):
+        """Convert one row to column values; returns (record, errors, unknown fields)"""
+        record, errors, unknown = {}, {}, []
+        columns = Escalation.__table__.c
+
+        for key, value in values.items():
+            if key in ('project_id', 'project_code'):
+                continue
+            if key not in IMPORT_TEXT_FIELDS and key not in IMPORT_ENUM_FIELDS and key not in IMPORT_DATE_FIELDS:
+                unknown.append(key)
+            elif value is None:
+                # Left out, so an update keeps the current value and an insert the column default
+                continue
+            elif key in IMPORT_TEXT_FIELDS:
+                value = str(value)
+                length = columns[key].type.length
+                if length and len(value) > length:
+                    errors[key] = f"must be at most {length} characters"
+                record[key] = value
+            elif key in IMPORT_ENUM_FIELDS:
+                enum_class = IMPORT_ENUM_FIELDS[key]
+                try:
+                    record[key] = enum_class(str(value).lower())
+                except ValueError:
+                    errors[key] = f"must be one of: {', '.join(member.value for member in enum_class)}"
+            else:
+                try:
+                    record[key] = _parse_datetime(value)
+                except ValueError:
+                    errors[key] = 'must be an ISO 8601 date or datetime'
+
+        for field in IMPORT_REQUIRED_FIELDS:
+            if record.get(field) is None and field not in errors:
+                errors[field] = 'is required'
+
+        if values.get('project_code'):
+            project_id = projects.get(('code', str(values['project_code'])))
+            if project_id is None:
+                errors['project_code'] = f"no project with code {values['project_code']}"
+        elif values.get('project_id'):
+            try:
+                project_id = projects.get(('id', int(values['project_id'])))
+            except (TypeError, ValueError):
+                project_id = None
+            if project_id is None:
+                errors['project_id'] = f"no project with id {values['project_id']}"
+        else:
+            project_id = None
+            errors['project_id'] = 'project_id or project_code is required'
+        record['project_id'] = project_id
+
+        return record, errors, unknown
+
+    @staticmethod
+    def _upsert(dialect, records, now, batch_size):
+        """Write the records in one transaction, one INSERT ... ON CONFLICT per batch of rows with the same columns"""
+        # Rows that leave a column out must not overwrite it, so each distinct column set is its own statement
+        groups = {}
+        for entry in records:
+            groups.setdefault(tuple(sorted(entry[1])), []).append(entry)
+
+        try:
+            for keys, entries in groups.items():
+                statement = upsert_insert(Escalation, dialect)
+                statement = statement.on_conflict_do_update(
+                    index_elements=[Escalation.external_id],
+                    set_={
+                        **{key: statement.excluded[key] for key in keys if key != 'external_id'},
+                        'updated_at': now
+                    }
+                ).returning(Escalation.id, Escalation.external_id)
+
+                for batch in _chunks(entries, batch_size):
+                    returned = dict(
+                        (external_id, id_) for id_, external_id in
+                        db.session.execute(statement, [record for _, record, _, _ in batch])
+                    )
+                    for _, record, _, after in batch:
+                        after['id'] = returned[record['external_id']]
+
+            old_rows = [before for _, _, before, _ in records if before]
+            new_rows = [after for _, _, _, after in records]
+            KPISnapshotService.record_bulk_changes(Escalation, old_rows, new_rows)
+            assignment_engine.record_bulk_changes(old_rows, new_rows)
+            EscalationDuplicateService.record_bulk_changes([after['id'] for _, _, _, after in records])
+            EscalationEventService.record_bulk_changes(old_rows, new_rows, events=[
+                {
+                    'escalation_id': after['id'],
+                    'from_status': before['status'] if before else None,
+                    'to_status': after['status'],
+                    'occurred_at': now if before else after['raised_date'],
+                    'hours_in_previous_status': elapsed_hours(
+                        before['status_changed_at'] or before['raised_date'], now
+                    ) if before else None,
+                    'changed_by': current_actor()
+                }
+                for _, _, before, after in records if before is None or before['status'] != after['status']
+            ])
+            change_tracking.mark_changed(db.session, Escalation.__tablename__)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error importing {len(records)} escalations: {e}")
+            raise
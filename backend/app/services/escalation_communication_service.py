@@ -0,0 +1,197 @@
+from app import db
+from app.models.escalation import Escalation
+from app.models.escalation_communication import EscalationCommunication
+from app.services.escalation_service import ESCALATION_PAGE_SIZE
+from app.utils import change_tracking
+from app.utils.exceptions import ValidationError, ResourceNotFoundError
+from app.utils.pagination import encode_cursor, decode_cursor
+from sqlalchemy import inspect, insert, update, select, null, tuple_, table, column, Integer, DateTime, JSON
+from datetime import datetime
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Keys the old escalations.communication_log entries used for each column, in order of preference
+LEGACY_FIELDS = {
+    'channel': ('channel', 'type', 'mode', 'medium'),
+    'author': ('author', 'from', 'by', 'sender', 'user'),
+    'recipients': ('recipients', 'to'),
+    'subject': ('subject', 'title'),
+    'message': ('message', 'note', 'notes', 'summary', 'content', 'text', 'body'),
+    'occurred_at': ('occurred_at', 'date', 'timestamp', 'time', 'created_at')
+}
+
+# Column lengths, so long legacy values are clipped rather than failing the migration
+FIELD_LENGTHS = {'channel': 50, 'author': 100, 'recipients': 500, 'subject': 200}
+
+# The pre-migration JSON column, which is no longer mapped on Escalation
+legacy_escalations = table(
+    'escalations',
+    column('id', Integer),
+    column('raised_date', DateTime),
+    column('communication_log', JSON)
+)
+
+def _parse_datetime(value):
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value.replace('Z', '+00:00')).replace(tzinfo=None)
+        except ValueError:
+            return None
+    return None
+
+def _text(value, field):
+    if value is None:
+        return None
+    if isinstance(value, (list, tuple)):
+        value = ', '.join(str(item) for item in value)
+    value = str(value)
+    length = FIELD_LENGTHS.get(field)
+    return value[:length] if length else value
+
+def _legacy_entry_to_row(escalation_id, entry, fallback_time):
+    """Map one old JSON log entry to escalation_communications column values"""
+    if not isinstance(entry, dict):
+        entry = {'message': entry}
+
+    row = {'escalation_id': escalation_id}
+    used = set()
+    for field, keys in LEGACY_FIELDS.items():
+        key = next((key for key in keys if entry.get(key) is not None), None)
+        if key is None:
+            continue
+        used.add(key)
+        row[field] = _parse_datetime(entry[key]) if field == 'occurred_at' else _text(entry[key], field)
+
+    row['occurred_at'] = row.get('occurred_at') or fallback_time or datetime.utcnow()
+    extra = {key: value for key, value in entry.items() if key not in used}
+    row['details'] = extra or None
+    return row
+
+class EscalationCommunicationService:
+
+    @staticmethod
+    def add_communication(escalation_id, data, user=None):
+        """Append one entry to an escalation's communication log"""
+        EscalationCommunicationService._require_escalation(escalation_id)
+
+        if not data.get('message'):
+            raise ValidationError('message is required', 'message')
+
+        occurred_at = datetime.utcnow()
+        if data.get('occurred_at'):
+            occurred_at = _parse_datetime(data['occurred_at'])
+            if occurred_at is None:
+                raise ValidationError('occurred_at must be an ISO 8601 datetime', 'occurred_at')
+
+        try:
+            entry = EscalationCommunication(
+                escalation_id=escalation_id,
+                channel=data.get('channel'),
+                author=data.get('author') or (user.email if user else None),
+                recipients=_text(data.get('recipients'), 'recipients'),
+                subject=data.get('subject'),
+                message=data['message'],
+                occurred_at=occurred_at,
+                created_by=user.id if user else None
+            )
+            db.session.add(entry)
+            db.session.commit()
+            return entry
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error adding communication to escalation {escalation_id}: {e}")
+            raise
+
+    @staticmethod
+    def get_communications(escalation_id, cursor=None, limit=ESCALATION_PAGE_SIZE):
+        """One page of an escalation's communication log, newest first; returns (entries, next_cursor)"""
+        EscalationCommunicationService._require_escalation(escalation_id)
+
+        query = EscalationCommunication.query.filter(EscalationCommunication.escalation_id == escalation_id)
+        if cursor:
+            last_time, last_id = decode_cursor(cursor, 2)
+            try:
+                last_time = datetime.fromisoformat(last_time)
+            except (TypeError, ValueError):
+                raise ValidationError('cursor is invalid', 'cursor')
+            query = query.filter(
+                tuple_(EscalationCommunication.occurred_at, EscalationCommunication.id) < tuple_(last_time, last_id)
+            )
+
+        entries = query.order_by(
+            EscalationCommunication.occurred_at.desc(), EscalationCommunication.id.desc()
+        ).limit(limit + 1).all()
+
+        next_cursor = None
+        if len(entries) > limit:
+            last = entries[limit - 1]
+            next_cursor = encode_cursor(last.occurred_at, last.id)
+        return [entry.to_dict() for entry in entries[:limit]], next_cursor
+
+    @staticmethod
+    def migrate_legacy_logs(batch_size=500):
+        """
+        Move entries from the old escalations.communication_log JSON column into
+        escalation_communications and clear the column. Safe to re-run; returns (escalations, entries).
+        """
+        columns = {col['name'] for col in inspect(db.engine).get_columns('escalations')}
+        if 'communication_log' not in columns:
+            return 0, 0
+
+        escalations = entries = 0
+        last_id = 0
+        while True:
+            rows = db.session.execute(
+                select(legacy_escalations).where(
+                    legacy_escalations.c.id > last_id,
+                    legacy_escalations.c.communication_log.isnot(None)
+                ).order_by(legacy_escalations.c.id).limit(batch_size)
+            ).all()
+            if not rows:
+                break
+
+            records = []
+            for row in rows:
+                log = row.communication_log
+                if isinstance(log, str):
+                    try:
+                        log = json.loads(log)
+                    except ValueError:
+                        log = [log]
+                if isinstance(log, dict):
+                    log = [log]
+                for entry in log or []:
+                    records.append(_legacy_entry_to_row(row.id, entry, row.raised_date))
+
+            try:
+                if records:
+                    db.session.execute(insert(EscalationCommunication), records)
+                db.session.execute(
+                    update(legacy_escalations).where(
+                        legacy_escalations.c.id.in_([row.id for row in rows])
+                    ).values(communication_log=null())
+                )
+                change_tracking.mark_changed(
+                    db.session, Escalation.__tablename__, EscalationCommunication.__tablename__
+                )
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Error migrating communication logs after escalation {last_id}: {e}")
+                raise
+
+            escalations += len(rows)
+            entries += len(records)
+            last_id = rows[-1].id
+
+        logger.info(f"Migrated {entries} communication entries from {escalations} escalations")
+        return escalations, entries
+
+    @staticmethod
+    def _require_escalation(escalation_id):
+        if db.session.query(Escalation.id).filter(Escalation.id == escalation_id).scalar() is None:
+            raise ResourceNotFoundError('Escalation', escalation_id)
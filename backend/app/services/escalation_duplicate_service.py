@@ -0,0 +1,235 @@
+from app import db
+from app.models.escalation import Escalation
+from app.models.escalation_signature import EscalationSignature, EscalationLSHBand
+from app.models.project import Project
+from app.utils import change_tracking, unit_of_work
+from app.utils.unit_of_work import TransactionState
+from app.utils.exceptions import ResourceNotFoundError
+from sqlalchemy import inspect, select, delete, insert, or_, func
+import hashlib
+import random
+import re
+import struct
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Signature shape: NUM_BANDS bands of BAND_ROWS hashes. Escalations with Jaccard similarity s share a
+# band with probability 1 - (1 - s^3)^20: about 0.55 at s = 0.3, 0.99 at s = 0.6.
+NUM_BANDS = 20
+BAND_ROWS = 3
+NUM_HASHES = NUM_BANDS * BAND_ROWS
+
+# Estimated Jaccard similarity of word shingles at which an escalation is flagged as a likely duplicate
+DUPLICATE_THRESHOLD = 0.6
+SHINGLE_SIZE = 3
+
+# Most candidates scored per lookup, so a generic text cannot turn a check into a scan
+MAX_CANDIDATES = 1000
+DUPLICATE_LIMIT = 5
+INDEX_BATCH_SIZE = 1000
+
+# Fields the signature and its lookup scope are built from
+INDEXED_FIELDS = ('title', 'description', 'project_id', 'customer')
+
+# Escalation ids to re-index at commit
+PENDING_REINDEX = TransactionState('duplicate_index_pending', set)
+
+# Universal hashing h(x) = (a * x + b) mod p over 32-bit shingle hashes; fixed seed so stored signatures stay comparable
+_PRIME = 4294967291
+_rng = random.Random(20240601)
+_PERMUTATIONS = tuple((_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_HASHES))
+_SIGNATURE = struct.Struct(f'<{NUM_HASHES}I')
+
+def shingles(*texts):
+    """Word n-grams of the normalized text; the words themselves for texts shorter than one shingle"""
+    words = re.findall(r'\w+', ' '.join(text for text in texts if text).lower())
+    if len(words) < SHINGLE_SIZE:
+        return set(words)
+    return {' '.join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+def minhash(tokens):
+    """MinHash signature of a shingle set as a tuple of NUM_HASHES ints, or None for an empty set"""
+    if not tokens:
+        return None
+    hashes = [int.from_bytes(hashlib.blake2b(token.encode(), digest_size=4).digest(), 'little') for token in tokens]
+    return tuple(min((a * x + b) % _PRIME for x in hashes) for a, b in _PERMUTATIONS)
+
+def band_hashes(signature):
+    """One signed 64-bit key per band; equal keys mean the band's hashes are all equal"""
+    return [
+        int.from_bytes(
+            hashlib.blake2b(struct.pack(f'<H{BAND_ROWS}I', band, *signature[band * BAND_ROWS:(band + 1) * BAND_ROWS]),
+                            digest_size=8).digest(),
+            'little', signed=True
+        )
+        for band in range(NUM_BANDS)
+    ]
+
+def similarity(signature, other):
+    """Estimated Jaccard similarity: the share of hashes two signatures agree on"""
+    return sum(1 for a, b in zip(signature, other) if a == b) / NUM_HASHES
+
+def _scope_customer(customer):
+    return customer.strip().lower()[:200] if customer and customer.strip() else None
+
+def _after_flush(session, flush_context):
+    pending = PENDING_REINDEX.get(session)
+    for obj in session.new:
+        if isinstance(obj, Escalation):
+            pending.add(obj.id)
+    for obj in session.dirty:
+        if isinstance(obj, Escalation):
+            state = inspect(obj)
+            if any(state.attrs[field].history.has_changes() for field in INDEXED_FIELDS):
+                pending.add(obj.id)
+
+def _before_commit(session):
+    session.flush()
+    pending = PENDING_REINDEX.pop(session)
+    if pending:
+        EscalationDuplicateService.index(sorted(pending), session)
+
+class EscalationDuplicateService:
+
+    @staticmethod
+    def register_listeners(session=None):
+        """Re-index an escalation's signature in the same transaction as any change to its text or scope"""
+        unit_of_work.register_listeners(
+            [('after_flush', _after_flush)], before_commit=_before_commit, states=[PENDING_REINDEX], session=session
+        )
+
+    @staticmethod
+    def record_bulk_changes(escalation_ids, session=None):
+        """Queue escalations written with bulk or Core statements for re-indexing at commit"""
+        session = session or db.session
+        PENDING_REINDEX.get(session).update(escalation_ids)
+
+    @staticmethod
+    def find_duplicates(title, description, project_id, customer=None, exclude_id=None, limit=DUPLICATE_LIMIT):
+        """
+        Escalations in the same project or for the same customer whose title and description are
+        estimated to be at least DUPLICATE_THRESHOLD similar, most similar first. Candidates come
+        from an index lookup on the LSH bands, so the cost does not grow with history.
+        """
+        signature = minhash(shingles(title, description))
+        if signature is None:
+            return []
+
+        if not customer and project_id is not None:
+            customer = db.session.query(Project.client_name).filter(Project.id == project_id).scalar()
+        customer = _scope_customer(customer)
+
+        scope = [EscalationSignature.project_id == project_id]
+        if customer:
+            scope.append(EscalationSignature.customer == customer)
+
+        candidates = db.session.query(EscalationSignature.escalation_id, EscalationSignature.minhash).filter(
+            EscalationSignature.escalation_id.in_(
+                select(EscalationLSHBand.escalation_id).where(EscalationLSHBand.band_hash.in_(band_hashes(signature)))
+            ),
+            or_(*scope)
+        )
+        if exclude_id is not None:
+            candidates = candidates.filter(EscalationSignature.escalation_id != exclude_id)
+
+        scores = {}
+        for escalation_id, packed in candidates.limit(MAX_CANDIDATES):
+            score = similarity(signature, _SIGNATURE.unpack(packed))
+            if score >= DUPLICATE_THRESHOLD:
+                scores[escalation_id] = score
+        if not scores:
+            return []
+
+        best = sorted(scores, key=lambda escalation_id: (-scores[escalation_id], escalation_id))[:limit]
+        rows = {
+            row.id: row for row in db.session.query(
+                Escalation.id, Escalation.title, Escalation.status, Escalation.project_id, Escalation.raised_date
+            ).filter(Escalation.id.in_(best))
+        }
+        return [
+            {
+                'id': escalation_id,
+                'title': rows[escalation_id].title,
+                'status': rows[escalation_id].status.value if rows[escalation_id].status else None,
+                'project_id': rows[escalation_id].project_id,
+                'raised_date': rows[escalation_id].raised_date.isoformat() if rows[escalation_id].raised_date else None,
+                'similarity': round(scores[escalation_id], 3)
+            }
+            for escalation_id in best if escalation_id in rows
+        ]
+
+    @staticmethod
+    def get_duplicates(escalation_id, limit=DUPLICATE_LIMIT):
+        """Likely duplicates of an existing escalation"""
+        escalation = Escalation.query.get(escalation_id)
+        if not escalation:
+            raise ResourceNotFoundError('Escalation', escalation_id)
+        return EscalationDuplicateService.find_duplicates(
+            escalation.title, escalation.description, escalation.project_id, escalation.customer,
+            exclude_id=escalation.id, limit=limit
+        )
+
+    @staticmethod
+    def index(escalation_ids, session=None):
+        """Recompute the signatures and bands of the given escalations; the caller commits"""
+        session = session or db.session
+        for start in range(0, len(escalation_ids), INDEX_BATCH_SIZE):
+            ids = escalation_ids[start:start + INDEX_BATCH_SIZE]
+            rows = session.execute(
+                select(
+                    Escalation.id, Escalation.title, Escalation.description, Escalation.project_id,
+                    func.coalesce(Escalation.customer, Project.client_name).label('customer')
+                ).outerjoin(Project, Escalation.project_id == Project.id).where(Escalation.id.in_(ids))
+            ).all()
+
+            signatures, bands = [], []
+            for row in rows:
+                signature = minhash(shingles(row.title, row.description))
+                if signature is None:
+                    continue
+                signatures.append({
+                    'escalation_id': row.id,
+                    'project_id': row.project_id,
+                    'customer': _scope_customer(row.customer),
+                    'minhash': _SIGNATURE.pack(*signature)
+                })
+                bands.extend(
+                    {'band_hash': band_hash, 'escalation_id': row.id}
+                    # Two bands of one signature can collide; each key is stored once
+                    for band_hash in dict.fromkeys(band_hashes(signature))
+                )
+
+            # Bands go first: SQLite does not enforce the cascade unless foreign keys are switched on
+            session.execute(delete(EscalationLSHBand).where(EscalationLSHBand.escalation_id.in_(ids)))
+            session.execute(delete(EscalationSignature).where(EscalationSignature.escalation_id.in_(ids)))
+            if signatures:
+                session.execute(insert(EscalationSignature), signatures)
+                session.execute(insert(EscalationLSHBand), bands)
+        change_tracking.mark_changed(session, EscalationSignature.__tablename__, EscalationLSHBand.__tablename__)
+
+    @staticmethod
+    def rebuild(batch_size=INDEX_BATCH_SIZE):
+        """Index every escalation in id order, one commit per batch; returns the number indexed"""
+        indexed = 0
+        last_id = 0
+        while True:
+            ids = [
+                escalation_id for (escalation_id,) in db.session.query(Escalation.id).filter(
+                    Escalation.id > last_id
+                ).order_by(Escalation.id).limit(batch_size)
+            ]
+            if not ids:
+                break
+            try:
+                EscalationDuplicateService.index(ids)
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Error indexing escalation signatures after escalation {last_id}: {e}")
+                raise
+            indexed += len(ids)
+            last_id = ids[-1]
+
+        logger.info(f"Indexed signatures for {indexed} escalations")
+        return indexed
@@ -0,0 +1,394 @@
+from app import db
+from app.models.escalation import Escalation, EscalationStatus
+from app.models.escalation_event import EscalationEvent
+from app.models.escalation_rollup import EscalationMonthlyRollup, EscalationResolutionBucket
+from app.models.project import Project
+from app.utils import change_tracking
+from app.utils import unit_of_work
+from app.utils.unit_of_work import committed_getter, TransactionState
+from app.utils.exceptions import ResourceNotFoundError
+from app.utils.sql import month_bucket, shift_month_bucket, upsert_insert, hours_between
+from flask import g, has_request_context
+from sqlalchemy import insert, delete, update, case, func
+from collections import Counter
+from datetime import datetime
+from decimal import Decimal
+import math
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Statuses in which an escalation counts as resolved for timing purposes
+RESOLVED_STATUSES = (EscalationStatus.RESOLVED, EscalationStatus.CLOSED)
+
+# Resolution-time histogram: bucket 0 holds times under BASE hours and bucket n >= 1 holds
+# [BASE * GROWTH^(n-1), BASE * GROWTH^n), so percentiles read from it are within 10% of exact
+RESOLUTION_BUCKET_BASE = 0.25
+RESOLUTION_BUCKET_GROWTH = 1.1
+RESOLUTION_BUCKET_MAX = 150
+
+# Escalation columns the timing metrics and rollups are derived from
+TIMING_COLUMNS = (
+    'project_id', 'status', 'raised_date', 'date_acknowledged', 'resolved_date',
+    'response_time_hours', 'resolution_time_hours', 'status_changed_at'
+)
+
+# Rollup delta pending for the current transaction
+PENDING_ROLLUP_DELTA = TransactionState('escalation_rollup_delta', Counter)
+
+ROLLUP_TABLES = (EscalationMonthlyRollup.__tablename__, EscalationResolutionBucket.__tablename__)
+
+def _number(value):
+    return float(value) if isinstance(value, Decimal) else value
+
+def elapsed_hours(start, end):
+    """Hours from start to end rounded to the stored precision, or None if either is missing"""
+    if start is None or end is None:
+        return None
+    return round(max((end - start).total_seconds(), 0) / 3600, 2)
+
+def resolution_bucket(hours):
+    """Histogram bucket of a resolution time"""
+    if hours < RESOLUTION_BUCKET_BASE:
+        return 0
+    bucket = int(math.log(hours / RESOLUTION_BUCKET_BASE, RESOLUTION_BUCKET_GROWTH)) + 1
+    return min(bucket, RESOLUTION_BUCKET_MAX)
+
+def bucket_bounds(bucket):
+    """(low, high) hours of a histogram bucket"""
+    if bucket == 0:
+        return 0.0, RESOLUTION_BUCKET_BASE
+    return (
+        RESOLUTION_BUCKET_BASE * RESOLUTION_BUCKET_GROWTH ** (bucket - 1),
+        RESOLUTION_BUCKET_BASE * RESOLUTION_BUCKET_GROWTH ** bucket
+    )
+
+def histogram_percentile(histogram, fraction):
+    """Percentile of a {bucket: count} histogram, interpolated within the bucket it falls in"""
+    total = sum(count for count in histogram.values() if count > 0)
+    if not total:
+        return None
+
+    rank = fraction * total
+    seen = 0
+    for bucket in sorted(histogram):
+        count = histogram[bucket]
+        if count <= 0:
+            continue
+        if seen + count >= rank:
+            low, high = bucket_bounds(bucket)
+            return round(low + (high - low) * (rank - seen) / count, 2)
+        seen += count
+    return round(bucket_bounds(max(histogram))[1], 2)
+
+def timing_updates(values, from_status, to_status, at):
+    """
+    Timing columns implied by a move from from_status (None for a new escalation) to to_status at `at`,
+    given the row's other values: stamps acknowledgement and resolution dates on the transitions that
+    reach them and derives response and resolution hours from those dates.
+    """
+    updates = {}
+    if from_status != to_status:
+        if to_status in RESOLVED_STATUSES:
+            if values.get('resolved_date') is None:
+                updates['resolved_date'] = at
+        elif from_status in RESOLVED_STATUSES:
+            # Reopened: resolution time counts again from the next resolve
+            updates['resolved_date'] = None
+            updates['resolution_time_hours'] = None
+
+        if from_status is not None and to_status != EscalationStatus.OPEN and values.get('date_acknowledged') is None:
+            updates['date_acknowledged'] = at
+
+    current = {**values, **updates}
+    response = elapsed_hours(current.get('raised_date'), current.get('date_acknowledged'))
+    if response is not None:
+        updates['response_time_hours'] = response
+    if to_status in RESOLVED_STATUSES:
+        resolution = elapsed_hours(current.get('raised_date'), current.get('resolved_date'))
+        if resolution is not None:
+            updates['resolution_time_hours'] = resolution
+    return updates
+
+def transition_values(to_status, at):
+    """SET values for an UPDATE moving rows to to_status at `at`; timing_updates, row by row in SQL"""
+    was_resolved = Escalation.status.in_(RESOLVED_STATUSES)
+    values = {'status': to_status, 'status_changed_at': at}
+
+    if to_status in RESOLVED_STATUSES:
+        resolved_date = func.coalesce(Escalation.resolved_date, at)
+        values['resolved_date'] = resolved_date
+        values['resolution_time_hours'] = hours_between(Escalation.raised_date, resolved_date)
+    else:
+        values['resolved_date'] = case((was_resolved, None), else_=Escalation.resolved_date)
+        values['resolution_time_hours'] = case((was_resolved, None), else_=Escalation.resolution_time_hours)
+
+    if to_status != EscalationStatus.OPEN:
+        acknowledged = func.coalesce(Escalation.date_acknowledged, at)
+        values['date_acknowledged'] = acknowledged
+        values['response_time_hours'] = hours_between(Escalation.raised_date, acknowledged)
+    return values
+
+def rollup_contribution(get):
+    """What one escalation adds to the monthly rollups, keyed by ('rollup', month, project, field) or ('bucket', month, project, bucket)"""
+    contribution = Counter()
+    project_id = get('project_id')
+    if project_id is None:
+        return contribution
+
+    if get('raised_date') is not None:
+        contribution[('rollup', month_bucket(get('raised_date')), project_id, 'raised_count')] += 1
+
+    resolution = _number(get('resolution_time_hours'))
+    if get('status') in RESOLVED_STATUSES and resolution is not None and get('resolved_date') is not None:
+        month = month_bucket(get('resolved_date'))
+        contribution[('rollup', month, project_id, 'resolved_count')] += 1
+        contribution[('rollup', month, project_id, 'resolution_hours_sum')] += resolution
+        contribution[('bucket', month, project_id, resolution_bucket(resolution))] += 1
+
+    response = _number(get('response_time_hours'))
+    if response is not None and get('date_acknowledged') is not None:
+        month = month_bucket(get('date_acknowledged'))
+        contribution[('rollup', month, project_id, 'responded_count')] += 1
+        contribution[('rollup', month, project_id, 'response_hours_sum')] += response
+    return contribution
+
+def current_actor():
+    """Email of the user making the request, if any"""
+    if has_request_context():
+        user = getattr(g, 'current_user', None)
+        return getattr(user, 'email', None)
+    return None
+
+def _set(obj, updates):
+    for key, value in updates.items():
+        if _number(getattr(obj, key)) != value:
+            setattr(obj, key, value)
+
+def _before_flush(session, flush_context, instances):
+    delta = PENDING_ROLLUP_DELTA.get(session)
+    now = datetime.utcnow()
+
+    for obj in list(session.new):
+        if not isinstance(obj, Escalation):
+            continue
+        if obj.status is None:
+            obj.status = Escalation.__table__.c.status.default.arg
+        if obj.raised_date is None:
+            obj.raised_date = now
+
+        _set(obj, timing_updates({key: getattr(obj, key) for key in TIMING_COLUMNS}, None, obj.status, now))
+        obj.status_changed_at = obj.status_changed_at or obj.raised_date
+        session.add(EscalationEvent(
+            escalation=obj, from_status=None, to_status=obj.status,
+            occurred_at=obj.raised_date, changed_by=current_actor() or obj.raised_by
+        ))
+        delta.update(rollup_contribution(lambda key: getattr(obj, key)))
+
+    for obj in list(session.dirty):
+        if not isinstance(obj, Escalation) or not session.is_modified(obj):
+            continue
+        committed = committed_getter(obj)
+        old_status = committed('status')
+
+        if old_status != obj.status:
+            since = committed('status_changed_at') or committed('raised_date')
+            session.add(EscalationEvent(
+                escalation=obj, from_status=old_status, to_status=obj.status, occurred_at=now,
+                hours_in_previous_status=elapsed_hours(since, now), changed_by=current_actor()
+            ))
+            obj.status_changed_at = now
+
+        _set(obj, timing_updates({key: getattr(obj, key) for key in TIMING_COLUMNS}, old_status, obj.status, now))
+        delta.update(rollup_contribution(lambda key: getattr(obj, key)))
+        delta.subtract(rollup_contribution(committed))
+
+    for obj in session.deleted:
+        if isinstance(obj, Escalation):
+            delta.subtract(rollup_contribution(committed_getter(obj)))
+
+def _before_commit(session):
+    # Flush first so every pending change has been folded into the delta
+    session.flush()
+    delta = PENDING_ROLLUP_DELTA.pop(session)
+    if delta:
+        _write_delta(session, delta)
+
+def _write_delta(session, delta):
+    """Add a rollup delta to the rollup tables with atomic increments"""
+    rollups, buckets = {}, []
+    for key, amount in delta.items():
+        if not amount:
+            continue
+        kind, month, project_id, field = key
+        if kind == 'rollup':
+            row = rollups.setdefault((month, project_id), dict.fromkeys(EscalationMonthlyRollup.COUNTER_FIELDS, 0))
+            row[field] += amount
+        else:
+            buckets.append({'month': month, 'project_id': project_id, 'bucket': field, 'count': amount})
+    if not rollups and not buckets:
+        return
+
+    dialect = session.get_bind().dialect.name
+    now = datetime.utcnow()
+    if rollups:
+        statement = upsert_insert(EscalationMonthlyRollup, dialect)
+        statement = statement.on_conflict_do_update(
+            index_elements=['month', 'project_id'],
+            set_={
+                **{
+                    field: getattr(EscalationMonthlyRollup, field) + statement.excluded[field]
+                    for field in EscalationMonthlyRollup.COUNTER_FIELDS
+                },
+                'updated_at': now
+            }
+        )
+        session.execute(statement, [
+            {'month': month, 'project_id': project_id, 'updated_at': now, **values}
+            for (month, project_id), values in rollups.items()
+        ])
+    if buckets:
+        statement = upsert_insert(EscalationResolutionBucket, dialect)
+        statement = statement.on_conflict_do_update(
+            index_elements=['month', 'project_id', 'bucket'],
+            set_={'count': EscalationResolutionBucket.count + statement.excluded.count}
+        )
+        session.execute(statement, buckets)
+    change_tracking.mark_changed(session, *ROLLUP_TABLES)
+
+class EscalationEventService:
+
+    @staticmethod
+    def register_listeners(session=None):
+        """Record every escalation status change, keep its timing columns current and roll them up by month"""
+        unit_of_work.register_listeners(
+            before_flush=_before_flush, before_commit=_before_commit, states=[PENDING_ROLLUP_DELTA], session=session
+        )
+
+    @staticmethod
+    def record_bulk_changes(old_rows=(), new_rows=(), events=(), session=None):
+        """
+        Log events and fold rollup changes for escalations written with bulk or Core statements, which the
+        flush listeners never see. Rows are dicts of TIMING_COLUMNS before and after the write.
+        """
+        session = session or db.session
+        delta = PENDING_ROLLUP_DELTA.get(session)
+        for row in new_rows:
+            delta.update(rollup_contribution(row.get))
+        for row in old_rows:
+            delta.subtract(rollup_contribution(row.get))
+        if events:
+            session.execute(insert(EscalationEvent), list(events))
+
+    @staticmethod
+    def get_events(escalation_id):
+        """An escalation's status history, oldest first"""
+        if db.session.query(Escalation.id).filter(Escalation.id == escalation_id).scalar() is None:
+            raise ResourceNotFoundError('Escalation', escalation_id)
+
+        events = EscalationEvent.query.filter(
+            EscalationEvent.escalation_id == escalation_id
+        ).order_by(EscalationEvent.occurred_at, EscalationEvent.id).all()
+        return [event.to_dict() for event in events]
+
+    @staticmethod
+    def get_resolution_trends(months=12, project_id=None, client=None, percentiles=(50, 90)):
+        """
+        Monthly raised and resolved counts, average response and resolution hours and resolution-time
+        percentiles from the rollup tables, for all escalations or one project or client.
+        """
+        first = shift_month_bucket(month_bucket(datetime.utcnow()), 1 - months)
+
+        rollup_query = db.session.query(
+            EscalationMonthlyRollup.month,
+            *(func.sum(getattr(EscalationMonthlyRollup, field)).label(field) for field in EscalationMonthlyRollup.COUNTER_FIELDS)
+        ).filter(EscalationMonthlyRollup.month >= first)
+        bucket_query = db.session.query(
+            EscalationResolutionBucket.month,
+            EscalationResolutionBucket.bucket,
+            func.sum(EscalationResolutionBucket.count).label('count')
+        ).filter(EscalationResolutionBucket.month >= first)
+
+        rollup_query = EscalationEventService._scoped(rollup_query, EscalationMonthlyRollup, project_id, client)
+        bucket_query = EscalationEventService._scoped(bucket_query, EscalationResolutionBucket, project_id, client)
+
+        totals = {row.month: row for row in rollup_query.group_by(EscalationMonthlyRollup.month)}
+        histograms = {}
+        for row in bucket_query.group_by(EscalationResolutionBucket.month, EscalationResolutionBucket.bucket):
+            histograms.setdefault(row.month, Counter())[row.bucket] += row.count
+
+        trend = []
+        overall = Counter()
+        overall_histogram = Counter()
+        for offset in range(months):
+            month = shift_month_bucket(first, offset)
+            row = totals.get(month)
+            figures = {field: (getattr(row, field) or 0) if row else 0 for field in EscalationMonthlyRollup.COUNTER_FIELDS}
+            histogram = histograms.get(month, Counter())
+            overall.update(figures)
+            overall_histogram.update(histogram)
+            trend.append({'year': month // 100, 'month': month % 100, **EscalationEventService._figures(figures, histogram, percentiles)})
+
+        return {
+            'months': trend,
+            'overall': EscalationEventService._figures(overall, overall_histogram, percentiles)
+        }
+
+    @staticmethod
+    def _scoped(query, model, project_id, client):
+        if project_id:
+            query = query.filter(model.project_id == project_id)
+        if client:
+            query = query.join(Project, Project.id == model.project_id).filter(Project.client_name == client)
+        return query
+
+    @staticmethod
+    def _figures(figures, histogram, percentiles):
+        resolved, responded = figures['resolved_count'], figures['responded_count']
+        return {
+            'raised': figures['raised_count'],
+            'resolved': resolved,
+            'avg_resolution_hours': round(figures['resolution_hours_sum'] / resolved, 2) if resolved else None,
+            'avg_response_hours': round(figures['response_hours_sum'] / responded, 2) if responded else None,
+            'resolution_percentiles': {
+                f"p{percentile:g}": histogram_percentile(histogram, percentile / 100) for percentile in percentiles
+            }
+        }
+
+    @staticmethod
+    def rebuild_rollups(batch_size=1000):
+        """
+        Derive missing response and resolution hours from their dates, then recompute both rollup tables
+        from the escalations (recovery, or after loading rows with SQL); returns escalations counted.
+        """
+        try:
+            resolved = Escalation.status.in_(RESOLVED_STATUSES)
+            db.session.execute(update(Escalation).where(
+                resolved, Escalation.resolved_date.isnot(None), Escalation.resolution_time_hours.is_(None)
+            ).values(resolution_time_hours=hours_between(Escalation.raised_date, Escalation.resolved_date)))
+            db.session.execute(update(Escalation).where(
+                Escalation.date_acknowledged.isnot(None), Escalation.response_time_hours.is_(None)
+            ).values(response_time_hours=hours_between(Escalation.raised_date, Escalation.date_acknowledged)))
+
+            db.session.execute(delete(EscalationResolutionBucket))
+            db.session.execute(delete(EscalationMonthlyRollup))
+
+            delta = Counter()
+            counted = 0
+            rows = db.session.query(*(getattr(Escalation, key) for key in TIMING_COLUMNS)).execution_options(
+                yield_per=batch_size
+            )
+            for row in rows:
+                delta.update(rollup_contribution(row._mapping.get))
+                counted += 1
+
+            _write_delta(db.session, delta)
+            change_tracking.mark_changed(db.session, Escalation.__tablename__, *ROLLUP_TABLES)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error rebuilding escalation rollups: {e}")
+            raise
+
+        logger.info(f"Rebuilt escalation rollups from {counted} escalations")
+        return counted
@@ -0,0 +1,250 @@
+from app import db
+from app.models.escalation import Escalation
+from app.models.project import Project
+from app.services.escalation_service import EscalationService
+from app.utils.exceptions import ValidationError
+from app.utils.pagination import encode_cursor, decode_cursor
+from sqlalchemy import inspect, func, literal_column, table, column, desc, Integer
+import html
+import re
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Indexed fields, most important first: (column, Postgres weight, SQLite bm25 weight)
+SEARCH_FIELDS = (
+    ('title', 'A', 10.0),
+    ('root_cause', 'B', 5.0),
+    ('description', 'B', 5.0),
+    ('resolution_summary', 'C', 2.0),
+    ('business_impact', 'D', 1.0)
+)
+
+SEARCH_PAGE_SIZE = 20
+SEARCH_MAX_PAGE_SIZE = 100
+TEXT_SEARCH_CONFIG = 'english'
+
+# Private-use characters wrap matches inside the database; they become <mark> only after the text is HTML-escaped
+MARK_START, MARK_STOP = '\ue000', '\ue001'
+
+_columns = ', '.join(name for name, _, _ in SEARCH_FIELDS)
+_new_values = ', '.join(f"new.{name}" for name, _, _ in SEARCH_FIELDS)
+_old_values = ', '.join(f"old.{name}" for name, _, _ in SEARCH_FIELDS)
+_weighted_vector = ' || '.join(
+    f"setweight(to_tsvector('{TEXT_SEARCH_CONFIG}', coalesce({name}, '')), '{weight}')"
+    for name, weight, _ in SEARCH_FIELDS
+)
+
+# Postgres keeps the vector in a generated column; SQLite (testing) in an external-content FTS5 table fed by triggers
+SEARCH_DDL = {
+    'postgresql': (
+        f"ALTER TABLE escalations ADD COLUMN IF NOT EXISTS search_vector tsvector "
+        f"GENERATED ALWAYS AS ({_weighted_vector}) STORED",
+        "CREATE INDEX IF NOT EXISTS idx_escalations_search_vector ON escalations USING GIN (search_vector)"
+    ),
+    'sqlite': (
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS escalations_fts USING fts5("
+        f"{_columns}, content='escalations', content_rowid='id', tokenize='porter unicode61')",
+        f"CREATE TRIGGER IF NOT EXISTS escalations_fts_insert AFTER INSERT ON escalations BEGIN "
+        f"INSERT INTO escalations_fts(rowid, {_columns}) VALUES (new.id, {_new_values}); END",
+        f"CREATE TRIGGER IF NOT EXISTS escalations_fts_delete AFTER DELETE ON escalations BEGIN "
+        f"INSERT INTO escalations_fts(escalations_fts, rowid, {_columns}) VALUES ('delete', old.id, {_old_values}); END",
+        f"CREATE TRIGGER IF NOT EXISTS escalations_fts_update AFTER UPDATE OF {_columns} ON escalations BEGIN "
+        f"INSERT INTO escalations_fts(escalations_fts, rowid, {_columns}) VALUES ('delete', old.id, {_old_values}); "
+        f"INSERT INTO escalations_fts(rowid, {_columns}) VALUES (new.id, {_new_values}); END"
+    )
+}
+
+_search_vector = literal_column('escalations.search_vector')
+_fts = table('escalations_fts', column('rowid', Integer))
+_fts_ref = literal_column('escalations_fts')
+
+_QUERY_TOKEN = re.compile(r'(-?)(?:"([^"]*)"|(\S+))')
+
+def fts5_query(text):
+    """
+    Translate web-search syntax (words, "quoted phrases", OR, -exclusions) into an FTS5 MATCH
+    expression with the same meaning as Postgres websearch_to_tsquery; None when nothing is searchable.
+    """
+    positive, negative = [], []
+    pending_or = False
+    for sign, phrase, word in _QUERY_TOKEN.findall(text):
+        if not sign and not phrase and word.lower() == 'or':
+            pending_or = bool(positive)
+            continue
+
+        # Only word characters reach FTS5, so user input can never form query syntax
+        terms = re.findall(r'\w+', phrase or word)
+        if not terms:
+            continue
+        clause = '"' + ' '.join(terms) + '"'
+
+        if sign:
+            negative.append(clause)
+        elif pending_or:
+            positive[-1] = f"({positive[-1]} OR {clause})"
+        else:
+            positive.append(clause)
+        pending_or = False
+
+    if not positive:
+        return None
+    expression = ' AND '.join(positive)
+    for clause in negative:
+        expression = f"{expression} NOT {clause}"
+    return expression
+
+def _highlight(text):
+    """HTML-escape a snippet and mark its matches; None when the field did not match"""
+    if not text or MARK_START not in text:
+        return None
+    return html.escape(text).replace(MARK_START, '<mark>').replace(MARK_STOP, '</mark>')
+
+class EscalationSearchService:
+
+    @staticmethod
+    def ensure_index():
+        """Create the full-text index if it is missing; returns True when it had to be built"""
+        dialect = db.engine.dialect.name
+        if dialect not in SEARCH_DDL:
+            logger.warning(f"Escalation search is not supported on {dialect}")
+            return False
+
+        with db.engine.begin() as connection:
+            inspector = inspect(connection)
+            if dialect == 'postgresql':
+                missing = 'search_vector' not in {col['name'] for col in inspector.get_columns('escalations')}
+            else:
+                missing = not inspector.has_table('escalations_fts')
+            if not missing:
+                return False
+
+            for statement in SEARCH_DDL[dialect]:
+                connection.exec_driver_sql(statement)
+            if dialect == 'sqlite':
+                # An external-content table starts empty; index the rows already there
+                connection.exec_driver_sql("INSERT INTO escalations_fts(escalations_fts) VALUES ('rebuild')")
+
+        logger.info("Built the escalation full-text index")
+        return True
+
+    @staticmethod
+    def rebuild():
+        """Re-index every escalation, e.g. after loading rows with triggers disabled"""
+        if not EscalationSearchService.ensure_index() and db.engine.dialect.name == 'sqlite':
+            with db.engine.begin() as connection:
+                connection.exec_driver_sql("INSERT INTO escalations_fts(escalations_fts) VALUES ('rebuild')")
+        return db.session.query(func.count(Escalation.id)).scalar()
+
+    @staticmethod
+    def search(text, filters=None, cursor=None, limit=SEARCH_PAGE_SIZE):
+        """
+        Rank escalations matching a web-search style query, best match first, with highlighted
+        snippets of the fields that matched; returns (results, next_cursor).
+        """
+        text = (text or '').strip()
+        if not text:
+            raise ValidationError('q is required', 'q')
+
+        offset = 0
+        if cursor:
+            cursor_text, offset = decode_cursor(cursor, 2)
+            if cursor_text != text or not isinstance(offset, int) or offset < 0:
+                raise ValidationError('cursor belongs to a different search', 'cursor')
+
+        dialect = db.engine.dialect.name
+        if dialect == 'postgresql':
+            match, rank, headlines = EscalationSearchService._postgres_terms(text)
+        elif dialect == 'sqlite':
+            match, rank, headlines = EscalationSearchService._sqlite_terms(text)
+        else:
+            raise RuntimeError(f"Escalation search is not supported on {dialect}")
+        if match is None:
+            return [], None
+
+        conditions = [match, *EscalationService._list_conditions(filters or {})]
+
+        # Rank first, then build snippets for just the page being returned
+        ranked = EscalationSearchService._matching(dialect).with_entities(
+            Escalation.id, rank.label('rank')
+        ).filter(*conditions).order_by(desc('rank'), Escalation.id).offset(offset).limit(limit + 1).all()
+        page = ranked[:limit]
+        if not page:
+            return [], None
+
+        ids = [row.id for row in page]
+        rows = EscalationSearchService._matching(dialect).with_entities(
+            Escalation, Project.project_name, Project.client_name, *headlines
+        ).outerjoin(Project, Escalation.project_id == Project.id).filter(
+            match, Escalation.id.in_(ids)
+        ).all()
+        by_id = {row[0].id: row for row in rows}
+
+        results = []
+        for escalation_id, score in page:
+            escalation, project_name, client_name, *snippets = by_id[escalation_id]
+            highlights = {}
+            for (field, _, _), snippet in zip(SEARCH_FIELDS, snippets):
+                marked = _highlight(snippet)
+                if marked:
+                    highlights[field] = marked
+
+            results.append({
+                'id': escalation.id,
+                'title': escalation.title,
+                'status': escalation.status.value if escalation.status else None,
+                'priority': escalation.priority.value if escalation.priority else None,
+                'project_id': escalation.project_id,
+                'project_name': project_name or 'Unknown',
+                'client_name': client_name or 'Unknown',
+                'assigned_to': escalation.assigned_to,
+                'raised_date': escalation.raised_date.isoformat() if escalation.raised_date else None,
+                'resolved_date': escalation.resolved_date.isoformat() if escalation.resolved_date else None,
+                'rank': round(float(score), 6),
+                'highlights': highlights
+            })
+
+        next_cursor = encode_cursor(text, offset + limit) if len(ranked) > limit else None
+        return results, next_cursor
+
+    @staticmethod
+    def _matching(dialect):
+        query = db.session.query(Escalation)
+        if dialect == 'sqlite':
+            query = query.join(_fts, _fts.c.rowid == Escalation.id)
+        return query
+
+    @staticmethod
+    def _postgres_terms(text):
+        tsquery = func.websearch_to_tsquery(TEXT_SEARCH_CONFIG, text)
+        match = _search_vector.op('@@', is_comparison=True)(tsquery)
+        rank = func.ts_rank_cd(_search_vector, tsquery)
+
+        options = f'StartSel="{MARK_START}", StopSel="{MARK_STOP}", MaxWords=24, MinWords=8, MaxFragments=2, FragmentDelimiter=" … "'
+        headlines = [
+            func.ts_headline(
+                TEXT_SEARCH_CONFIG,
+                func.coalesce(getattr(Escalation, name), ''),
+                tsquery,
+                # Titles are short enough to return whole
+                f'StartSel="{MARK_START}", StopSel="{MARK_STOP}", HighlightAll=true' if name == 'title' else options
+            )
+            for name, _, _ in SEARCH_FIELDS
+        ]
+        return match, rank, headlines
+
+    @staticmethod
+    def _sqlite_terms(text):
+        expression = fts5_query(text)
+        if expression is None:
+            return None, None, None
+
+        match = _fts_ref.match(expression)
+        # bm25 scores better matches lower
+        rank = -func.bm25(_fts_ref, *(weight for _, _, weight in SEARCH_FIELDS))
+        headlines = [
+            func.highlight(_fts_ref, index, MARK_START, MARK_STOP) if name == 'title'
+            else func.snippet(_fts_ref, index, MARK_START, MARK_STOP, ' … ', 16)
+            for index, (name, _, _) in enumerate(SEARCH_FIELDS)
+        ]
+        return match, rank, headlines
@@ -1,36 +1,108 @@
 
-from app.models.escalation import Escalation
+from app.models.escalation import Escalation, EscalationStatus, EscalationPriority, SLAState
 from app.models.project import Project
+from app.models.escalation_rollup import EscalationMonthlyRollup
+from app.services.escalation_assignment_service import assignment_engine
+from app.services.escalation_duplicate_service import EscalationDuplicateService, INDEXED_FIELDS
 from app import db
-from sqlalchemy import func, desc, asc
+from app.utils.cache import memoize_per_request
+from app.utils.exceptions import ValidationError
+from app.utils.pagination import encode_cursor, decode_cursor
+from app.utils.sql import count_where, hours_between, month_bucket, shift_month_bucket
+from sqlalchemy import func, case, tuple_, desc, asc
 from datetime import datetime, timedelta
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Default and maximum escalation list page sizes
+ESCALATION_PAGE_SIZE = 50
+ESCALATION_MAX_PAGE_SIZE = 200
+
+# Columns the escalation list can be ordered by; id is always the tiebreaker
+ESCALATION_SORT_COLUMNS = {
+    'raised_date': Escalation.raised_date,
+    'id': Escalation.id
+}
+
+# Resolution-time percentiles reported with the escalation KPIs
+RESOLUTION_PERCENTILES = {'p50': 0.5, 'p90': 0.9}
+
 class EscalationService:
     
     @staticmethod
-    def get_all_escalations():
-        """Get all escalations with project and client information"""
-        try:
-            escalations = db.session.query(Escalation, Project).join(
-                Project, Escalation.project_id == Project.id, isouter=True
-            ).all()
+    def get_all_escalations(filters=None, sort_by='raised_date', sort_order='desc', cursor=None, limit=ESCALATION_PAGE_SIZE):
+        """
+        Get one page of escalations with project and client names.
+        Filters and ordering run in SQL and pages are keyed on (sort column, id), so any page costs
+        the same as the first. Returns (escalations, next_cursor); next_cursor is None on the last page.
+        """
+        if sort_by not in ESCALATION_SORT_COLUMNS:
+            raise ValidationError(f"sort_by must be one of: {', '.join(ESCALATION_SORT_COLUMNS)}", 'sort_by')
+        if sort_order not in ('asc', 'desc'):
+            raise ValidationError('sort_order must be asc or desc', 'sort_order')
+        
+        sort_column = ESCALATION_SORT_COLUMNS[sort_by]
+        query = db.session.query(
+            Escalation, Project.project_name, Project.client_name
+        ).outerjoin(
+            Project, Escalation.project_id == Project.id
+        ).filter(
+            *EscalationService._list_conditions(filters or {})
+        )
+        
+        if cursor:
+            cursor_sort, cursor_order, last_value, last_id = decode_cursor(cursor, 4)
+            if (cursor_sort, cursor_order) != (sort_by, sort_order):
+                raise ValidationError('cursor belongs to a different sort order', 'cursor')
+            if sort_by == 'raised_date':
+                last_value = datetime.fromisoformat(last_value)
             
-            result = []
-            for escalation, project in escalations:
-                escalation_dict = escalation.to_dict()
-                if project:
-                    escalation_dict['project_name'] = project.project_name
-                    escalation_dict['client_name'] = project.client_name
-                result.append(escalation_dict)
-            
-            return result
-            
-        except Exception as e:
-            logger.error(f"Error fetching escalations: {e}")
-            return []
+            keyset, last_key = tuple_(sort_column, Escalation.id), tuple_(last_value, last_id)
+            query = query.filter(keyset < last_key if sort_order == 'desc' else keyset > last_key)
+        
+        direction = desc if sort_order == 'desc' else asc
+        # One extra row tells us whether another page follows
+        rows = query.order_by(direction(sort_column), direction(Escalation.id)).limit(limit + 1).all()
+        
+        result = []
+        for escalation, project_name, client_name in rows[:limit]:
+            escalation_dict = escalation.to_dict()
+            escalation_dict['project_name'] = project_name or 'Unknown'
+            escalation_dict['client_name'] = client_name or 'Unknown'
+            result.append(escalation_dict)
+        
+        next_cursor = None
+        if len(rows) > limit:
+            last = rows[limit - 1][0]
+            next_cursor = encode_cursor(sort_by, sort_order, getattr(last, sort_by), last.id)
+        
+        return result, next_cursor
+    
+    @staticmethod
+    def _list_conditions(filters):
+        """SQL conditions for the escalation list filters; status and priority accept comma-separated values"""
+        conditions = []
+        for field, enum_class in (('status', EscalationStatus), ('priority', EscalationPriority)):
+            if filters.get(field):
+                try:
+                    values = [enum_class(value.strip()) for value in filters[field].split(',') if value.strip()]
+                except ValueError:
+                    raise ValidationError(
+                        f"{field} must be one of: {', '.join(member.value for member in enum_class)}", field
+                    )
+                conditions.append(getattr(Escalation, field).in_(values))
+        
+        if filters.get('project_id'):
+            conditions.append(Escalation.project_id == filters['project_id'])
+        if filters.get('assigned_to'):
+            conditions.append(Escalation.assigned_to == filters['assigned_to'])
+        if filters.get('raised_from'):
+            conditions.append(Escalation.raised_date >= filters['raised_from'])
+        if filters.get('raised_to'):
+            # Inclusive of the whole end day
+            conditions.append(Escalation.raised_date < filters['raised_to'] + timedelta(days=1))
+        return conditions
     
     @staticmethod
     def get_escalation_by_id(escalation_id):
@@ -43,9 +115,20 @@ class EscalationService:
     
     @staticmethod
     def create_escalation(data):
-        """Create new escalation"""
+        """
+        Create new escalation, assigning it to the least-loaded member of the project's team when no
+        assignee is given and flagging the closest likely duplicate in the same project or customer
+        """
         try:
+            if not data.get('assigned_to') and assignment_engine.enabled:
+                data['assigned_to'] = assignment_engine.pick(data.get('project_id'), data.get('priority'))
             escalation = Escalation(**data)
+            
+            duplicates = EscalationDuplicateService.find_duplicates(
+                escalation.title, escalation.description, escalation.project_id, escalation.customer, limit=1
+            )
+            if duplicates:
+                escalation.possible_duplicate_of = duplicates[0]['id']
             db.session.add(escalation)
             db.session.commit()
             return escalation
@@ -56,7 +139,7 @@ class EscalationService:
     
     @staticmethod
     def update_escalation(escalation_id, data):
-        """Update escalation"""
+        """Update escalation, re-checking its likely duplicate when its text or scope changes"""
         try:
             escalation = Escalation.query.get(escalation_id)
             if not escalation:
@@ -66,6 +149,13 @@ class EscalationService:
                 if hasattr(escalation, key):
                     setattr(escalation, key, value)
             
+            if any(field in data for field in INDEXED_FIELDS):
+                duplicates = EscalationDuplicateService.find_duplicates(
+                    escalation.title, escalation.description, escalation.project_id, escalation.customer,
+                    exclude_id=escalation.id, limit=1
+                )
+                escalation.possible_duplicate_of = duplicates[0]['id'] if duplicates else None
+            
             db.session.commit()
             return escalation
         except Exception as e:
@@ -73,6 +163,29 @@ class EscalationService:
             logger.error(f"Error updating escalation {escalation_id}: {e}")
             raise
     
+    @staticmethod
+    def assign_escalation(escalation_id, assignee=None):
+        """Assign an escalation to `assignee`, or to the least-loaded member of its project's team other than the current one"""
+        try:
+            escalation = Escalation.query.get(escalation_id)
+            if not escalation:
+                raise ValueError("Escalation not found")
+            
+            if not assignee:
+                assignee = assignment_engine.pick(
+                    escalation.project_id, escalation.priority, exclude=escalation.assigned_to
+                )
+                if assignee is None:
+                    raise ValidationError('The project has no other active team members to assign', 'assigned_to')
+            
+            escalation.assigned_to = assignee
+            db.session.commit()
+            return escalation
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error assigning escalation {escalation_id}: {e}")
+            raise
+    
     @staticmethod
     def delete_escalation(escalation_id):
         """Delete escalation"""
@@ -93,61 +206,7 @@ class EscalationService:
     def get_escalation_kpis():
         """Get escalation KPIs for dashboard"""
         try:
-            # Basic counts
-            total_escalations = Escalation.query.count()
-            open_escalations = Escalation.query.filter_by(status='open').count()
-            critical_escalations = Escalation.query.filter_by(priority='critical').count()
-            overdue_escalations = Escalation.query.filter(
-                Escalation.target_resolution_date < datetime.utcnow(),
-                Escalation.status.in_(['open', 'in_progress'])
-            ).count()
-            
-            # Resolution time analysis
-            resolved_escalations = Escalation.query.filter_by(status='resolved').all()
-            total_resolution_time = 0
-            resolution_count = 0
-            
-            for escalation in resolved_escalations:
-                if escalation.raised_date and escalation.resolved_date:
-                    resolution_time = (escalation.resolved_date - escalation.raised_date).total_seconds() / 3600
-                    total_resolution_time += resolution_time
-                    resolution_count += 1
-            
-            avg_resolution_time = total_resolution_time / resolution_count if resolution_count > 0 else 0
-            
-            # Calculate escalation score (0-100)
-            # Score based on: open vs total ratio, critical escalations, overdue items
-            if total_escalations > 0:
-                open_ratio = open_escalations / total_escalations
-                critical_ratio = critical_escalations / total_escalations
-                overdue_ratio = overdue_escalations / total_escalations
-                
-                # Lower score for more problems (inverted scale)
-                escalation_score = max(0, 100 - (
-                    (open_ratio * 40) +          # 40% weight for open escalations
-                    (critical_ratio * 35) +      # 35% weight for critical escalations
-                    (overdue_ratio * 25)         # 25% weight for overdue escalations
-                ) * 100)
-            else:
-                escalation_score = 100  # Perfect score if no escalations
-            
-            # Resolution rate
-            resolved_count = Escalation.query.filter_by(status='resolved').count()
-            resolution_rate = (resolved_count / total_escalations * 100) if total_escalations > 0 else 100
-            
-            # Client satisfaction average (mock data - would come from actual feedback)
-            avg_client_satisfaction = 7.5  # Out of 10
-            
-            return {
-                'total_escalations': total_escalations,
-                'open_escalations': open_escalations,
-                'critical_escalations': critical_escalations,
-                'overdue_escalations': overdue_escalations,
-                'avg_resolution_time_hours': round(avg_resolution_time, 2),
-                'resolution_rate_percentage': round(resolution_rate, 2),
-                'avg_client_satisfaction': avg_client_satisfaction,
-                'escalation_score': round(escalation_score, 0)
-            }
+            return EscalationService.compute_escalation_kpis()
             
         except Exception as e:
             logger.error(f"Error calculating escalation KPIs: {e}")
@@ -156,85 +215,147 @@ class EscalationService:
                 'open_escalations': 0,
                 'critical_escalations': 0,
                 'overdue_escalations': 0,
+                'at_risk_escalations': 0,
                 'avg_resolution_time_hours': 0,
+                'p50_resolution_time_hours': 0,
+                'p90_resolution_time_hours': 0,
                 'resolution_rate_percentage': 0,
                 'avg_client_satisfaction': 0,
                 'escalation_score': 75  # Default score
             }
     
+    @staticmethod
+    @memoize_per_request
+    def compute_escalation_kpis():
+        """Compute escalation KPIs in one aggregate query, letting query errors propagate"""
+        resolved = Escalation.status == EscalationStatus.RESOLVED
+        resolution_hours = case((resolved, hours_between(Escalation.raised_date, Escalation.resolved_date)))
+        
+        columns = [
+            func.count(Escalation.id).label('total'),
+            count_where(Escalation.status == EscalationStatus.OPEN).label('open'),
+            count_where(Escalation.priority == EscalationPriority.CRITICAL).label('critical'),
+            count_where(Escalation.sla_state == SLAState.BREACHED).label('overdue'),
+            count_where(Escalation.sla_state == SLAState.AT_RISK).label('at_risk'),
+            count_where(resolved).label('resolved'),
+            func.count(resolution_hours).label('timed'),
+            func.avg(resolution_hours).label('avg_hours')
+        ]
+        percentiles_in_sql = db.session.get_bind().dialect.name == 'postgresql'
+        if percentiles_in_sql:
+            columns += [
+                func.percentile_cont(fraction).within_group(resolution_hours).label(label)
+                for label, fraction in RESOLUTION_PERCENTILES.items()
+            ]
+        
+        row = db.session.query(*columns).one()
+        
+        if percentiles_in_sql:
+            percentiles = {label: getattr(row, label) for label in RESOLUTION_PERCENTILES}
+        else:
+            percentiles = {
+                label: EscalationService._resolution_percentile(resolution_hours, fraction, row.timed)
+                for label, fraction in RESOLUTION_PERCENTILES.items()
+            }
+        
+        # Calculate escalation score (0-100)
+        escalation_score = EscalationService.calculate_escalation_score(
+            row.total, row.open, row.critical, row.overdue
+        )
+        
+        # Resolution rate
+        resolution_rate = (row.resolved / row.total * 100) if row.total > 0 else 100
+        
+        # Client satisfaction average (mock data - would come from actual feedback)
+        avg_client_satisfaction = 7.5  # Out of 10
+        
+        return {
+            'total_escalations': row.total,
+            'open_escalations': row.open,
+            'critical_escalations': row.critical,
+            'overdue_escalations': row.overdue,
+            'at_risk_escalations': row.at_risk,
+            'avg_resolution_time_hours': round(float(row.avg_hours or 0), 2),
+            'p50_resolution_time_hours': round(float(percentiles['p50'] or 0), 2),
+            'p90_resolution_time_hours': round(float(percentiles['p90'] or 0), 2),
+            'resolution_rate_percentage': round(resolution_rate, 2),
+            'avg_client_satisfaction': avg_client_satisfaction,
+            'escalation_score': round(escalation_score, 0)
+        }
+    
+    @staticmethod
+    def _resolution_percentile(resolution_hours, fraction, count):
+        """Interpolated percentile (as percentile_cont) for dialects without it, reading at most two rows"""
+        if not count:
+            return 0
+        
+        position = (count - 1) * fraction
+        lower = int(position)
+        values = [value for (value,) in db.session.query(resolution_hours).filter(
+            resolution_hours.isnot(None)
+        ).order_by(resolution_hours).offset(lower).limit(2)]
+        
+        if len(values) == 1:
+            return values[0]
+        return values[0] + (values[1] - values[0]) * (position - lower)
+    
+    @staticmethod
+    def get_dashboard_kpis():
+        """Get escalation KPIs for the main dashboard cards"""
+        return EscalationService.get_escalation_kpis()
+    
+    @staticmethod
+    def get_overdue_count():
+        """Count open escalations that are past their target resolution date"""
+        return Escalation.query.filter(Escalation.sla_state == SLAState.BREACHED).count()
+    
+    @staticmethod
+    def get_sla_watchlist(state=SLAState.AT_RISK, limit=ESCALATION_PAGE_SIZE):
+        """Escalations in an SLA state, nearest target first"""
+        rows = db.session.query(
+            Escalation, Project.project_name, Project.client_name
+        ).outerjoin(
+            Project, Escalation.project_id == Project.id
+        ).filter(
+            Escalation.sla_state == state
+        ).order_by(
+            Escalation.target_resolution_date, Escalation.id
+        ).limit(limit).all()
+        
+        now = datetime.utcnow()
+        result = []
+        for escalation, project_name, client_name in rows:
+            escalation_dict = escalation.to_dict()
+            escalation_dict['project_name'] = project_name or 'Unknown'
+            escalation_dict['client_name'] = client_name or 'Unknown'
+            escalation_dict['hours_to_target'] = round(
+                (escalation.target_resolution_date - now).total_seconds() / 3600, 1
+            ) if escalation.target_resolution_date else None
+            result.append(escalation_dict)
+        return result
+    
+    @staticmethod
+    def calculate_escalation_score(total_escalations, open_escalations, critical_escalations, overdue_escalations):
+        """Score escalation health from 0-100 based on open, critical and overdue ratios"""
+        if not total_escalations:
+            return 100  # Perfect score if no escalations
+        
+        open_ratio = open_escalations / total_escalations
+        critical_ratio = critical_escalations / total_escalations
+        overdue_ratio = overdue_escalations / total_escalations
+        
+        # Lower score for more problems (inverted scale)
+        return max(0, 100 - (
+            (open_ratio * 40) +          # 40% weight for open escalations
+            (critical_ratio * 35) +      # 35% weight for critical escalations
+            (overdue_ratio * 25)         # 25% weight for overdue escalations
+        ) * 100)
+    
     @staticmethod
     def get_escalation_analytics():
         """Get detailed escalation analytics"""
         try:
-            # Status distribution
-            status_distribution = db.session.query(
-                Escalation.status,
-                func.count(Escalation.id).label('count')
-            ).group_by(Escalation.status).all()
-            
-            # Priority distribution
-            priority_distribution = db.session.query(
-                Escalation.priority,
-                func.count(Escalation.id).label('count')
-            ).group_by(Escalation.priority).all()
-            
-            # Type distribution
-            type_distribution = db.session.query(
-                Escalation.escalation_type,
-                func.count(Escalation.id).label('count')
-            ).group_by(Escalation.escalation_type).all()
-            
-            # Monthly trend (last 12 months)
-            twelve_months_ago = datetime.utcnow() - timedelta(days=365)
-            monthly_trend = db.session.query(
-                func.date_part('year', Escalation.raised_date).label('year'),
-                func.date_part('month', Escalation.raised_date).label('month'),
-                func.count(Escalation.id).label('total'),
-                func.count(func.nullif(Escalation.status != 'resolved', True)).label('resolved')
-            ).filter(
-                Escalation.raised_date >= twelve_months_ago
-            ).group_by(
-                func.date_part('year', Escalation.raised_date),
-                func.date_part('month', Escalation.raised_date)
-            ).order_by(
-                func.date_part('year', Escalation.raised_date),
-                func.date_part('month', Escalation.raised_date)
-            ).all()
-            
-            # Project escalations summary
-            project_escalations = db.session.query(
-                Project.project_name,
-                Project.client_name,
-                func.count(Escalation.id).label('total_escalations'),
-                func.count(func.nullif(Escalation.priority != 'critical', True)).label('critical_escalations')
-            ).join(
-                Escalation, Project.id == Escalation.project_id
-            ).group_by(
-                Project.id, Project.project_name, Project.client_name
-            ).order_by(
-                desc(func.count(Escalation.id))
-            ).limit(10).all()
-            
-            return {
-                'kpis': EscalationService.get_escalation_kpis(),
-                'status_distribution': [{'status': row.status, 'count': row.count} for row in status_distribution],
-                'priority_distribution': [{'priority': row.priority, 'count': row.count} for row in priority_distribution],
-                'type_distribution': [{'type': row.escalation_type, 'count': row.count} for row in type_distribution],
-                'monthly_trend': [{
-                    'year': int(row.year),
-                    'month': int(row.month),
-                    'total': row.total,
-                    'resolved': row.resolved or 0,
-                    'avg_resolution_time': 0  # Would calculate actual resolution times
-                } for row in monthly_trend],
-                'project_escalations': [{
-                    'project_name': row.project_name,
-                    'client_name': row.client_name,
-                    'total_escalations': row.total_escalations,
-                    'critical_escalations': row.critical_escalations or 0,
-                    'avg_satisfaction': 7.5  # Mock data
-                } for row in project_escalations]
-            }
+            return EscalationService.compute_escalation_analytics()
             
         except Exception as e:
             logger.error(f"Error getting escalation analytics: {e}")
@@ -246,3 +367,88 @@ class EscalationService:
                 'monthly_trend': [],
                 'project_escalations': []
             }
+    
+    @staticmethod
+    def compute_escalation_analytics():
+        """Compute escalation analytics, letting query errors propagate"""
+        # Status distribution
+        status_distribution = db.session.query(
+            Escalation.status,
+            func.count(Escalation.id).label('count')
+        ).group_by(Escalation.status).all()
+        
+        # Priority distribution
+        priority_distribution = db.session.query(
+            Escalation.priority,
+            func.count(Escalation.id).label('count')
+        ).group_by(Escalation.priority).all()
+        
+        # Type distribution
+        type_distribution = db.session.query(
+            Escalation.escalation_type,
+            func.count(Escalation.id).label('count')
+        ).group_by(Escalation.escalation_type).all()
+        
+        # Project escalations summary
+        project_escalations = db.session.query(
+            Project.project_name,
+            Project.client_name,
+            func.count(Escalation.id).label('total_escalations'),
+            count_where(Escalation.priority == EscalationPriority.CRITICAL).label('critical_escalations')
+        ).join(
+            Escalation, Project.id == Escalation.project_id
+        ).group_by(
+            Project.id, Project.project_name, Project.client_name
+        ).order_by(
+            desc(func.count(Escalation.id))
+        ).limit(10).all()
+        
+        return {
+            'kpis': EscalationService.compute_escalation_kpis(),
+            'status_distribution': [{'status': row.status.value if row.status else None, 'count': row.count} for row in status_distribution],
+            'priority_distribution': [{'priority': row.priority.value if row.priority else None, 'count': row.count} for row in priority_distribution],
+            'type_distribution': [{'type': row.escalation_type.value if row.escalation_type else None, 'count': row.count} for row in type_distribution],
+            'monthly_trend': EscalationService.get_monthly_trend(),
+            'project_escalations': [{
+                'project_name': row.project_name,
+                'client_name': row.client_name,
+                'total_escalations': row.total_escalations,
+                'critical_escalations': row.critical_escalations or 0,
+                'avg_satisfaction': 7.5  # Mock data
+            } for row in project_escalations]
+        }
+    
+    @staticmethod
+    @memoize_per_request
+    def get_monthly_trend(months=12):
+        """Escalations raised and resolved per month over the last `months` months, including this one"""
+        first_bucket = shift_month_bucket(month_bucket(datetime.utcnow()), 1 - months)
+        monthly_trend = db.session.query(
+            Escalation.raised_month,
+            func.count(Escalation.raised_month).label('total'),
+            count_where(Escalation.status == EscalationStatus.RESOLVED).label('resolved')
+        ).filter(
+            Escalation.raised_month >= first_bucket
+        ).group_by(
+            Escalation.raised_month
+        ).order_by(
+            Escalation.raised_month
+        ).all()
+        
+        # Average resolution time of the escalations resolved in each month, from the rollups
+        resolution_times = dict(db.session.query(
+            EscalationMonthlyRollup.month,
+            func.sum(EscalationMonthlyRollup.resolution_hours_sum) / func.nullif(func.sum(EscalationMonthlyRollup.resolved_count), 0)
+        ).filter(
+            EscalationMonthlyRollup.month >= first_bucket
+        ).group_by(
+            EscalationMonthlyRollup.month
+        ).all())
+        
+        return [{
+            'year': row.raised_month // 100,
+            'month': row.raised_month % 100,
+            'total': row.total,
+            'resolved': row.resolved or 0,
+            'avg_resolution_time': round(float(resolution_times.get(row.raised_month) or 0), 2)
+        } for row in monthly_trend]
@@ -0,0 +1,272 @@
+from app.models.kpi_daily_snapshot import KPIDailySnapshot
+from app.models.escalation import Escalation, EscalationPriority
+from app.models.financial import Financials
+from app.services.kpi_service import KPIService
+from app.services.escalation_service import EscalationService
+from app.utils.exceptions import ValidationError
+from app.utils.sql import count_where
+from app import db
+from sqlalchemy import func, and_, or_
+from datetime import datetime, timedelta, date, time
+import math
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Summary KPIs recorded each day (mock figures from build_summary are left out)
+HISTORY_METRICS = (
+    'total_resources', 'billable_resources', 'non_billable_resources', 'bench_resources',
+    'intern_resources', 'contractor_resources', 'training_resources',
+    'active_projects', 'completed_projects', 'delayed_projects', 'at_risk_projects',
+    'total_revenue', 'total_cost', 'total_margin', 'margin_percentage',
+    'monthly_revenue', 'monthly_cost', 'monthly_margin',
+    'overall_utilization', 'billable_utilization', 'utilization_rate',
+    'bench_percentage', 'avg_bench_days', 'average_project_health', 'on_time_delivery_rate',
+    'total_escalations', 'open_escalations', 'critical_escalations', 'escalation_score'
+)
+
+# Metrics the dashboard shows month-over-month and year-over-year changes for
+COMPARISON_METRICS = (
+    'total_resources', 'utilization_rate', 'bench_percentage', 'active_projects',
+    'monthly_revenue', 'monthly_margin', 'open_escalations', 'escalation_score'
+)
+
+# How a downsampled bucket is reduced to one point
+DOWNSAMPLE_AGGREGATES = {
+    'avg': lambda values: sum(values) / len(values),
+    'min': min,
+    'max': max,
+    'last': lambda values: values[-1]
+}
+
+# How far back a comparison may look for the nearest recorded day
+COMPARISON_TOLERANCE_DAYS = 7
+
+def _shift_months(day, months):
+    """Same day of month `months` earlier, clamped to the end of shorter months"""
+    year, month = divmod(day.year * 12 + day.month - 1 - months, 12)
+    month += 1
+    next_month = date(year + (month == 12), month % 12 + 1, 1)
+    return date(year, month, min(day.day, (next_month - timedelta(days=1)).day))
+
+class KPIHistoryService:
+
+    @staticmethod
+    def capture(day=None):
+        """Record today's summary KPIs (or label them with `day`); re-running replaces the day"""
+        day = day or datetime.utcnow().date()
+        summary = KPIService.get_kpi_summary(raise_errors=True)
+        values = {metric: summary[metric] for metric in HISTORY_METRICS if metric in summary}
+
+        KPIHistoryService._store(day, values, 'capture')
+        logger.info(f"Captured {len(values)} KPI values for {day.isoformat()}")
+        return values
+
+    @staticmethod
+    def backfill(start, end, overwrite=False):
+        """
+        Reconstruct history for days before capture began.
+        Only financial and escalation metrics can be rebuilt from dated rows; resource and
+        project figures have no history in the base tables and are left to daily capture.
+        Days that already have captured values are kept unless overwrite is set.
+        """
+        if start > end:
+            raise ValidationError('start must be on or before end', 'start')
+
+        existing = set()
+        if not overwrite:
+            existing = {
+                row.snapshot_date for row in db.session.query(KPIDailySnapshot.snapshot_date).filter(
+                    KPIDailySnapshot.metric == 'total_escalations',
+                    KPIDailySnapshot.snapshot_date.between(start, end),
+                    KPIDailySnapshot.source == 'capture'
+                )
+            }
+
+        monthly_financials = KPIHistoryService._monthly_financials(start.replace(day=1), end)
+        days_written = 0
+        day = start
+        while day <= end:
+            if day not in existing:
+                values = KPIHistoryService._escalation_figures_as_of(day)
+                values.update(KPIHistoryService._financial_figures(monthly_financials.get(day.replace(day=1))))
+                KPIHistoryService._store(day, values, 'backfill')
+                days_written += 1
+            day += timedelta(days=1)
+
+        logger.info(f"Backfilled KPI history for {days_written} days between {start} and {end}")
+        return days_written
+
+    @staticmethod
+    def _store(day, values, source):
+        """Replace the given metrics for one day in a single transaction"""
+        try:
+            KPIDailySnapshot.query.filter(
+                KPIDailySnapshot.snapshot_date == day,
+                KPIDailySnapshot.metric.in_(list(values))
+            ).delete(synchronize_session=False)
+
+            now = datetime.utcnow()
+            db.session.add_all([
+                KPIDailySnapshot(
+                    metric=metric, snapshot_date=day, value=float(value or 0), source=source, captured_at=now
+                )
+                for metric, value in values.items()
+            ])
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error storing KPI history for {day}: {e}")
+            raise
+
+    @staticmethod
+    def _monthly_financials(start, end):
+        rows = db.session.query(
+            Financials.month_year,
+            func.coalesce(func.sum(Financials.revenue), 0).label('revenue'),
+            func.coalesce(func.sum(Financials.cost), 0).label('cost')
+        ).filter(
+            Financials.month_year.between(start, end)
+        ).group_by(Financials.month_year).all()
+
+        return {row.month_year: row for row in rows}
+
+    @staticmethod
+    def _financial_figures(row):
+        revenue = float(row.revenue) if row else 0
+        cost = float(row.cost) if row else 0
+        margin = revenue - cost
+
+        return {
+            'total_revenue': revenue,
+            'total_cost': cost,
+            'total_margin': margin,
+            'margin_percentage': (margin / revenue * 100) if revenue > 0 else 0,
+            'monthly_revenue': revenue,
+            'monthly_cost': cost,
+            'monthly_margin': margin
+        }
+
+    @staticmethod
+    def _escalation_figures_as_of(day):
+        """Escalation counts as they stood at the end of `day`; open means not yet resolved"""
+        day_end = datetime.combine(day + timedelta(days=1), time.min)
+        unresolved = or_(Escalation.resolved_date.is_(None), Escalation.resolved_date >= day_end)
+
+        row = db.session.query(
+            func.count(Escalation.id).label('total'),
+            count_where(unresolved).label('open'),
+            count_where(Escalation.priority == EscalationPriority.CRITICAL).label('critical'),
+            count_where(and_(unresolved, Escalation.target_resolution_date < day_end)).label('overdue')
+        ).filter(
+            Escalation.raised_date < day_end
+        ).one()
+
+        return {
+            'total_escalations': row.total,
+            'open_escalations': row.open,
+            'critical_escalations': row.critical,
+            'escalation_score': round(EscalationService.calculate_escalation_score(
+                row.total, row.open, row.critical, row.overdue
+            ), 0)
+        }
+
+    @staticmethod
+    def validate_metrics(metrics):
+        unknown = [metric for metric in metrics if metric not in HISTORY_METRICS]
+        if unknown:
+            raise ValidationError(f"Unknown metrics: {', '.join(unknown)}", 'metrics')
+
+    @staticmethod
+    def get_history(metrics, start, end, points=None, aggregate='avg'):
+        """
+        Daily values of each metric between start and end (inclusive).
+        With `points`, longer series are reduced to at most that many buckets.
+        """
+        KPIHistoryService.validate_metrics(metrics)
+        if aggregate not in DOWNSAMPLE_AGGREGATES:
+            raise ValidationError(f"aggregate must be one of {', '.join(DOWNSAMPLE_AGGREGATES)}", 'aggregate')
+
+        rows = db.session.query(
+            KPIDailySnapshot.metric,
+            KPIDailySnapshot.snapshot_date,
+            KPIDailySnapshot.value
+        ).filter(
+            KPIDailySnapshot.metric.in_(metrics),
+            KPIDailySnapshot.snapshot_date.between(start, end)
+        ).order_by(
+            KPIDailySnapshot.metric, KPIDailySnapshot.snapshot_date
+        ).all()
+
+        series = {metric: [] for metric in metrics}
+        for row in rows:
+            series[row.metric].append((row.snapshot_date, row.value))
+
+        return {
+            metric: KPIHistoryService.downsample(values, points, aggregate)
+            for metric, values in series.items()
+        }
+
+    @staticmethod
+    def downsample(values, points=None, aggregate='avg'):
+        """Reduce [(date, value)] to at most `points` consecutive buckets"""
+        if not points or len(values) <= points:
+            return [{'date': day.isoformat(), 'value': value} for day, value in values]
+
+        reduce = DOWNSAMPLE_AGGREGATES[aggregate]
+        size = math.ceil(len(values) / points)
+        result = []
+        for index in range(0, len(values), size):
+            bucket = values[index:index + size]
+            result.append({
+                'date': bucket[0][0].isoformat(),
+                'end_date': bucket[-1][0].isoformat(),
+                'value': round(reduce([value for _, value in bucket]), 4),
+                'samples': len(bucket)
+            })
+        return result
+
+    @staticmethod
+    def get_comparisons(metrics=COMPARISON_METRICS, day=None):
+        """Month-over-month and year-over-year change for each metric, from three dated lookups"""
+        KPIHistoryService.validate_metrics(metrics)
+        day = day or datetime.utcnow().date()
+
+        current = KPIHistoryService._values_near(metrics, day)
+        month_ago = KPIHistoryService._values_near(metrics, _shift_months(day, 1))
+        year_ago = KPIHistoryService._values_near(metrics, _shift_months(day, 12))
+
+        comparisons = {}
+        for metric in metrics:
+            value = current.get(metric)
+            comparisons[metric] = {
+                'value': value,
+                'mom': KPIHistoryService._change(value, month_ago.get(metric)),
+                'yoy': KPIHistoryService._change(value, year_ago.get(metric))
+            }
+        return comparisons
+
+    @staticmethod
+    def _values_near(metrics, day):
+        """Latest value of each metric recorded on `day` or up to a week before it"""
+        rows = db.session.query(
+            KPIDailySnapshot.metric,
+            KPIDailySnapshot.snapshot_date,
+            KPIDailySnapshot.value
+        ).filter(
+            KPIDailySnapshot.metric.in_(metrics),
+            KPIDailySnapshot.snapshot_date.between(day - timedelta(days=COMPARISON_TOLERANCE_DAYS), day)
+        ).order_by(KPIDailySnapshot.snapshot_date).all()
+
+        # Later dates overwrite earlier ones
+        return {row.metric: row.value for row in rows}
+
+    @staticmethod
+    def _change(current, previous):
+        if current is None or previous is None:
+            return None
+        return {
+            'previous': previous,
+            'change': round(current - previous, 4),
+            'change_percentage': round((current - previous) / previous * 100, 2) if previous else None
+        }
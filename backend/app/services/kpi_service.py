@@ -1,123 +1,81 @@
 
-from app.models.resource import Resource
-from app.models.project import Project
+from app.models.resource import Resource, ResourceStatus, ResourceType, EmploymentStatus
+from app.models.project import Project, ProjectStatus, HealthStatus
 from app.models.escalation import Escalation
 from app.models.financial import Financials
+from app.models.bench_costing import BenchCosting
 from app.services.escalation_service import EscalationService
+from app.utils.sql import count_where
+from app.utils.cache import memoize_per_request
 from app import db
-from sqlalchemy import func, desc
-from datetime import datetime, timedelta
+from sqlalchemy import func, desc, case, and_
+from datetime import datetime, timedelta, date
+from collections import Counter
+import enum
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Score contributed by each health status to the average project health
+PROJECT_HEALTH_SCORES = {
+    HealthStatus.GREEN: 100,
+    HealthStatus.YELLOW: 75,
+    HealthStatus.AMBER: 50,
+    HealthStatus.RED: 25,
+    HealthStatus.UNKNOWN: 60
+}
+
+# Bench aging buckets as (label, inclusive upper bound in days); the last bucket is open-ended
+BENCH_AGING_BUCKETS = (
+    ('0-30 days', 30),
+    ('31-60 days', 60),
+    ('61-90 days', 90),
+    ('90+ days', None)
+)
+
+# Hours used to turn an hourly cost rate into a monthly cost
+MONTHLY_BILLABLE_HOURS = 160
+
+# Projects that no longer count towards in-flight health
+CLOSED_PROJECT_STATUSES = (ProjectStatus.COMPLETED, ProjectStatus.CANCELLED)
+
+def _label(value):
+    """Chart label for a grouped column value"""
+    if isinstance(value, enum.Enum):
+        return value.value
+    return value if value is not None else 'unspecified'
+
+def _window_start(months):
+    """First day of the month that opens a trailing window of the given length"""
+    today = datetime.utcnow().date()
+    year, month = divmod(today.year * 12 + today.month - months, 12)
+    return date(year, month + 1, 1)
+
 class KPIService:
     
+    @staticmethod
+    def get_kpi_summary(raise_errors=False):
+        """
+        Get summary KPIs from the materialized snapshot, recomputing only if it is unavailable.
+        With raise_errors a failed recompute propagates instead of returning zeroed figures.
+        """
+        from app.services.kpi_snapshot_service import KPISnapshotService
+        
+        try:
+            return KPISnapshotService.get_summary()
+        except Exception as e:
+            logger.error(f"Error reading KPI snapshot, recomputing summary: {e}")
+            db.session.rollback()
+        
+        if raise_errors:
+            return KPIService.build_summary(KPIService.get_summary_figures())
+        return KPIService.get_summary_kpis()
+    
     @staticmethod
     def get_summary_kpis():
         """Get summary KPIs for dashboard"""
         try:
-            # Resource KPIs
-            total_resources = Resource.query.filter_by(employment_status='active').count()
-            billable_resources = Resource.query.filter_by(
-                employment_status='active',
-                resource_type='billable'
-            ).count()
-            bench_resources = Resource.query.filter_by(
-                employment_status='active',
-                status='bench'
-            ).count()
-            intern_resources = Resource.query.filter_by(
-                employment_status='active',
-                resource_type='intern'
-            ).count()
-            
-            # Project KPIs
-            active_projects = Project.query.filter_by(status='active').count()
-            completed_projects = Project.query.filter_by(status='completed').count()
-            at_risk_projects = Project.query.filter_by(status='at_risk').count()
-            
-            # Financial KPIs (current month)
-            current_month = datetime.utcnow().replace(day=1)
-            monthly_financials = Financials.query.filter(
-                Financials.month_year >= current_month.strftime('%Y-%m-01')
-            ).all()
-            
-            total_revenue = sum(f.revenue or 0 for f in monthly_financials)
-            total_cost = sum(f.cost or 0 for f in monthly_financials)
-            total_margin = total_revenue - total_cost
-            
-            # Utilization calculations
-            if total_resources > 0:
-                utilization_rate = (billable_resources / total_resources) * 100
-                bench_percentage = (bench_resources / total_resources) * 100
-            else:
-                utilization_rate = 0
-                bench_percentage = 0
-            
-            # Bench aging
-            bench_resource_days = Resource.query.filter_by(status='bench').all()
-            avg_bench_days = sum(r.bench_days or 0 for r in bench_resource_days) / len(bench_resource_days) if bench_resource_days else 0
-            
-            # Get escalation score from escalation service
-            escalation_kpis = EscalationService.get_escalation_kpis()
-            escalation_score = escalation_kpis.get('escalation_score', 75)
-            
-            return {
-                # Resource KPIs
-                'total_resources': total_resources,
-                'billable_resources': billable_resources,
-                'non_billable_resources': total_resources - billable_resources - intern_resources,
-                'bench_resources': bench_resources,
-                'intern_resources': intern_resources,
-                'contractor_resources': Resource.query.filter_by(
-                    employment_status='active',
-                    resource_type='contractor'
-                ).count(),
-                'training_resources': Resource.query.filter_by(
-                    employment_status='active',
-                    status='training'
-                ).count(),
-                
-                # Project KPIs
-                'active_projects': active_projects,
-                'completed_projects': completed_projects,
-                'delayed_projects': Project.query.filter_by(status='delayed').count(),
-                'at_risk_projects': at_risk_projects,
-                
-                # Financial KPIs
-                'total_revenue': total_revenue,
-                'total_cost': total_cost,
-                'total_margin': total_margin,
-                'margin_percentage': (total_margin / total_revenue * 100) if total_revenue > 0 else 0,
-                'monthly_revenue': total_revenue,
-                'monthly_cost': total_cost,
-                'monthly_margin': total_margin,
-                
-                # Utilization KPIs
-                'overall_utilization': utilization_rate,
-                'billable_utilization': utilization_rate,
-                'target_utilization': 80,
-                'utilization_rate': utilization_rate,
-                'bench_percentage': bench_percentage,
-                'avg_bench_days': avg_bench_days,
-                
-                # Quality KPIs
-                'average_project_health': KPIService._calculate_project_health_score(),
-                'client_satisfaction_average': 8.2,  # Mock data
-                'defect_density': 0.8,  # Mock data
-                
-                # Performance KPIs
-                'on_time_delivery_rate': KPIService._calculate_on_time_delivery_rate(),
-                'budget_adherence_rate': 85.5,  # Mock data
-                'scope_change_frequency': 12.3,  # Mock data
-                
-                # Escalation KPIs
-                'total_escalations': escalation_kpis.get('total_escalations', 0),
-                'open_escalations': escalation_kpis.get('open_escalations', 0),
-                'critical_escalations': escalation_kpis.get('critical_escalations', 0),
-                'escalation_score': escalation_score
-            }
+            return KPIService.build_summary(KPIService.get_summary_figures())
             
         except Exception as e:
             logger.error(f"Error calculating summary KPIs: {e}")
@@ -160,47 +118,160 @@ class KPIService:
             }
     
     @staticmethod
-    def _calculate_project_health_score():
-        """Calculate average project health score"""
-        try:
-            projects = Project.query.filter_by(status='active').all()
-            if not projects:
-                return 0
+    def get_summary_figures(month_start=None):
+        """Compute the raw summary figures with one aggregate query per table"""
+        if month_start is None:
+            month_start = datetime.utcnow().date().replace(day=1)
+        
+        figures = dict(KPIService._resource_summary()._mapping)
+        figures.update(KPIService._project_summary()._mapping)
+        figures.update(KPIService._financial_summary(month_start)._mapping)
+        figures['financial_month'] = month_start
+        
+        escalation_kpis = EscalationService.get_escalation_kpis()
+        for key in ('total_escalations', 'open_escalations', 'critical_escalations', 'overdue_escalations'):
+            figures[key] = escalation_kpis.get(key, 0)
+        
+        return figures
+    
+    @staticmethod
+    def build_summary(figures):
+        """Turn raw summary figures into the dashboard summary KPIs"""
+        total_resources = figures['total_resources']
+        billable_resources = figures['billable_resources']
+        bench_resources = figures['bench_resources']
+        intern_resources = figures['intern_resources']
+        
+        total_revenue = float(figures['monthly_revenue'] or 0)
+        total_cost = float(figures['monthly_cost'] or 0)
+        total_margin = total_revenue - total_cost
+        
+        # Utilization calculations
+        if total_resources > 0:
+            utilization_rate = (billable_resources / total_resources) * 100
+            bench_percentage = (bench_resources / total_resources) * 100
+        else:
+            utilization_rate = 0
+            bench_percentage = 0
+        
+        bench_count = figures['bench_count']
+        avg_bench_days = figures['bench_days_total'] / bench_count if bench_count else 0
+        
+        active_projects = figures['active_projects']
+        completed_projects = figures['completed_projects']
+        average_project_health = figures['active_health_total'] / active_projects if active_projects else 0
+        on_time_delivery_rate = (figures['on_time_projects'] / completed_projects) * 100 if completed_projects else 0
+        
+        escalation_score = round(EscalationService.calculate_escalation_score(
+            figures['total_escalations'],
+            figures['open_escalations'],
+            figures['critical_escalations'],
+            figures['overdue_escalations']
+        ), 0)
+        
+        return {
+            # Resource KPIs
+            'total_resources': total_resources,
+            'billable_resources': billable_resources,
+            'non_billable_resources': total_resources - billable_resources - intern_resources,
+            'bench_resources': bench_resources,
+            'intern_resources': intern_resources,
+            'contractor_resources': figures['contractor_resources'],
+            'training_resources': figures['training_resources'],
             
-            health_scores = {
-                'green': 100,
-                'yellow': 75,
-                'amber': 50,
-                'red': 25,
-                'unknown': 60
-            }
+            # Project KPIs
+            'active_projects': active_projects,
+            'completed_projects': completed_projects,
+            'delayed_projects': figures['delayed_projects'],
+            'at_risk_projects': figures['at_risk_projects'],
             
-            total_score = sum(health_scores.get(p.health_status, 60) for p in projects)
-            return total_score / len(projects)
+            # Financial KPIs
+            'total_revenue': total_revenue,
+            'total_cost': total_cost,
+            'total_margin': total_margin,
+            'margin_percentage': (total_margin / total_revenue * 100) if total_revenue > 0 else 0,
+            'monthly_revenue': total_revenue,
+            'monthly_cost': total_cost,
+            'monthly_margin': total_margin,
             
-        except Exception as e:
-            logger.error(f"Error calculating project health score: {e}")
-            return 0
-    
-    @staticmethod
-    def _calculate_on_time_delivery_rate():
-        """Calculate on-time delivery rate"""
-        try:
-            completed_projects = Project.query.filter_by(status='completed').all()
-            if not completed_projects:
-                return 0
+            # Utilization KPIs
+            'overall_utilization': utilization_rate,
+            'billable_utilization': utilization_rate,
+            'target_utilization': 80,
+            'utilization_rate': utilization_rate,
+            'bench_percentage': bench_percentage,
+            'avg_bench_days': avg_bench_days,
             
-            on_time_count = 0
-            for project in completed_projects:
-                if project.actual_end_date and project.planned_end_date:
-                    if project.actual_end_date <= project.planned_end_date:
-                        on_time_count += 1
+            # Quality KPIs
+            'average_project_health': average_project_health,
+            'client_satisfaction_average': 8.2,  # Mock data
+            'defect_density': 0.8,  # Mock data
             
-            return (on_time_count / len(completed_projects)) * 100
+            # Performance KPIs
+            'on_time_delivery_rate': on_time_delivery_rate,
+            'budget_adherence_rate': 85.5,  # Mock data
+            'scope_change_frequency': 12.3,  # Mock data
             
-        except Exception as e:
-            logger.error(f"Error calculating on-time delivery rate: {e}")
-            return 0
+            # Escalation KPIs
+            'total_escalations': figures['total_escalations'],
+            'open_escalations': figures['open_escalations'],
+            'critical_escalations': figures['critical_escalations'],
+            'escalation_score': escalation_score
+        }
+    
+    @staticmethod
+    def _resource_summary():
+        """Aggregate all resource summary figures in a single pass over resources"""
+        active = Resource.employment_status == EmploymentStatus.ACTIVE
+        bench = Resource.status == ResourceStatus.BENCH
+        
+        return db.session.query(
+            count_where(active).label('total_resources'),
+            count_where(and_(active, Resource.resource_type == ResourceType.BILLABLE)).label('billable_resources'),
+            count_where(and_(active, bench)).label('bench_resources'),
+            count_where(and_(active, Resource.resource_type == ResourceType.INTERN)).label('intern_resources'),
+            count_where(and_(active, Resource.resource_type == ResourceType.CONTRACTOR)).label('contractor_resources'),
+            count_where(and_(active, Resource.status == ResourceStatus.TRAINING)).label('training_resources'),
+            # Bench aging covers everyone on the bench, regardless of employment status
+            count_where(bench).label('bench_count'),
+            func.coalesce(func.sum(case((bench, func.coalesce(Resource.bench_days, 0)))), 0).label('bench_days_total')
+        ).one()
+    
+    @staticmethod
+    def _project_summary():
+        """Aggregate project counts, health and delivery figures in a single pass over projects"""
+        active = Project.status == ProjectStatus.ACTIVE
+        completed = Project.status == ProjectStatus.COMPLETED
+        
+        return db.session.query(
+            count_where(active).label('active_projects'),
+            count_where(completed).label('completed_projects'),
+            count_where(Project.status == ProjectStatus.DELAYED).label('delayed_projects'),
+            count_where(Project.status == ProjectStatus.AT_RISK).label('at_risk_projects'),
+            count_where(and_(
+                completed,
+                Project.actual_end_date <= Project.planned_end_date
+            )).label('on_time_projects'),
+            func.coalesce(func.sum(case((active, KPIService._health_score_expression()))), 0).label('active_health_total')
+        ).one()
+    
+    @staticmethod
+    def _health_score_expression():
+        """SQL expression mapping a project's health status to its score"""
+        return case(
+            *[(Project.health_status == status, score) for status, score in PROJECT_HEALTH_SCORES.items()],
+            else_=60
+        )
+    
+    @staticmethod
+    def _financial_summary(month_start):
+        """Aggregate revenue and cost booked from month_start onwards"""
+        return db.session.query(
+            func.coalesce(func.sum(Financials.revenue), 0).label('monthly_revenue'),
+            func.coalesce(func.sum(Financials.cost), 0).label('monthly_cost')
+        ).filter(
+            Financials.month_year >= month_start
+        ).one()
     
     @staticmethod
     def get_resource_kpis():
@@ -254,3 +325,414 @@ class KPIService:
                 'location_distribution': [],
                 'experience_distribution': []
             }
+    
+    @staticmethod
+    def get_resource_analytics():
+        """Get resource analytics for dashboard charts"""
+        try:
+            return KPIService.compute_resource_analytics()
+            
+        except Exception as e:
+            logger.error(f"Error getting resource analytics: {e}")
+            return {
+                'department_distribution': [],
+                'location_distribution': [],
+                'experience_distribution': [],
+                'bench_aging': [],
+                'utilization_trends': []
+            }
+    
+    @staticmethod
+    def compute_resource_analytics():
+        """Compute resource analytics, letting query errors propagate"""
+        departments = KPIService._department_rows()
+        
+        return {
+            'department_distribution': KPIService._department_distribution(departments),
+            'location_distribution': KPIService.get_location_distribution(),
+            'experience_distribution': KPIService.get_experience_distribution(),
+            'bench_aging': KPIService.get_bench_aging(),
+            'utilization_trends': KPIService._utilization_trends(departments)
+        }
+    
+    @staticmethod
+    def get_department_distribution():
+        """Active headcount, utilization and bench count per department"""
+        return KPIService._department_distribution(KPIService._department_rows())
+    
+    @staticmethod
+    def get_location_distribution():
+        """Active headcount and average cost rate per location"""
+        rows = db.session.query(
+            Resource.location,
+            func.count(Resource.id).label('count'),
+            func.avg(Resource.cost_rate).label('avg_cost_rate')
+        ).filter(
+            Resource.employment_status == EmploymentStatus.ACTIVE
+        ).group_by(Resource.location).order_by(desc('count')).all()
+        
+        return [{
+            'name': row.location,
+            'count': row.count,
+            'avg_cost_rate': round(float(row.avg_cost_rate or 0), 2)
+        } for row in rows]
+    
+    @staticmethod
+    def get_experience_distribution():
+        """Active headcount and average billing rate per experience level"""
+        rows = db.session.query(
+            Resource.experience_level,
+            func.count(Resource.id).label('count'),
+            func.avg(Resource.billing_rate).label('avg_billing_rate')
+        ).filter(
+            Resource.employment_status == EmploymentStatus.ACTIVE
+        ).group_by(Resource.experience_level).all()
+        
+        return [{
+            'name': _label(row.experience_level),
+            'count': row.count,
+            'avg_billing_rate': round(float(row.avg_billing_rate or 0), 2)
+        } for row in rows]
+    
+    @staticmethod
+    def get_bench_aging():
+        """Bench headcount and monthly cost bucketed by days on bench"""
+        bench_days = func.coalesce(Resource.bench_days, 0)
+        bucket = case(
+            *[(bench_days <= upper, name) for name, upper in BENCH_AGING_BUCKETS if upper is not None],
+            else_=BENCH_AGING_BUCKETS[-1][0]
+        )
+        monthly_cost = func.coalesce(Resource.cost_rate, 0) * MONTHLY_BILLABLE_HOURS
+        
+        rows = db.session.query(
+            bucket.label('bucket'),
+            func.count(Resource.id).label('count'),
+            func.avg(monthly_cost).label('avg_monthly_cost'),
+            func.sum(monthly_cost).label('total_monthly_cost')
+        ).filter(
+            Resource.employment_status == EmploymentStatus.ACTIVE,
+            Resource.status == ResourceStatus.BENCH
+        ).group_by(bucket).all()
+        
+        by_bucket = {row.bucket: row for row in rows}
+        result = []
+        for name, _ in BENCH_AGING_BUCKETS:
+            row = by_bucket.get(name)
+            result.append({
+                'bucket': name,
+                'count': row.count if row else 0,
+                'avg_monthly_cost': round(float(row.avg_monthly_cost or 0), 2) if row else 0,
+                'total_monthly_cost': round(float(row.total_monthly_cost or 0), 2) if row else 0
+            })
+        return result
+    
+    @staticmethod
+    def get_utilization_trends():
+        """Current, 3-month and 6-month utilization per department"""
+        return KPIService._utilization_trends(KPIService._department_rows())
+    
+    @staticmethod
+    @memoize_per_request
+    def _department_rows():
+        """One grouped pass over active resources feeding the department and utilization charts"""
+        return db.session.query(
+            Resource.department,
+            func.count(Resource.id).label('count'),
+            func.avg(Resource.utilization_percentage).label('avg_utilization'),
+            count_where(Resource.status == ResourceStatus.BENCH).label('bench_count'),
+            func.avg(Resource.current_utilization).label('current_utilization'),
+            func.avg(Resource.average_utilization_3m).label('three_month_avg'),
+            func.avg(Resource.average_utilization_6m).label('six_month_avg')
+        ).filter(
+            Resource.employment_status == EmploymentStatus.ACTIVE
+        ).group_by(Resource.department).order_by(desc('count')).all()
+    
+    @staticmethod
+    def _department_distribution(rows):
+        return [{
+            'name': row.department,
+            'count': row.count,
+            'avg_utilization': round(float(row.avg_utilization or 0), 2),
+            'bench_count': row.bench_count
+        } for row in rows]
+    
+    @staticmethod
+    def _utilization_trends(rows):
+        return [{
+            'department': row.department,
+            'current_utilization': round(float(row.current_utilization or 0), 2),
+            'three_month_avg': round(float(row.three_month_avg or 0), 2),
+            'six_month_avg': round(float(row.six_month_avg or 0), 2)
+        } for row in rows]
+    
+    @staticmethod
+    def get_project_analytics():
+        """Get project analytics for dashboard charts"""
+        try:
+            return KPIService.compute_project_analytics()
+            
+        except Exception as e:
+            logger.error(f"Error getting project analytics: {e}")
+            return {
+                'health_distribution': [],
+                'status_distribution': [],
+                'type_distribution': [],
+                'portfolio': {},
+                'client_distribution': []
+            }
+    
+    @staticmethod
+    def compute_project_analytics():
+        """Compute project analytics, letting query errors propagate"""
+        groups = KPIService._project_group_rows()
+        
+        return {
+            'health_distribution': KPIService._health_distribution(groups),
+            'status_distribution': KPIService._project_distribution(groups, 'status'),
+            'type_distribution': KPIService._project_distribution(groups, 'project_type'),
+            'portfolio': KPIService._project_portfolio(groups),
+            'client_distribution': KPIService.get_client_distribution()
+        }
+    
+    @staticmethod
+    def get_health_distribution():
+        """Health status breakdown of in-flight projects"""
+        rows = db.session.query(
+            Project.health_status,
+            func.count(Project.id).label('count')
+        ).filter(
+            Project.status.notin_(CLOSED_PROJECT_STATUSES)
+        ).group_by(Project.health_status).all()
+        
+        return KPIService._health_counts_to_distribution(
+            {_label(row.health_status): row.count for row in rows}
+        )
+    
+    @staticmethod
+    def get_status_distribution():
+        """Project count and contracted value per status"""
+        return KPIService._project_distribution(KPIService._project_group_rows(), 'status')
+    
+    @staticmethod
+    def get_type_distribution():
+        """Project count and contracted value per project type"""
+        return KPIService._project_distribution(KPIService._project_group_rows(), 'project_type')
+    
+    @staticmethod
+    def get_client_distribution(limit=10):
+        """Largest clients by contracted value"""
+        rows = db.session.query(
+            Project.client_name,
+            func.count(Project.id).label('project_count'),
+            func.coalesce(func.sum(Project.sow_value), 0).label('total_sow_value'),
+            func.coalesce(func.sum(Project.revenue), 0).label('total_revenue')
+        ).group_by(
+            Project.client_name
+        ).order_by(
+            desc('total_sow_value')
+        ).limit(limit).all()
+        
+        return [{
+            'client_name': row.client_name,
+            'project_count': row.project_count,
+            'total_sow_value': float(row.total_sow_value),
+            'total_revenue': float(row.total_revenue)
+        } for row in rows]
+    
+    @staticmethod
+    @memoize_per_request
+    def _project_group_rows():
+        """One grouped pass over projects by status, health and type; every project chart rolls up from it"""
+        return db.session.query(
+            Project.status,
+            Project.health_status,
+            Project.project_type,
+            func.count(Project.id).label('count'),
+            func.coalesce(func.sum(Project.sow_value), 0).label('sow_value'),
+            func.coalesce(func.sum(Project.revenue), 0).label('revenue'),
+            func.coalesce(func.sum(Project.actual_cost), 0).label('actual_cost'),
+            func.coalesce(func.sum(Project.completion_percentage), 0).label('completion_total'),
+            func.coalesce(func.sum(Project.on_time_percentage), 0).label('on_time_total')
+        ).group_by(
+            Project.status, Project.health_status, Project.project_type
+        ).all()
+    
+    @staticmethod
+    def _health_distribution(groups):
+        counts = Counter()
+        for row in groups:
+            if row.status not in CLOSED_PROJECT_STATUSES:
+                counts[_label(row.health_status)] += row.count
+        return KPIService._health_counts_to_distribution(counts)
+    
+    @staticmethod
+    def _health_counts_to_distribution(counts):
+        total = sum(counts.values())
+        return [{
+            'status': status.value,
+            'count': counts.get(status.value, 0),
+            'percentage': round(counts.get(status.value, 0) / total * 100, 2) if total else 0
+        } for status in HealthStatus]
+    
+    @staticmethod
+    def _project_distribution(groups, field):
+        counts = Counter()
+        sow_values = Counter()
+        for row in groups:
+            key = _label(getattr(row, field))
+            counts[key] += row.count
+            sow_values[key] += float(row.sow_value)
+        return [{
+            field: key,
+            'count': count,
+            'total_sow_value': sow_values[key]
+        } for key, count in counts.most_common()]
+    
+    @staticmethod
+    def _project_portfolio(groups):
+        total_projects = sum(row.count for row in groups)
+        total_revenue = sum(float(row.revenue) for row in groups)
+        total_cost = sum(float(row.actual_cost) for row in groups)
+        
+        return {
+            'total_projects': total_projects,
+            'total_sow_value': sum(float(row.sow_value) for row in groups),
+            'total_revenue': total_revenue,
+            'total_actual_cost': total_cost,
+            'profit_margin_percentage': round((total_revenue - total_cost) / total_revenue * 100, 2) if total_revenue else 0,
+            'avg_completion_percentage': round(
+                sum(float(row.completion_total) for row in groups) / total_projects, 2
+            ) if total_projects else 0,
+            'avg_on_time_percentage': round(
+                sum(float(row.on_time_total) for row in groups) / total_projects, 2
+            ) if total_projects else 0
+        }
+    
+    @staticmethod
+    def get_financial_analytics(months=12):
+        """Get financial analytics for dashboard charts"""
+        try:
+            return KPIService.compute_financial_analytics(months)
+            
+        except Exception as e:
+            logger.error(f"Error getting financial analytics: {e}")
+            return {
+                'monthly_trends': [],
+                'totals': {},
+                'top_projects': [],
+                'bench_cost_trends': []
+            }
+    
+    @staticmethod
+    def compute_financial_analytics(months=12):
+        """Compute financial analytics, letting query errors propagate"""
+        monthly_trends = KPIService.get_revenue_trends(months)
+        
+        return {
+            'monthly_trends': monthly_trends,
+            'totals': KPIService._financial_totals(monthly_trends),
+            'top_projects': KPIService.get_top_project_financials(months),
+            'bench_cost_trends': KPIService.get_bench_cost_trends(months)
+        }
+    
+    @staticmethod
+    @memoize_per_request
+    def get_revenue_trends(months=12):
+        """Monthly revenue, cost and margin for the trailing window"""
+        rows = db.session.query(
+            Financials.month_year,
+            func.coalesce(func.sum(Financials.revenue), 0).label('revenue'),
+            func.coalesce(func.sum(Financials.cost), 0).label('cost'),
+            func.coalesce(func.sum(Financials.invoiced_amount), 0).label('invoiced'),
+            func.coalesce(func.sum(Financials.collected_amount), 0).label('collected')
+        ).filter(
+            Financials.month_year >= _window_start(months)
+        ).group_by(
+            Financials.month_year
+        ).order_by(
+            Financials.month_year
+        ).all()
+        
+        trends = []
+        for row in rows:
+            revenue = float(row.revenue)
+            cost = float(row.cost)
+            trends.append({
+                'month': row.month_year.strftime('%Y-%m'),
+                'revenue': revenue,
+                'cost': cost,
+                'margin': revenue - cost,
+                'margin_percentage': round((revenue - cost) / revenue * 100, 2) if revenue else 0,
+                'invoiced': float(row.invoiced),
+                'collected': float(row.collected)
+            })
+        return trends
+    
+    @staticmethod
+    def get_top_project_financials(months=12, limit=10):
+        """Projects with the highest revenue in the trailing window"""
+        revenue = func.coalesce(func.sum(Financials.revenue), 0)
+        cost = func.coalesce(func.sum(Financials.cost), 0)
+        
+        rows = db.session.query(
+            Project.id,
+            Project.project_name,
+            Project.client_name,
+            revenue.label('revenue'),
+            cost.label('cost')
+        ).join(
+            Financials, Financials.project_id == Project.id
+        ).filter(
+            Financials.month_year >= _window_start(months)
+        ).group_by(
+            Project.id, Project.project_name, Project.client_name
+        ).order_by(
+            desc('revenue')
+        ).limit(limit).all()
+        
+        return [{
+            'project_id': row.id,
+            'project_name': row.project_name,
+            'client_name': row.client_name,
+            'revenue': float(row.revenue),
+            'cost': float(row.cost),
+            'margin': float(row.revenue) - float(row.cost)
+        } for row in rows]
+    
+    @staticmethod
+    def get_bench_cost_trends(months=12):
+        """Monthly bench cost for the trailing window"""
+        rows = db.session.query(
+            BenchCosting.month_year,
+            func.coalesce(func.sum(BenchCosting.bench_cost), 0).label('bench_cost'),
+            func.coalesce(func.sum(BenchCosting.bench_days), 0).label('bench_days')
+        ).filter(
+            BenchCosting.month_year >= _window_start(months)
+        ).group_by(
+            BenchCosting.month_year
+        ).order_by(
+            BenchCosting.month_year
+        ).all()
+        
+        return [{
+            'month': row.month_year.strftime('%Y-%m'),
+            'bench_cost': float(row.bench_cost),
+            'bench_days': int(row.bench_days)
+        } for row in rows]
+    
+    @staticmethod
+    def _financial_totals(monthly_trends):
+        total_revenue = sum(month['revenue'] for month in monthly_trends)
+        total_cost = sum(month['cost'] for month in monthly_trends)
+        total_invoiced = sum(month['invoiced'] for month in monthly_trends)
+        total_collected = sum(month['collected'] for month in monthly_trends)
+        
+        return {
+            'total_revenue': total_revenue,
+            'total_cost': total_cost,
+            'total_margin': total_revenue - total_cost,
+            'margin_percentage': round((total_revenue - total_cost) / total_revenue * 100, 2) if total_revenue else 0,
+            'total_invoiced': total_invoiced,
+            'total_collected': total_collected,
+            'outstanding': total_invoiced - total_collected
+        }
@@ -0,0 +1,263 @@
+from app.models.kpi_snapshot import KPISnapshot
+from app.models.resource import Resource, ResourceStatus, ResourceType, EmploymentStatus
+from app.models.project import Project, ProjectStatus
+from app.models.escalation import Escalation, EscalationStatus, EscalationPriority, SLAState
+from app.models.financial import Financials
+from app.services.kpi_service import KPIService, PROJECT_HEALTH_SCORES
+from app.services.escalation_service import EscalationService
+from app import db
+from app.utils import unit_of_work
+from app.utils.unit_of_work import committed_getter, TransactionState
+from flask import current_app
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from collections import Counter
+from datetime import datetime, timedelta
+import enum
+import logging
+
+logger = logging.getLogger(__name__)
+
+# The snapshot is a single row
+SNAPSHOT_ID = 1
+
+# Snapshot delta pending for the current transaction
+PENDING_DELTA = TransactionState('kpi_snapshot_delta', Counter)
+
+def _enum_value(value):
+    """Normalize an enum member or its raw string to the enum value"""
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, str):
+        return value.lower()
+    return value
+
+def _is(value, member):
+    return _enum_value(value) == member.value
+
+def _resource_contribution(get):
+    active = _is(get('employment_status'), EmploymentStatus.ACTIVE)
+    bench = _is(get('status'), ResourceStatus.BENCH)
+    resource_type = get('resource_type')
+
+    return {
+        'total_resources': int(active),
+        'billable_resources': int(active and _is(resource_type, ResourceType.BILLABLE)),
+        'bench_resources': int(active and bench),
+        'intern_resources': int(active and _is(resource_type, ResourceType.INTERN)),
+        'contractor_resources': int(active and _is(resource_type, ResourceType.CONTRACTOR)),
+        'training_resources': int(active and _is(get('status'), ResourceStatus.TRAINING)),
+        'bench_count': int(bench),
+        'bench_days_total': (get('bench_days') or 0) if bench else 0
+    }
+
+def _project_contribution(get):
+    active = _is(get('status'), ProjectStatus.ACTIVE)
+    completed = _is(get('status'), ProjectStatus.COMPLETED)
+    actual_end_date = get('actual_end_date')
+    planned_end_date = get('planned_end_date')
+    health_scores = {status.value: score for status, score in PROJECT_HEALTH_SCORES.items()}
+
+    return {
+        'active_projects': int(active),
+        'completed_projects': int(completed),
+        'delayed_projects': int(_is(get('status'), ProjectStatus.DELAYED)),
+        'at_risk_projects': int(_is(get('status'), ProjectStatus.AT_RISK)),
+        'on_time_projects': int(bool(
+            completed and actual_end_date and planned_end_date and actual_end_date <= planned_end_date
+        )),
+        'active_health_total': health_scores.get(_enum_value(get('health_status')), 60) if active else 0
+    }
+
+def _financial_contribution(get):
+    month_year = get('month_year')
+    current_month = datetime.utcnow().date().replace(day=1)
+    if isinstance(month_year, str):
+        month_year = datetime.strptime(month_year, '%Y-%m-%d').date()
+    if not month_year or month_year < current_month:
+        return {}
+
+    return {
+        'monthly_revenue': get('revenue') or 0,
+        'monthly_cost': get('cost') or 0
+    }
+
+def _escalation_contribution(get):
+    status = get('status')
+    # Same definition as EscalationService.get_overdue_count, which the refresh writes
+    overdue = _is(get('sla_state'), SLAState.BREACHED)
+
+    return {
+        'total_escalations': 1,
+        'open_escalations': int(_is(status, EscalationStatus.OPEN)),
+        'critical_escalations': int(_is(get('priority'), EscalationPriority.CRITICAL)),
+        'overdue_escalations': int(overdue)
+    }
+
+# Models whose writes move the snapshot, and how a single row contributes to it
+CONTRIBUTIONS = {
+    Resource: _resource_contribution,
+    Project: _project_contribution,
+    Financials: _financial_contribution,
+    Escalation: _escalation_contribution
+}
+
+def _current_getter(obj):
+    """Read the pending value of an attribute, falling back to the column default for new rows"""
+    columns = obj.__table__.c
+
+    def get(key):
+        value = getattr(obj, key)
+        if value is None and key in columns:
+            default = columns[key].default
+            if default is not None and default.is_scalar:
+                value = default.arg
+        return value
+    return get
+
+def _before_flush(session, flush_context, instances):
+    # Runs in the FOLD stage, after the SLA listener has set the sla_state the overdue count reads
+    delta = PENDING_DELTA.get(session)
+
+    for obj in session.new:
+        contribution = CONTRIBUTIONS.get(type(obj))
+        if contribution:
+            delta.update(contribution(_current_getter(obj)))
+
+    for obj in session.dirty:
+        contribution = CONTRIBUTIONS.get(type(obj))
+        if contribution and session.is_modified(obj):
+            delta.update(contribution(_current_getter(obj)))
+            delta.subtract(contribution(committed_getter(obj)))
+
+    for obj in session.deleted:
+        contribution = CONTRIBUTIONS.get(type(obj))
+        if contribution:
+            delta.subtract(contribution(committed_getter(obj)))
+
+def _before_commit(session):
+    # Flush first so every pending change has been folded into the delta
+    session.flush()
+    delta = PENDING_DELTA.pop(session)
+    if not delta:
+        return
+
+    values = {
+        field: getattr(KPISnapshot, field) + amount
+        for field, amount in delta.items() if amount
+    }
+    if values:
+        session.execute(
+            update(KPISnapshot).where(KPISnapshot.id == SNAPSHOT_ID).values(**values)
+        )
+
+class KPISnapshotService:
+
+    @staticmethod
+    def register_listeners(session=None):
+        """Keep the snapshot in step with every commit that touches the tracked models"""
+        unit_of_work.register_listeners(
+            before_flush=_before_flush, before_commit=_before_commit, states=[PENDING_DELTA], session=session
+        )
+
+    @staticmethod
+    def record_bulk_changes(model, old_rows=(), new_rows=(), session=None):
+        """
+        Fold rows written with bulk or Core statements, which the flush listeners never see, into the
+        delta applied at commit. Rows are dicts of column values as they were before and after the write.
+        """
+        session = session or db.session
+        contribution = CONTRIBUTIONS[model]
+        delta = PENDING_DELTA.get(session)
+        for row in new_rows:
+            delta.update(contribution(row.get))
+        for row in old_rows:
+            delta.subtract(contribution(row.get))
+
+    @staticmethod
+    def get_summary():
+        """Get summary KPIs from the snapshot row"""
+        snapshot = KPISnapshotService.get_snapshot()
+        return KPIService.build_summary(snapshot.to_figures())
+
+    @staticmethod
+    def get_snapshot():
+        """Get the snapshot row, building it on first use"""
+        snapshot = KPISnapshot.query.get(SNAPSHOT_ID)
+        if snapshot is None:
+            return KPISnapshotService.rebuild()
+
+        if KPISnapshotService._time_figures_stale(snapshot):
+            KPISnapshotService.refresh_time_dependent_figures(snapshot)
+        return snapshot
+
+    @staticmethod
+    def rebuild():
+        """Recompute every snapshot figure from the base tables"""
+        now = datetime.utcnow()
+
+        try:
+            snapshot = KPISnapshot.query.get(SNAPSHOT_ID)
+            if snapshot is None:
+                snapshot = KPISnapshot(id=SNAPSHOT_ID)
+                db.session.add(snapshot)
+            else:
+                # As in refresh_time_dependent_figures, lock before reading so no delta is lost
+                snapshot = KPISnapshotService._lock_snapshot()
+            figures = KPIService.get_summary_figures()
+
+            for field in KPISnapshot.COUNTER_FIELDS:
+                setattr(snapshot, field, figures[field])
+            snapshot.financial_month = figures['financial_month']
+            snapshot.time_refreshed_at = now
+            snapshot.rebuilt_at = now
+
+            db.session.commit()
+            logger.info("KPI snapshot rebuilt")
+            return snapshot
+        except IntegrityError:
+            # Another worker built the row first
+            db.session.rollback()
+            return KPISnapshot.query.get(SNAPSHOT_ID)
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error rebuilding KPI snapshot: {e}")
+            raise
+
+    @staticmethod
+    def refresh_time_dependent_figures(snapshot):
+        """Recompute the figures that drift with the clock rather than with writes"""
+        current_month = datetime.utcnow().date().replace(day=1)
+
+        try:
+            # Lock the row before reading the base tables. A writer applies its delta in the same
+            # transaction as its base-table change, so every change is either already visible to
+            # the reads below or lands as a delta on top of the figures written here.
+            snapshot = KPISnapshotService._lock_snapshot()
+            financials = KPIService._financial_summary(current_month)
+
+            snapshot.financial_month = current_month
+            snapshot.monthly_revenue = financials.monthly_revenue
+            snapshot.monthly_cost = financials.monthly_cost
+            snapshot.overdue_escalations = EscalationService.get_overdue_count()
+            snapshot.time_refreshed_at = datetime.utcnow()
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error refreshing time-dependent KPI figures: {e}")
+            raise
+        return snapshot
+
+    @staticmethod
+    def _lock_snapshot():
+        """Re-read the snapshot row FOR UPDATE, replacing any copy already in the session"""
+        return KPISnapshot.query.populate_existing().with_for_update().filter_by(id=SNAPSHOT_ID).one()
+
+    @staticmethod
+    def _time_figures_stale(snapshot):
+        current_month = datetime.utcnow().date().replace(day=1)
+        if snapshot.financial_month != current_month or snapshot.time_refreshed_at is None:
+            return True
+
+        max_age = timedelta(seconds=current_app.config.get('KPI_SNAPSHOT_REFRESH_SECONDS', 300))
+        return datetime.utcnow() - snapshot.time_refreshed_at > max_age
@@ -0,0 +1,129 @@
+from app.models import Escalation, ProjectAllocation, Financials, Resource, Project, KPISnapshot
+from app.services.kpi_service import KPIService
+from app.utils import change_tracking
+from app.utils.broadcaster import StateBroadcaster
+from app.utils.data_versions import data_versions
+import json
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Tables whose commits can move the streamed KPIs
+STREAM_TABLES = (Escalation, ProjectAllocation, Financials, Resource, Project, KPISnapshot)
+
+# Wait after a commit before recomputing, so a burst of writes produces one update
+DISPATCH_DEBOUNCE_SECONDS = 0.5
+
+# Client reconnect delay sent in the stream (milliseconds)
+CLIENT_RETRY_MS = 5000
+
+def format_event(data, event=None, event_id=None):
+    """Encode one server-sent event"""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    if event:
+        lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, default=str)}")
+    return '\n'.join(lines) + '\n\n'
+
+class KPIStream:
+    """
+    Pushes summary KPI changes to connected dashboards over server-sent events.
+    One dispatcher thread per process recomputes the summary after commits to the watched tables
+    (or when another worker bumps their data versions) and broadcasts only the changed keys.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.broadcaster = StateBroadcaster()
+        self.heartbeat_seconds = 15
+        self.poll_seconds = 5
+        self.max_stream_seconds = 3600
+        self._tables = change_tracking.table_names(STREAM_TABLES)
+        self._changed = threading.Event()
+        self._dispatcher = None
+        self._dispatcher_lock = threading.Lock()
+        self._versions = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.broadcaster.max_subscribers = app.config.get('KPI_STREAM_MAX_SUBSCRIBERS', 500)
+        self.heartbeat_seconds = app.config.get('KPI_STREAM_HEARTBEAT_SECONDS', 15)
+        self.poll_seconds = app.config.get('KPI_STREAM_POLL_SECONDS', 5)
+        self.max_stream_seconds = app.config.get('KPI_STREAM_MAX_SECONDS', 3600)
+        app.extensions['kpi_stream'] = self
+
+        change_tracking.subscribe(self.notify)
+
+    def notify(self, tables):
+        """Commit hook: wake the dispatcher if a watched table was written"""
+        if self._tables.intersection(tables):
+            self._changed.set()
+
+    def subscribe(self):
+        """Register a listener, or return None when this process is at capacity"""
+        subscription = self.broadcaster.subscribe()
+        if subscription is None:
+            return None
+
+        self._ensure_dispatcher()
+        # The published state may be stale if nobody was listening; refresh it
+        self._changed.set()
+        return subscription
+
+    def stream(self, subscription):
+        """Yield the event stream for one subscription until the client leaves or max_stream_seconds passes"""
+        started = time.monotonic()
+        first = True
+        try:
+            yield f"retry: {CLIENT_RETRY_MS}\n\n"
+            while not subscription.closed and time.monotonic() - started < self.max_stream_seconds:
+                changes = subscription.wait(self.heartbeat_seconds)
+                if changes:
+                    yield format_event(changes, 'snapshot' if first else 'delta', subscription.seq)
+                    first = False
+                else:
+                    # Keeps proxies from timing out idle connections and surfaces dead clients
+                    yield ': heartbeat\n\n'
+        finally:
+            self.broadcaster.unsubscribe(subscription)
+
+    def _ensure_dispatcher(self):
+        # Started on first use so forked workers each get their own thread
+        with self._dispatcher_lock:
+            if self._dispatcher is None or not self._dispatcher.is_alive():
+                self._dispatcher = threading.Thread(
+                    target=self._dispatch_loop, name='kpi-stream-dispatcher', daemon=True
+                )
+                self._dispatcher.start()
+
+    def _dispatch_loop(self):
+        while True:
+            notified = self._changed.wait(self.poll_seconds)
+            if notified:
+                time.sleep(DISPATCH_DEBOUNCE_SECONDS)
+            self._changed.clear()
+
+            if not len(self.broadcaster):
+                continue
+
+            try:
+                with self.app.app_context():
+                    # The version store may be the database, so read it inside the app context too
+                    versions = data_versions.get(self._tables)
+                    if not notified and versions == self._versions:
+                        continue
+                    self._versions = versions
+                    summary = KPIService.get_kpi_summary(raise_errors=True)
+                delta = self.broadcaster.publish(summary)
+                if delta:
+                    logger.debug(f"Streamed {len(delta)} KPI changes to {len(self.broadcaster)} listeners")
+            except Exception as e:
+                logger.error(f"KPI stream dispatch failed: {e}")
+
+kpi_stream = KPIStream()
@@ -0,0 +1,112 @@
+from app import db
+from app.services.escalation_service import EscalationService
+from app.services.escalation_search_service import EscalationSearchService
+from app.services.escalation_duplicate_service import EscalationDuplicateService
+from app.services.kpi_service import KPIService
+from app.services.project_service import ProjectService
+from flask import current_app
+from sqlalchemy import event
+from datetime import date
+import re
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Hot service queries and the table each must reach through an index: (name, table, call)
+HOT_QUERIES = (
+    ('escalations.overdue', 'escalations', EscalationService.get_overdue_count),
+    ('escalations.list', 'escalations', EscalationService.get_all_escalations),
+    ('escalations.list_by_project', 'escalations', lambda: EscalationService.get_all_escalations({'project_id': 1})),
+    ('escalations.list_by_assignee', 'escalations', lambda: EscalationService.get_all_escalations({'assigned_to': 'nobody'})),
+    ('escalations.monthly_trend', 'escalations', EscalationService.get_monthly_trend),
+    ('escalations.search', 'escalations', lambda: EscalationSearchService.search('login outage')),
+    ('escalations.duplicates', 'escalation_lsh_bands', lambda: EscalationDuplicateService.find_duplicates('login page broken after deploy', None, 1)),
+    ('resources.departments', 'resources', KPIService._department_rows),
+    ('resources.bench_aging', 'resources', KPIService.get_bench_aging),
+    ('projects.health_distribution', 'projects', KPIService.get_health_distribution),
+    ('project_allocations.by_project', 'project_allocations', lambda: ProjectService.get_project_allocations(1)),
+    ('financials.summary', 'financials', lambda: KPIService._financial_summary(date.today().replace(day=1))),
+    ('financials.revenue_trends', 'financials', KPIService.get_revenue_trends),
+    ('bench_costing.trends', 'bench_costing', KPIService.get_bench_cost_trends)
+)
+
+# Plan lines that read a whole table rather than an index
+FULL_SCAN_PATTERNS = {
+    'postgresql': re.compile(r'Seq Scan on (\w+)'),
+    'sqlite': re.compile(r'^SCAN (?:TABLE )?(\w+)(?: AS \w+)?$')
+}
+
+EXPLAIN_PREFIXES = {
+    'postgresql': 'EXPLAIN',
+    'sqlite': 'EXPLAIN QUERY PLAN'
+}
+
+class QueryPlanService:
+
+    @staticmethod
+    def check(names=None):
+        """
+        Run each hot query, EXPLAIN the SQL it issued and flag any full scan of its table.
+        Returns a list of {name, table, ok, plan} dicts.
+        """
+        dialect = db.engine.dialect.name
+        if dialect not in FULL_SCAN_PATTERNS:
+            raise RuntimeError(f"Query plan checks are not supported on {dialect}")
+
+        results = []
+        for name, table, call in HOT_QUERIES:
+            if names and name not in names:
+                continue
+            # A fresh context per query so per-request memoization can't hide the SQL
+            with current_app.app_context():
+                results.append(QueryPlanService._check_query(dialect, name, table, call))
+        return results
+
+    @staticmethod
+    def _check_query(dialect, name, table, call):
+        try:
+            statements = QueryPlanService._capture(call)
+        except Exception as e:
+            logger.error(f"Hot query {name} failed: {e}")
+            return {'name': name, 'table': table, 'ok': False, 'plan': [f"(query failed: {e})"]}
+
+        if not statements:
+            return {'name': name, 'table': table, 'ok': False, 'plan': ['(no SELECT was issued)']}
+
+        connection = db.session.connection()
+        if dialect == 'postgresql':
+            # On small tables the planner rightly prefers a seq scan; this asks whether an index could serve it
+            connection.exec_driver_sql('SET LOCAL enable_seqscan = off')
+
+        plan = []
+        ok = True
+        try:
+            for statement, parameters in statements:
+                rows = connection.exec_driver_sql(f"{EXPLAIN_PREFIXES[dialect]} {statement}", parameters).all()
+                for row in rows:
+                    line = str(row[-1])
+                    plan.append(line)
+                    match = FULL_SCAN_PATTERNS[dialect].search(line.strip())
+                    if match and match.group(1) == table:
+                        ok = False
+        finally:
+            db.session.rollback()
+
+        return {'name': name, 'table': table, 'ok': ok, 'plan': plan}
+
+    @staticmethod
+    def _capture(call):
+        """Run call and return the (statement, parameters) of every SELECT it sent"""
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith('SELECT'):
+                statements.append((statement, parameters))
+
+        event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            call()
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+            db.session.rollback()
+        return statements
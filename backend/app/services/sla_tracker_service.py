@@ -0,0 +1,229 @@
+from app import db
+from app.models.escalation import Escalation, EscalationStatus, SLAState
+from app.services.kpi_snapshot_service import KPISnapshotService
+from app.utils import change_tracking, unit_of_work
+from app.utils.unit_of_work import TransactionState
+from sqlalchemy import or_
+from datetime import datetime, timedelta
+import heapq
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Statuses whose SLA is tracked; matches the overdue definition the KPIs have always used
+SLA_TRACKED_STATUSES = (EscalationStatus.OPEN, EscalationStatus.IN_PROGRESS)
+
+# Session.info key collecting (escalation id, next transition) pairs to schedule after commit
+PENDING_TRANSITIONS = TransactionState('sla_pending', list)
+
+def _as_status(value):
+    if isinstance(value, str):
+        try:
+            return EscalationStatus(value.lower())
+        except ValueError:
+            return None
+    return value
+
+def _as_datetime(value):
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    return value
+
+def sla_state_for(status, target_resolution_date, now, at_risk):
+    """SLA state of an escalation at `now`, or None when it is no longer tracked"""
+    if _as_status(status) not in SLA_TRACKED_STATUSES:
+        return None
+    target_resolution_date = _as_datetime(target_resolution_date)
+    if target_resolution_date is None:
+        return SLAState.ON_TRACK
+    if target_resolution_date <= now:
+        return SLAState.BREACHED
+    if target_resolution_date - at_risk <= now:
+        return SLAState.AT_RISK
+    return SLAState.ON_TRACK
+
+def next_transition(state, target_resolution_date, at_risk):
+    """When an escalation in `state` next changes state with no write, or None"""
+    target_resolution_date = _as_datetime(target_resolution_date)
+    if target_resolution_date is None:
+        return None
+    if state == SLAState.ON_TRACK:
+        return target_resolution_date - at_risk
+    if state == SLAState.AT_RISK:
+        return target_resolution_date
+    return None
+
+def _before_flush(session, flush_context, instances):
+    now = datetime.utcnow()
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, Escalation):
+            status = obj.status if obj.status is not None else Escalation.__table__.c.status.default.arg
+            state = sla_state_for(status, obj.target_resolution_date, now, sla_tracker.at_risk)
+            if obj.sla_state != state:
+                obj.sla_state = state
+
+def _after_flush(session, flush_context):
+    pending = PENDING_TRANSITIONS.get(session)
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, Escalation):
+            due = next_transition(obj.sla_state, obj.target_resolution_date, sla_tracker.at_risk)
+            if due is not None:
+                pending.append((due, obj.id))
+
+def _after_commit(session):
+    for due, escalation_id in PENDING_TRANSITIONS.pop(session) or ():
+        sla_tracker.schedule(escalation_id, due)
+
+def register_listeners(session=None):
+    """Set sla_state on every escalation write and schedule its next transition once committed"""
+    # DERIVE stage: the snapshot's overdue count reads the sla_state set here
+    unit_of_work.register_listeners(
+        [('after_flush', _after_flush), ('after_commit', _after_commit)],
+        before_flush=_before_flush, stage=unit_of_work.DERIVE, states=[PENDING_TRANSITIONS], session=session
+    )
+
+class SLATracker:
+    """
+    Moves open escalations from on-track to at-risk to breached as their targets approach.
+    Upcoming transitions sit in a heap ordered by time, so the thread sleeps until the next one
+    is due; a periodic resync picks up writes made by other workers or outside the application.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.enabled = True
+        self.at_risk = timedelta(hours=24)
+        self.resync_seconds = 300
+        self._heap = []  # (due, escalation_id)
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._thread_lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = app.config.get('SLA_TRACKER_ENABLED', True)
+        self.at_risk = timedelta(hours=app.config.get('SLA_AT_RISK_HOURS', 24))
+        self.resync_seconds = app.config.get('SLA_RESYNC_SECONDS', 300)
+        app.extensions['sla_tracker'] = self
+
+        register_listeners()
+        if self.enabled:
+            # Started on first request so forked workers each get their own thread
+            app.before_request(self.ensure_started)
+
+    def schedule(self, escalation_id, due):
+        """Re-check an escalation at `due`; stale entries are harmless because state is recomputed from the row"""
+        with self._lock:
+            heapq.heappush(self._heap, (due, escalation_id))
+            earliest = self._heap[0] == (due, escalation_id)
+        if earliest:
+            self._wake.set()
+
+    def ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._thread_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='sla-tracker', daemon=True)
+                self._thread.start()
+
+    def resync(self):
+        """Recompute the state of every tracked escalation and rebuild the heap; returns rows changed"""
+        rows = db.session.query(
+            Escalation.id, Escalation.status, Escalation.target_resolution_date, Escalation.sla_state
+        ).filter(or_(
+            Escalation.status.in_(SLA_TRACKED_STATUSES),
+            Escalation.sla_state.isnot(None)
+        )).all()
+
+        with self._lock:
+            self._heap = []
+        return self._apply(rows)
+
+    def advance(self, escalation_ids):
+        """Re-check the given escalations, moving any whose state is now different"""
+        rows = db.session.query(
+            Escalation.id, Escalation.status, Escalation.target_resolution_date, Escalation.sla_state
+        ).filter(Escalation.id.in_(escalation_ids)).all()
+        return self._apply(rows)
+
+    def _apply(self, rows):
+        now = datetime.utcnow()
+        moves = {}
+        states = {}
+        for row in rows:
+            state = sla_state_for(row.status, row.target_resolution_date, now, self.at_risk)
+            if state != row.sla_state:
+                moves.setdefault(state, []).append(row.id)
+                states[row.id] = state
+
+            due = next_transition(state, row.target_resolution_date, self.at_risk)
+            if due is not None:
+                self.schedule(row.id, due)
+
+        if not moves:
+            return 0
+
+        try:
+            for state, ids in moves.items():
+                Escalation.query.filter(Escalation.id.in_(ids)).update(
+                    {'sla_state': state}, synchronize_session=False
+                )
+            # Moves into or out of breached change the snapshot's overdue count
+            old_rows = [row._asdict() for row in rows if row.id in states]
+            KPISnapshotService.record_bulk_changes(
+                Escalation, old_rows, [{**row, 'sla_state': states[row['id']]} for row in old_rows]
+            )
+            change_tracking.mark_changed(db.session, Escalation.__tablename__)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        moved = sum(len(ids) for ids in moves.values())
+        logger.info(f"Moved {moved} escalations between SLA states")
+        return moved
+
+    def _pop_due(self, now):
+        ids = set()
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                ids.add(heapq.heappop(self._heap)[1])
+        return ids
+
+    def _seconds_until(self, next_resync):
+        wait = next_resync - time.monotonic()
+        with self._lock:
+            if self._heap:
+                wait = min(wait, (self._heap[0][0] - datetime.utcnow()).total_seconds())
+        return max(wait, 0)
+
+    def _run(self):
+        next_resync = 0
+        while True:
+            # Cleared before the work so a schedule() that lands meanwhile still wakes the next wait
+            self._wake.clear()
+            try:
+                with self.app.app_context():
+                    if time.monotonic() >= next_resync:
+                        self.resync()
+                        next_resync = time.monotonic() + self.resync_seconds
+
+                    due = self._pop_due(datetime.utcnow())
+                    if due:
+                        self.advance(due)
+            except Exception as e:
+                logger.error(f"SLA tracker pass failed: {e}")
+                next_resync = time.monotonic() + self.resync_seconds
+
+            self._wake.wait(self._seconds_until(next_resync))
+
+sla_tracker = SLATracker()
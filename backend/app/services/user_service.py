@@ -1,6 +1,9 @@
 
-from werkzeug.security import generate_password_hash, check_password_hash
 from app.models.user import User
+from app.models.role_permission import RolePermission
+from app.utils.permissions import permission_store, default_grants, ROLES, RESOURCES, ACTIONS
+from app.utils.rate_limit import rate_limiter
+from app.utils.exceptions import TooManyRequestsError
 from app import db
 import logging
 
@@ -9,17 +12,61 @@ logger = logging.getLogger(__name__)
 class UserService:
     
     @staticmethod
-    def authenticate_user(email, password):
-        """Authenticate user with email and password"""
+    def authenticate_user(email, password, ip_address=None):
+        """
+        Authenticate user with email and password. Every attempt reserves a token from three buckets:
+        the account from this client IP, the account from any IP, and the IP across all accounts.
+        When one is empty the attempt is refused with TooManyRequestsError before anything is queried
+        or hashed, so concurrent guesses cannot outrun the limits. A successful login hands its tokens
+        back and refills its account and IP bucket, so only failures are counted.
+        """
+        buckets = (('account_ip', f"{email}|{ip_address}"), ('account', email), ('ip', ip_address))
+        reserved = []
+        for scope, key in buckets:
+            wait = rate_limiter.take('login', scope, key)
+            if wait > 0:
+                UserService._refund_login_attempt(reserved)
+                logger.warning(f"Login attempts for {email} from {ip_address} throttled by {scope} limit for {wait:.0f}s")
+                raise TooManyRequestsError('Too many failed login attempts, please retry later', retry_after=wait)
+            reserved.append((scope, key))
+        
         try:
             user = User.query.filter_by(email=email, is_active=True).first()
-            if user and user.check_password(password):
-                return user
-            return None
+            if not user or not user.check_password(password):
+                return None
+            
+            rate_limiter.reset('login', 'account_ip', buckets[0][1])
+            UserService._refund_login_attempt(buckets[1:])
+            if user.password_needs_rehash():
+                UserService._rehash_password(user, password)
+            return user
+        except TooManyRequestsError:
+            # The hashing pool is saturated; the attempt was never checked, so it is not a failure
+            UserService._refund_login_attempt(buckets)
+            raise
         except Exception as e:
             logger.error(f"Authentication error: {e}")
             return None
     
+    @staticmethod
+    def _refund_login_attempt(buckets):
+        for scope, key in buckets:
+            rate_limiter.refund('login', scope, key)
+    
+    @staticmethod
+    def _rehash_password(user, password):
+        """Upgrade a verified password's hash to the configured algorithm and cost; tokens stay valid"""
+        try:
+            user.set_password(password)
+            db.session.commit()
+            logger.info(f"Upgraded password hash for {user.email}")
+        except TooManyRequestsError:
+            # The hashing pool is saturated; upgrade on a later login
+            db.session.rollback()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Password rehash error for {user.email}: {e}")
+    
     @staticmethod
     def create_user(email, password, name, role='employee'):
         """Create new user"""
@@ -73,13 +120,22 @@ class UserService:
             if not user:
                 raise ValueError("User not found")
             
+            # Tokens carry role and active flag as claims, so changing either (or the password) revokes them
+            revoke = (
+                'password' in kwargs or
+                ('role' in kwargs and kwargs['role'] != user.role) or
+                ('is_active' in kwargs and kwargs['is_active'] != user.is_active)
+            )
+            
             for key, value in kwargs.items():
-                if hasattr(user, key) and key != 'id':
+                if hasattr(user, key) and key not in ('id', 'tokens_valid_after'):
                     if key == 'password':
                         user.set_password(value)
                     else:
                         setattr(user, key, value)
             
+            if revoke:
+                user.revoke_tokens()
             db.session.commit()
             return user
             
@@ -97,6 +153,7 @@ class UserService:
                 raise ValueError("User not found")
             
             user.is_active = False
+            user.revoke_tokens()
             db.session.commit()
             return user
             
@@ -105,67 +162,101 @@ class UserService:
             logger.error(f"User deactivation error: {e}")
             raise
     
+    @staticmethod
+    def revoke_tokens(user_id):
+        """Sign a user out everywhere by refusing every access token issued to them so far"""
+        try:
+            user = User.query.get(user_id)
+            if not user:
+                raise ValueError("User not found")
+            
+            user.revoke_tokens()
+            db.session.commit()
+            return user
+            
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Token revocation error for user {user_id}: {e}")
+            raise
+    
     @staticmethod
     def get_user_permissions(role):
         """Get permissions for user role"""
-        permissions = {
-            'leadership': {
-                'users': {'read': True, 'write': True, 'delete': True},
-                'resources': {'read': True, 'write': True, 'delete': True},
-                'projects': {'read': True, 'write': True, 'delete': True},
-                'financials': {'read': True, 'write': True, 'delete': True},
-                'escalations': {'read': True, 'write': True, 'delete': True},
-                'kpis': {'read': True, 'write': False, 'delete': False},
-                'settings': {'read': True, 'write': True, 'delete': True}
-            },
-            'finance_head': {
-                'users': {'read': True, 'write': False, 'delete': False},
-                'resources': {'read': True, 'write': False, 'delete': False},
-                'projects': {'read': True, 'write': True, 'delete': False},
-                'financials': {'read': True, 'write': True, 'delete': True},
-                'escalations': {'read': True, 'write': False, 'delete': False},
-                'kpis': {'read': True, 'write': False, 'delete': False},
-                'settings': {'read': False, 'write': False, 'delete': False}
-            },
-            'delivery_owner': {
-                'users': {'read': True, 'write': False, 'delete': False},
-                'resources': {'read': True, 'write': True, 'delete': False},
-                'projects': {'read': True, 'write': True, 'delete': False},
-                'financials': {'read': True, 'write': False, 'delete': False},
-                'escalations': {'read': True, 'write': True, 'delete': True},
-                'kpis': {'read': True, 'write': False, 'delete': False},
-                'settings': {'read': False, 'write': False, 'delete': False}
-            },
-            'resource_manager': {
-                'users': {'read': True, 'write': False, 'delete': False},
-                'resources': {'read': True, 'write': True, 'delete': True},
-                'projects': {'read': True, 'write': False, 'delete': False},
-                'financials': {'read': False, 'write': False, 'delete': False},
-                'escalations': {'read': True, 'write': False, 'delete': False},
-                'kpis': {'read': True, 'write': False, 'delete': False},
-                'settings': {'read': False, 'write': False, 'delete': False}
-            },
-            'hr': {
-                'users': {'read': True, 'write': True, 'delete': True},
-                'resources': {'read': True, 'write': True, 'delete': False},
-                'projects': {'read': True, 'write': False, 'delete': False},
-                'financials': {'read': False, 'write': False, 'delete': False},
-                'escalations': {'read': True, 'write': False, 'delete': False},
-                'kpis': {'read': True, 'write': False, 'delete': False},
-                'settings': {'read': False, 'write': False, 'delete': False}
-            },
-            'employee': {
-                'users': {'read': False, 'write': False, 'delete': False},
-                'resources': {'read': True, 'write': False, 'delete': False},
-                'projects': {'read': True, 'write': False, 'delete': False},
-                'financials': {'read': False, 'write': False, 'delete': False},
-                'escalations': {'read': True, 'write': False, 'delete': False},
-                'kpis': {'read': True, 'write': False, 'delete': False},
-                'settings': {'read': False, 'write': False, 'delete': False}
-            }
+        return permission_store.matrix.as_dict(role)
+    
+    @staticmethod
+    def get_effective_permissions(user_id):
+        """A user's role and what it allows, as the nested table and as resource:action grants"""
+        user = User.query.get(user_id)
+        if not user:
+            raise ValueError("User not found")
+        
+        matrix = permission_store.matrix
+        return {
+            'user_id': user.id,
+            'email': user.email,
+            'role': user.role,
+            'is_active': user.is_active,
+            'permissions': matrix.as_dict(user.role),
+            'granted': [
+                f"{resource}:{action}" for resource in RESOURCES for action in ACTIONS
+                if matrix.allows(user.role, resource, action)
+            ]
         }
+    
+    @staticmethod
+    def set_role_permissions(role, changes, updated_by=None):
+        """
+        Grant or deny actions for a role from a partial {resource: {action: bool}} table.
+        Every worker picks the change up without a restart.
+        """
+        if role not in ROLES:
+            raise ValueError(f"Invalid role. Must be one of: {', '.join(ROLES)}")
+        if not isinstance(changes, dict) or not changes:
+            raise ValueError("Permissions must map resources to {action: true|false}")
+        
+        grant, deny = [], []
+        for resource, actions in changes.items():
+            if resource not in RESOURCES:
+                raise ValueError(f"Invalid resource {resource}. Must be one of: {', '.join(RESOURCES)}")
+            if not isinstance(actions, dict):
+                raise ValueError(f"Permissions for {resource} must map actions to true or false")
+            for action, allowed in actions.items():
+                if action not in ACTIONS:
+                    raise ValueError(f"Invalid action {action}. Must be one of: {', '.join(ACTIONS)}")
+                (grant if allowed else deny).append((resource, action))
+        
+        try:
+            for resource, action in deny:
+                RolePermission.query.filter_by(role=role, resource=resource, action=action).delete()
+            for resource, action in grant:
+                if not RolePermission.query.get((role, resource, action)):
+                    db.session.add(RolePermission(role=role, resource=resource, action=action, updated_by=updated_by))
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error updating permissions for role {role}: {e}")
+            raise
         
-        return permissions.get(role, {})
+        return permission_store.reload().as_dict(role)
+    
+    @staticmethod
+    def create_default_permissions():
+        """Seed the permissions store from DEFAULT_PERMISSIONS when it is empty"""
+        try:
+            if RolePermission.query.first():
+                return
+            
+            db.session.add_all(
+                RolePermission(role=role, resource=resource, action=action, updated_by='system')
+                for role, resource, action in default_grants()
+            )
+            db.session.commit()
+            logger.info("Seeded role permissions from the defaults")
+            
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error creating default permissions: {e}")
     
     @staticmethod
     def create_default_users():
@@ -1,14 +1,127 @@
 
 from functools import wraps
-from flask import g, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
-from app.services.user_service import UserService
+from flask import g, request, jsonify, make_response, has_request_context, has_app_context
+from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt, create_access_token
 from app.models.user import User
+from app.utils import change_tracking
+from app.utils.data_versions import data_versions
+from app.utils.permissions import permission_store
+from app.services.audit_service import audit_writer
 from app import db
+from sqlalchemy import or_
+from datetime import datetime
+import threading
+import time
 import logging
 
 logger = logging.getLogger(__name__)
 
+class TokenUser:
+    """The authenticated user as described by the signed claims of their access token"""
+    __slots__ = ('id', 'email', 'name', 'role', 'is_active')
+
+    def __init__(self, id, email, name, role, is_active=True):
+        self.id = id
+        self.email = email
+        self.name = name
+        self.role = role
+        self.is_active = is_active
+
+    def __repr__(self):
+        return f'<TokenUser {self.email}>'
+
+class TokenRevocations:
+    """
+    Users whose tokens are refused even though they verify: deactivated accounts, and accounts
+    whose earlier tokens were revoked (role or password change, logout). Held in memory and
+    reloaded when the users table version moves, and at least every refresh_seconds.
+    """
+
+    def __init__(self, app=None):
+        self.refresh_seconds = 30
+        self.token_lifetime = None
+        self._inactive = frozenset()
+        self._valid_after = {}  # user id -> earliest accepted token issue time (epoch seconds)
+        self._version = None
+        self._loaded_at = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.refresh_seconds = app.config.get('AUTH_REVOCATION_REFRESH_SECONDS', 30)
+        self.token_lifetime = app.config.get('JWT_ACCESS_TOKEN_EXPIRES')
+        app.extensions['token_revocations'] = self
+        change_tracking.subscribe(self._on_commit)
+
+    def refusal(self, user_id, issued_at):
+        """(error, status) when a verified token must be refused, else None"""
+        self._refresh_if_stale()
+        if user_id in self._inactive:
+            return 'User account is deactivated', 403
+        valid_after = self._valid_after.get(user_id)
+        if valid_after is not None and (issued_at or 0) < valid_after:
+            return 'Token has been revoked', 401
+        return None
+
+    def _on_commit(self, tables):
+        # This worker's own writes apply at once, whichever version store is in use
+        if User.__tablename__ in tables:
+            self._loaded_at = None
+
+    def _refresh_if_stale(self):
+        try:
+            version = data_versions.get((User.__tablename__,))
+        except Exception as e:
+            logger.error(f"Could not read the users table version: {e}")
+            version = None
+
+        if (
+            self._loaded_at is not None and version == self._version and
+            time.monotonic() - self._loaded_at < self.refresh_seconds
+        ):
+            return
+
+        query = db.session.query(User.id, User.is_active, User.tokens_valid_after)
+        conditions = [User.is_active.is_(False)]
+        if self.token_lifetime:
+            # Revocations older than any token still in circulation no longer matter
+            conditions.append(User.tokens_valid_after > datetime.utcnow() - self.token_lifetime)
+        else:
+            conditions.append(User.tokens_valid_after.isnot(None))
+        rows = query.filter(or_(*conditions)).all()
+
+        with self._lock:
+            self._inactive = frozenset(row.id for row in rows if row.is_active is False)
+            self._valid_after = {
+                row.id: int((row.tokens_valid_after - datetime(1970, 1, 1)).total_seconds())
+                for row in rows if row.tokens_valid_after is not None
+            }
+            self._version = version
+            self._loaded_at = time.monotonic()
+
+token_revocations = TokenRevocations()
+
+def issue_access_token(user):
+    """Access token carrying the claims requests are authorized from"""
+    return create_access_token(
+        # PyJWT 2.10+ rejects non-string subjects
+        identity=str(user.id),
+        additional_claims={
+            'role': user.role,
+            'email': user.email,
+            'name': user.name,
+            'is_active': user.is_active
+        }
+    )
+
+def _token_identity():
+    """Identity of the token verified for this request, if any"""
+    try:
+        return get_jwt_identity()
+    except RuntimeError:
+        return None
+
 def get_current_user():
     """Get current authenticated user"""
     try:
@@ -19,19 +132,42 @@ def get_current_user():
         logger.error(f"Error getting current user: {e}")
     return None
 
-def role_required(allowed_roles, action=None, resource=None):
+def authenticate_from_claims():
+    """
+    Build the current user from the verified token's claims without a database lookup.
+    Returns (user, refusal); tokens issued before roles were carried in claims fall back to the database.
+    """
+    claims = get_jwt()
+    if 'role' not in claims:
+        return get_current_user(), None
+
+    user = TokenUser(
+        id=int(claims['sub']),
+        email=claims.get('email'),
+        name=claims.get('name'),
+        role=claims['role'],
+        is_active=claims.get('is_active', True)
+    )
+    return user, token_revocations.refusal(user.id, claims.get('iat'))
+
+def role_required(allowed_roles, action=None, resource=None, locations=None):
     """
-    Decorator to check if user has required role and permissions
+    Decorator to check if user has required role and permissions.
+    locations overrides where the JWT is read from (e.g. query_string for EventSource clients).
     """
     def decorator(f):
         @wraps(f)
-        @jwt_required()
+        @jwt_required(locations=locations)
         def decorated_function(*args, **kwargs):
             try:
-                current_user = get_current_user()
+                current_user, refusal = authenticate_from_claims()
                 if not current_user:
                     return jsonify({'error': 'User not found'}), 404
                 
+                if refusal:
+                    error, status = refusal
+                    return jsonify({'error': error}), status
+                
                 if not current_user.is_active:
                     return jsonify({'error': 'User account is deactivated'}), 403
                 
@@ -40,12 +176,8 @@ def role_required(allowed_roles, action=None, resource=None):
                     return jsonify({'error': 'Insufficient permissions'}), 403
                 
                 # Check specific permissions if provided
-                if action and resource:
-                    permissions = UserService.get_user_permissions(current_user.role)
-                    resource_perms = permissions.get(resource, {})
-                    
-                    if action not in resource_perms or not resource_perms[action]:
-                        return jsonify({'error': f'No {action} permission for {resource}'}), 403
+                if action and resource and not permission_store.allows(current_user.role, resource, action):
+                    return jsonify({'error': f'No {action} permission for {resource}'}), 403
                 
                 # Store current user in global context
                 g.current_user = current_user
@@ -59,31 +191,70 @@ def role_required(allowed_roles, action=None, resource=None):
     return decorator
 
 def audit_log(action, resource_type, resource_id=None, details=None, user_id=None):
-    """Log audit trail for important actions"""
+    """Log audit trail for important actions and queue it for the audit_events table"""
     try:
+        current_user = getattr(g, 'current_user', None)
         if not user_id:
-            current_user = get_current_user()
-            user_id = current_user.id if current_user else None
+            user_id = current_user.id if current_user else _token_identity()
         
-        # In a production system, you'd store this in an audit table
         logger.info(f"AUDIT: User {user_id} performed {action} on {resource_type} {resource_id}: {details}")
+        if has_app_context():
+            g.audit_recorded = True
+        
+        # Everything comes from the request and token claims, so the request never waits on the database
+        in_request = has_request_context()
+        user_email = None
+        if current_user and str(current_user.id) == str(user_id):
+            user_email = current_user.email
+        audit_writer.record(
+            user_id=int(user_id) if user_id else None,
+            user_email=user_email,
+            action=action,
+            resource_type=resource_type,
+            resource_id=resource_id,
+            details=details if details is None or isinstance(details, str) else str(details),
+            method=request.method if in_request else None,
+            path=request.path if in_request else None,
+            ip_address=request.remote_addr if in_request else None
+        )
         
     except Exception as e:
         logger.error(f"Audit logging failed: {e}")
 
+def audited_read(resource_type):
+    """
+    Decorator recording a READ audit event when the view itself did not run: a 304 from
+    data_versions.conditional or a hit from response_cache.cached. Apply it inside role_required
+    and outside both of those; views that run still record their own, more detailed event.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            g.audit_recorded = False
+            response = make_response(f(*args, **kwargs))
+            if not g.audit_recorded:
+                if response.status_code == 304:
+                    audit_log('READ', resource_type, details='Not modified (304)')
+                elif response.headers.get('X-Cache') == 'HIT':
+                    audit_log('READ', resource_type, details='Served from the response cache')
+            return response
+        return decorated_function
+    return decorator
+
 def validate_permissions(user_role, resource, action):
     """Validate if user role has permission for specific action on resource"""
-    permissions = UserService.get_user_permissions(user_role)
-    resource_perms = permissions.get(resource, {})
-    return resource_perms.get(action, False)
+    return permission_store.allows(user_role, resource, action)
 
 def admin_required(f):
     """Decorator for admin-only endpoints"""
     @wraps(f)
     @jwt_required()
     def decorated_function(*args, **kwargs):
-        current_user = get_current_user()
-        if not current_user or current_user.role != 'leadership':
+        current_user, refusal = authenticate_from_claims()
+        if refusal:
+            error, status = refusal
+            return jsonify({'error': error}), status
+        if not current_user or not current_user.is_active or current_user.role != 'leadership':
             return jsonify({'error': 'Admin access required'}), 403
         g.current_user = current_user
         return f(*args, **kwargs)
@@ -97,8 +268,11 @@ def optional_auth(f):
             # Try to get user if token is provided
             if 'Authorization' in request.headers:
                 from flask_jwt_extended import verify_jwt_in_request
-                verify_jwt_in_request(optional=True)
-                g.current_user = get_current_user()
+                if verify_jwt_in_request(optional=True):
+                    current_user, refusal = authenticate_from_claims()
+                    g.current_user = None if refusal else current_user
+                else:
+                    g.current_user = None
             else:
                 g.current_user = None
         except:
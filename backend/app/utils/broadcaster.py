@@ -0,0 +1,88 @@
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+class Subscription:
+    """
+    One listener's pending changes. Deltas are merged by key until the listener drains them,
+    so a slow client costs one value per key no matter how many updates it misses.
+    """
+
+    def __init__(self, initial=None):
+        self.seq = 0
+        self._pending = dict(initial or {})
+        self._condition = threading.Condition()
+        self._closed = False
+
+    def push(self, delta, seq):
+        with self._condition:
+            self._pending.update(delta)
+            self.seq = seq
+            self._condition.notify()
+
+    def wait(self, timeout):
+        """Block until changes arrive, the subscription is closed or timeout passes; returns the merged changes"""
+        with self._condition:
+            if not self._pending and not self._closed:
+                self._condition.wait(timeout)
+            changes, self._pending = self._pending, {}
+            return changes
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+
+    @property
+    def closed(self):
+        return self._closed
+
+class StateBroadcaster:
+    """
+    Holds the latest published state and fans out the keys that changed to every subscriber.
+    New subscribers start with the full state, so nothing published before they joined is lost.
+    """
+
+    def __init__(self, max_subscribers=500):
+        self.max_subscribers = max_subscribers
+        self.state = {}
+        self.seq = 0
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._subscribers)
+
+    def subscribe(self):
+        """Register a listener, or return None when the process is at max_subscribers"""
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                return None
+            subscription = Subscription(self.state)
+            subscription.seq = self.seq
+            self._subscribers.add(subscription)
+            return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+        subscription.close()
+
+    def publish(self, state):
+        """Replace the state and push only the changed keys; returns the delta"""
+        with self._lock:
+            delta = {key: value for key, value in state.items() if self.state.get(key) != value}
+            if not delta:
+                return {}
+            self.state = dict(state)
+            self.seq += 1
+            for subscription in self._subscribers:
+                subscription.push(delta, self.seq)
+        return delta
+
+    def close_all(self):
+        with self._lock:
+            subscribers, self._subscribers = self._subscribers, set()
+        for subscription in subscribers:
+            subscription.close()
@@ -0,0 +1,324 @@
+from functools import wraps
+from collections import OrderedDict
+from flask import g, request, current_app, make_response, has_app_context, has_request_context
+from app.utils import change_tracking
+import threading
+import time
+import logging
+
+try:
+    import redis
+except ImportError:  # Only needed for the redis backend
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+# request.environ key holding the per-request memo
+REQUEST_MEMO_KEY = 'app.request_memo'
+
+def _request_memo():
+    if has_request_context():
+        return request.environ.setdefault(REQUEST_MEMO_KEY, {})
+    if has_app_context():
+        # Background work (e.g. dashboard sections) gets a fresh app context per task
+        return g.setdefault('_request_memo', {})
+    return None
+
+def memoize_per_request(f):
+    """
+    Decorator sharing a read helper's result for the rest of the current request,
+    so charts built from the same base query only run it once.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        memo = _request_memo()
+        if memo is None:
+            return f(*args, **kwargs)
+
+        key = (f.__qualname__, args, tuple(sorted(kwargs.items())))
+        if key not in memo:
+            memo[key] = f(*args, **kwargs)
+        return memo[key]
+    return decorated_function
+
+def clear_request_memo():
+    """Drop memoized reads after a commit so the rest of the request sees its own writes"""
+    memo = _request_memo()
+    if memo:
+        memo.clear()
+
+class MemoryCacheBackend:
+    """In-process cache with TTL expiry, LRU eviction and tag-based invalidation"""
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (expires_at, value, tags)
+        self._tags = {}  # tag -> set of keys
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value, ttl, tags=()):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + ttl, value, tuple(tags))
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate_tags(self, tags):
+        with self._lock:
+            for tag in tags:
+                for key in self._tags.pop(tag, ()):
+                    self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[2]:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+class RedisCacheBackend:
+    """Shared cache for multi-worker deployments; eviction is left to Redis' maxmemory-policy"""
+
+    def __init__(self, client, prefix='cache'):
+        self.client = client
+        self.prefix = prefix
+
+    def _tag_key(self, tag):
+        return f"{self.prefix}:tag:{tag}"
+
+    def get(self, key):
+        return self.client.get(f"{self.prefix}:{key}")
+
+    def set(self, key, value, ttl, tags=()):
+        pipe = self.client.pipeline()
+        pipe.setex(f"{self.prefix}:{key}", ttl, value)
+        for tag in tags:
+            pipe.sadd(self._tag_key(tag), f"{self.prefix}:{key}")
+            pipe.expire(self._tag_key(tag), ttl)
+        pipe.execute()
+
+    def invalidate_tags(self, tags):
+        for tag in tags:
+            keys = self.client.smembers(self._tag_key(tag))
+            self.client.delete(self._tag_key(tag), *keys)
+
+    def clear(self):
+        keys = list(self.client.scan_iter(f"{self.prefix}:*"))
+        if keys:
+            self.client.delete(*keys)
+
+class LocalRedis:
+    """In-process stand-in for the subset of the Redis client API the cache uses"""
+
+    def __init__(self):
+        self._data = {}  # key -> (expires_at or None, value)
+        self._lock = threading.RLock()
+
+    def _live(self, key):
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        if entry[0] is not None and entry[0] <= time.monotonic():
+            del self._data[key]
+            return None
+        return entry
+
+    def get(self, key):
+        with self._lock:
+            entry = self._live(key)
+            return entry[1] if entry else None
+
+    def mget(self, keys):
+        return [self.get(key) for key in keys]
+
+    def set(self, key, value, nx=False):
+        with self._lock:
+            if nx and self._live(key):
+                return None
+            self._data[key] = (None, value)
+            return True
+
+    def setex(self, key, ttl, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+
+    def incr(self, key):
+        with self._lock:
+            entry = self._live(key)
+            value = int(entry[1]) + 1 if entry else 1
+            self._data[key] = (entry[0] if entry else None, value)
+            return value
+
+    def sadd(self, key, *members):
+        with self._lock:
+            entry = self._live(key)
+            members_set = entry[1] if entry else set()
+            members_set.update(members)
+            self._data[key] = (entry[0] if entry else None, members_set)
+
+    def smembers(self, key):
+        with self._lock:
+            entry = self._live(key)
+            return set(entry[1]) if entry else set()
+
+    def expire(self, key, ttl):
+        with self._lock:
+            entry = self._live(key)
+            if entry:
+                self._data[key] = (time.monotonic() + ttl, entry[1])
+
+    def delete(self, *keys):
+        with self._lock:
+            return sum(1 for key in keys if self._data.pop(key, None) is not None)
+
+    def scan_iter(self, pattern):
+        prefix = pattern.rstrip('*')
+        with self._lock:
+            return [key for key in list(self._data) if key.startswith(prefix) and self._live(key)]
+
+    def pipeline(self):
+        return _LocalPipeline(self)
+
+class _LocalPipeline:
+    """Buffers commands and runs them on execute(), like a Redis pipeline"""
+
+    def __init__(self, client):
+        self._client = client
+        self._commands = []
+
+    def __getattr__(self, name):
+        def queue(*args):
+            self._commands.append((name, args))
+            return self
+        return queue
+
+    def execute(self):
+        with self._client._lock:
+            results = [getattr(self._client, name)(*args) for name, args in self._commands]
+        self._commands = []
+        return results
+
+class ResponseCache:
+    """Role-aware cache for read endpoints, invalidated when the tables they read are committed"""
+
+    def __init__(self, app=None):
+        self.backend = None
+        self.default_ttl = 60
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.default_ttl = app.config.get('CACHE_DEFAULT_TTL', 60)
+        self.backend = self._create_backend(app.config)
+        app.extensions['response_cache'] = self
+
+        change_tracking.subscribe(self._on_commit)
+
+    @staticmethod
+    def _create_backend(config):
+        backend = config.get('CACHE_BACKEND', 'memory')
+        if backend == 'none':
+            return None
+        if backend == 'memory':
+            return MemoryCacheBackend(config.get('CACHE_MAX_ENTRIES', 1024))
+        if backend == 'local-redis':
+            return RedisCacheBackend(LocalRedis(), config.get('CACHE_KEY_PREFIX', 'cache'))
+        if backend == 'redis':
+            if redis is None:
+                raise RuntimeError("CACHE_BACKEND=redis requires the redis package")
+            return RedisCacheBackend(
+                redis.Redis.from_url(config['CACHE_REDIS_URL']),
+                config.get('CACHE_KEY_PREFIX', 'cache')
+            )
+        raise ValueError(f"Unknown CACHE_BACKEND: {backend}")
+
+    def _on_commit(self, tables):
+        self.invalidate(tables)
+        clear_request_memo()
+
+    def invalidate(self, tables):
+        """Drop every cached response that depends on one of the given tables"""
+        if self.backend is None:
+            return
+        try:
+            self.backend.invalidate_tags(tables)
+        except Exception as e:
+            logger.error(f"Cache invalidation failed for {sorted(tables)}: {e}")
+
+    def clear(self):
+        if self.backend is not None:
+            self.backend.clear()
+
+    @staticmethod
+    def make_key(endpoint):
+        """Key a response by endpoint, caller role and query parameters"""
+        current_user = g.get('current_user')
+        role = current_user.role if current_user else 'anonymous'
+        params = '&'.join(
+            f"{name}={value}"
+            for name in sorted(request.args)
+            for value in sorted(request.args.getlist(name))
+        )
+        return f"{endpoint}:{role}:{params}"
+
+    def cached(self, depends_on, ttl=None):
+        """
+        Decorator caching successful JSON responses of a read endpoint.
+        Must be applied inside role_required so the caller's role is known.
+        Responses marked Cache-Control: no-store are passed through uncached.
+        """
+        tables = change_tracking.table_names(depends_on)
+
+        def decorator(f):
+            @wraps(f)
+            def decorated_function(*args, **kwargs):
+                if self.backend is None:
+                    return f(*args, **kwargs)
+
+                key = self.make_key(request.endpoint)
+                try:
+                    cached_body = self.backend.get(key)
+                except Exception as e:
+                    logger.error(f"Cache read failed for {key}: {e}")
+                    cached_body = None
+
+                if cached_body is not None:
+                    response = current_app.response_class(cached_body, mimetype='application/json')
+                    response.headers['X-Cache'] = 'HIT'
+                    return response
+
+                response = make_response(f(*args, **kwargs))
+                if response.status_code == 200 and 'no-store' not in response.headers.get('Cache-Control', ''):
+                    try:
+                        self.backend.set(key, response.get_data(), ttl or self.default_ttl, tables)
+                    except Exception as e:
+                        logger.error(f"Cache write failed for {key}: {e}")
+                response.headers['X-Cache'] = 'MISS'
+                return response
+            return decorated_function
+        return decorator
+
+response_cache = ResponseCache()
@@ -0,0 +1,57 @@
+from app.utils import unit_of_work
+from app.utils.unit_of_work import TransactionState
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Tables written in the current transaction
+CHANGED_TABLES = TransactionState('changed_tables', set)
+
+_subscribers = []
+
+def subscribe(callback):
+    """Call callback(tables) after every commit that wrote to at least one table"""
+    if callback not in _subscribers:
+        _subscribers.append(callback)
+
+def mark_changed(session, *tables):
+    """Record tables written outside the ORM unit of work (bulk/Core statements)"""
+    CHANGED_TABLES.get(session).update(tables)
+
+def changed_tables(session):
+    """Tables written so far in the session's current transaction"""
+    return frozenset(CHANGED_TABLES.get(session))
+
+def table_names(models_or_tables):
+    """Normalize a mix of model classes and table names to table names"""
+    return {
+        item if isinstance(item, str) else item.__tablename__
+        for item in models_or_tables
+    }
+
+def _after_flush(session, flush_context):
+    changed = CHANGED_TABLES.get(session)
+    for obj in session.new:
+        changed.add(obj.__table__.name)
+    for obj in session.deleted:
+        changed.add(obj.__table__.name)
+    for obj in session.dirty:
+        if session.is_modified(obj, include_collections=False):
+            changed.add(obj.__table__.name)
+
+def _after_commit(session):
+    tables = CHANGED_TABLES.pop(session)
+    if not tables:
+        return
+
+    for callback in list(_subscribers):
+        try:
+            callback(frozenset(tables))
+        except Exception as e:
+            logger.error(f"Change subscriber {callback.__qualname__} failed: {e}")
+
+def register_listeners(session=None):
+    """Track which tables each committed transaction touched"""
+    unit_of_work.register_listeners(
+        [('after_flush', _after_flush), ('after_commit', _after_commit)], states=[CHANGED_TABLES], session=session
+    )
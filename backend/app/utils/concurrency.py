@@ -0,0 +1,127 @@
+from concurrent.futures import ThreadPoolExecutor, wait
+from flask import current_app
+from app import db
+from sqlalchemy import text
+from datetime import datetime
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Section statuses reported alongside fanned-out results
+SECTION_OK = 'ok'
+SECTION_STALE = 'stale'
+SECTION_FAILED = 'failed'
+
+class SectionExecutor:
+    """
+    Runs independent read blocks in parallel on a bounded thread pool.
+    Each block runs in its own app context, so it gets its own session and pooled connection.
+    On PostgreSQL the block's queries are cancelled by the server once they overrun the timeout.
+    """
+
+    def __init__(self, app=None):
+        self.max_workers = 4
+        self.timeout = 10
+        self.stale_max_age = 300
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._last_good = {}  # section name -> (data, as_of, monotonic time)
+        self._in_flight = {}  # section name -> future of a block still running
+        self._in_flight_lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.max_workers = app.config.get('DASHBOARD_MAX_WORKERS', 4)
+        self.timeout = app.config.get('DASHBOARD_SECTION_TIMEOUT', 10)
+        self.stale_max_age = app.config.get('DASHBOARD_STALE_MAX_AGE', 300)
+        app.extensions['section_executor'] = self
+
+    @property
+    def pool(self):
+        # Created on first use so forked workers don't inherit the parent's threads
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(
+                        max_workers=self.max_workers, thread_name_prefix='dashboard-section'
+                    )
+        return self._pool
+
+    @staticmethod
+    def _run_in_app_context(app, func, timeout):
+        # Popping the context removes the thread's scoped session and returns its connection
+        started = time.monotonic()
+        with app.app_context():
+            if db.engine.dialect.name == 'postgresql':
+                # A thread can't be interrupted, so bound the block at the server instead;
+                # is_local scopes the setting to this transaction, not the pooled connection
+                db.session.execute(
+                    text("SELECT set_config('statement_timeout', :timeout, true)"),
+                    {'timeout': str(int(timeout * 1000))}
+                )
+            data = func()
+        return data, round((time.monotonic() - started) * 1000)
+
+    def _submit(self, app, name, func, timeout):
+        """Start a block unless the one from an earlier call is still running, which is returned instead"""
+        with self._in_flight_lock:
+            future = self._in_flight.get(name)
+            if future is not None and not future.done():
+                return future, False
+
+            future = self.pool.submit(self._run_in_app_context, app, func, timeout)
+            self._in_flight[name] = future
+        return future, True
+
+    def _fallback(self, name):
+        """Last good data for a section while it is younger than stale_max_age, else a failure"""
+        last_good = self._last_good.get(name)
+        if last_good and time.monotonic() - last_good[2] <= self.stale_max_age:
+            return {'status': SECTION_STALE, 'data': last_good[0], 'as_of': last_good[1]}
+        return {'status': SECTION_FAILED, 'data': None, 'as_of': None}
+
+    def run(self, sections, timeout=None):
+        """
+        Run {name: callable} concurrently and return {name: result}, where each result is a dict
+        with status, data, as_of and elapsed_ms. A block that raises, overruns the timeout or is still
+        running from an earlier call falls back to its last good data (stale) while that is at most
+        stale_max_age seconds old, or None (failed), without affecting the others.
+        """
+        app = current_app._get_current_object()
+        timeout = timeout or self.timeout
+        started = time.monotonic()
+        futures = {}
+        for name, func in sections.items():
+            future, submitted = self._submit(app, name, func, timeout)
+            if submitted:
+                futures[name] = future
+            else:
+                logger.warning(f"Dashboard section {name} is still running from an earlier request; not resubmitted")
+        done, _ = wait(futures.values(), timeout=timeout)
+        elapsed_ms = round((time.monotonic() - started) * 1000)
+
+        results = {}
+        for name in sections:
+            future = futures.get(name)
+            if future in done and future.exception() is None:
+                data, section_ms = future.result()
+                as_of = datetime.utcnow().isoformat()
+                self._last_good[name] = (data, as_of, time.monotonic())
+                results[name] = {'status': SECTION_OK, 'data': data, 'as_of': as_of, 'elapsed_ms': section_ms}
+                continue
+
+            if future in done:
+                logger.error(f"Dashboard section {name} failed: {future.exception()}")
+            elif future is not None:
+                # The statement timeout ends its queries; until then it keeps its thread
+                logger.error(f"Dashboard section {name} timed out after {elapsed_ms}ms")
+
+            results[name] = self._fallback(name)
+            results[name]['elapsed_ms'] = elapsed_ms if future is not None and future not in done else None
+
+        return results
+
+section_executor = SectionExecutor()
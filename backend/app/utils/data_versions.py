@@ -0,0 +1,164 @@
+from functools import wraps
+from flask import g, request, make_response
+from app import db
+from app.models.data_version import DataVersion
+from app.utils import change_tracking, unit_of_work
+from app.utils.cache import response_cache, RedisCacheBackend
+from app.utils.response import not_modified_response, REVALIDATE_CACHE_CONTROL
+from app.utils.sql import upsert_insert
+from sqlalchemy import select
+import hashlib
+import time
+import uuid
+import logging
+
+logger = logging.getLogger(__name__)
+
+def _decode(value):
+    return value.decode() if isinstance(value, bytes) else value
+
+class DatabaseVersionStore:
+    """
+    Table versions in the data_versions table, incremented inside the committing transaction, so
+    every worker sees a write's new version exactly when it can see the write. The versions live
+    with the data they describe, so the generation never changes.
+    """
+    generation = 'db'
+    transactional = True
+
+    def bump(self, tables, session):
+        statement = upsert_insert(DataVersion.__table__, session.get_bind().dialect.name)
+        statement = statement.on_conflict_do_update(
+            index_elements=['table_name'], set_={'version': DataVersion.version + 1}
+        )
+        # Sorted, so concurrent commits lock the counter rows in the same order
+        session.execute(statement, [{'table_name': table, 'version': 1} for table in tables])
+
+    def get(self, tables):
+        rows = db.session.execute(
+            select(DataVersion.table_name, DataVersion.version).where(DataVersion.table_name.in_(tables))
+        ).all()
+        versions = dict(rows)
+        return self.generation, {table: versions.get(table, 0) for table in tables}
+
+class RedisVersionStore:
+    """Table versions shared by every worker through Redis, bumped once a commit has succeeded"""
+    transactional = False
+
+    def __init__(self, client, prefix='versions'):
+        self.client = client
+        self.prefix = prefix
+        self._generation_key = f"{prefix}:generation"
+
+    def _key(self, table):
+        return f"{self.prefix}:{table}"
+
+    def bump(self, tables, session=None):
+        pipe = self.client.pipeline()
+        for table in tables:
+            pipe.incr(self._key(table))
+        pipe.execute()
+
+    def get(self, tables):
+        # The generation is read with the counters, so a flushed Redis yields new ETags
+        values = self.client.mget([self._generation_key] + [self._key(table) for table in tables])
+        generation = values[0]
+        if generation is None:
+            self.client.set(self._generation_key, uuid.uuid4().hex, nx=True)
+            generation = self.client.get(self._generation_key)
+
+        versions = {table: int(value or 0) for table, value in zip(tables, values[1:])}
+        return _decode(generation), versions
+
+class DataVersions:
+    """Version counter per table, bumped on every commit that writes to it"""
+
+    def __init__(self, app=None):
+        self.store = DatabaseVersionStore()
+        self.max_age = 300
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        # Share the response cache's Redis when there is one; otherwise every worker reads the database
+        backend = response_cache.backend
+        if isinstance(backend, RedisCacheBackend):
+            self.store = RedisVersionStore(backend.client, f"{backend.prefix}-versions")
+        else:
+            self.store = DatabaseVersionStore()
+        self.max_age = app.config.get('ETAG_MAX_AGE', 300)
+        app.extensions['data_versions'] = self
+
+        change_tracking.subscribe(self.bump)
+        # PUBLISH stage: after the snapshot, rollup and index writes made at commit
+        unit_of_work.register_listeners(before_commit=self._bump_in_transaction, stage=unit_of_work.PUBLISH)
+
+    def bump(self, tables):
+        if self.store.transactional:
+            return
+        try:
+            self.store.bump(sorted(tables))
+        except Exception as e:
+            logger.error(f"Failed to bump data versions for {sorted(tables)}: {e}")
+
+    def _bump_in_transaction(self, session):
+        if not self.store.transactional:
+            return
+        session.flush()
+        tables = change_tracking.changed_tables(session)
+        if tables:
+            self.store.bump(sorted(tables), session)
+
+    def get(self, tables):
+        """Return (generation, {table: version})"""
+        return self.store.get(sorted(tables))
+
+    def etag(self, tables, *parts):
+        """Strong ETag for a response that depends only on the given tables and request parts"""
+        generation, versions = self.get(tables)
+        # Figures that drift with the clock (overdue counts, current month) change without a commit,
+        # so an ETag is only honoured within one max_age window
+        window = int(time.time() // self.max_age) if self.max_age else 0
+        fingerprint = '|'.join(
+            [generation, str(window), *map(str, parts)] +
+            [f"{table}={version}" for table, version in versions.items()]
+        )
+        return hashlib.sha1(fingerprint.encode()).hexdigest()
+
+    def conditional(self, depends_on):
+        """
+        Decorator answering If-None-Match with 304 before the view runs.
+        Must be applied inside role_required (the ETag varies by role) and outside response_cache.cached.
+        """
+        tables = change_tracking.table_names(depends_on)
+
+        def decorator(f):
+            @wraps(f)
+            def decorated_function(*args, **kwargs):
+                try:
+                    etag = self.etag(tables, response_cache.make_key(request.endpoint))
+                except Exception as e:
+                    logger.error(f"Could not compute ETag for {request.endpoint}: {e}")
+                    return f(*args, **kwargs)
+
+                if request.if_none_match.contains(etag):
+                    return not_modified_response(etag)
+
+                # success_response picks this up so the body isn't hashed again
+                g.etag = etag
+                response = make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+                if 'no-store' in response.headers.get('Cache-Control', ''):
+                    # Partial results must not be revalidated as if they were complete
+                    response.headers.pop('ETag', None)
+                    return response
+
+                # Also covers response cache hits, which bypass success_response
+                response.set_etag(etag)
+                response.headers['Cache-Control'] = REVALIDATE_CACHE_CONTROL
+                return response
+            return decorated_function
+        return decorator
+
+data_versions = DataVersions()
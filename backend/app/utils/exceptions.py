@@ -20,3 +20,10 @@ class ResourceNotFoundError(Exception):
         else:
             self.message = f"{resource_type} not found"
         super().__init__(self.message)
+
+class TooManyRequestsError(Exception):
+    """Request refused until retry_after seconds have passed"""
+    def __init__(self, message="Too many requests", retry_after=1):
+        self.message = message
+        self.retry_after = retry_after
+        super().__init__(self.message)
@@ -0,0 +1,57 @@
+from app import db
+from app.models import Escalation, ResourceResignation
+from app.utils import change_tracking, unit_of_work
+from app.utils.sql import month_bucket, month_bucket_of
+from sqlalchemy import or_
+import logging
+
+logger = logging.getLogger(__name__)
+
+# (model, dated column, stored yyyymm bucket column) for each dated fact table grouped by month.
+# Financials and bench costing are already keyed by a first-of-month month_year.
+MONTH_BUCKETS = (
+    (Escalation, 'raised_date', 'raised_month'),
+    (ResourceResignation, 'date_of_resignation', 'resignation_month')
+)
+
+def _source_value(obj, source):
+    value = getattr(obj, source)
+    if value is None:
+        # Column defaults (e.g. raised_date=utcnow) only run after before_flush, so apply them here
+        default = obj.__table__.c[source].default
+        if default is not None and default.is_callable:
+            value = default.arg(None)
+            setattr(obj, source, value)
+    return value
+
+def _before_flush(session, flush_context, instances):
+    for obj in list(session.new) + list(session.dirty):
+        for model, source, target in MONTH_BUCKETS:
+            if isinstance(obj, model):
+                bucket = month_bucket(_source_value(obj, source))
+                if getattr(obj, target) != bucket:
+                    setattr(obj, target, bucket)
+
+def register_listeners(session=None):
+    """Keep the stored month buckets in step with their dates on every ORM write"""
+    unit_of_work.register_listeners(before_flush=_before_flush, stage=unit_of_work.DERIVE, session=session)
+
+def backfill(overwrite=False):
+    """Fill bucket columns for rows written outside the ORM (SQL loads, pre-existing data); returns {table: rows}"""
+    updated = {}
+    for model, source, target in MONTH_BUCKETS:
+        query = db.session.query(model)
+        if not overwrite:
+            query = query.filter(or_(
+                getattr(model, target).is_(None),
+                getattr(model, target) != month_bucket_of(getattr(model, source))
+            ))
+        updated[model.__tablename__] = query.update(
+            {target: month_bucket_of(getattr(model, source))}, synchronize_session=False
+        )
+        if updated[model.__tablename__]:
+            change_tracking.mark_changed(db.session, model.__tablename__)
+
+    db.session.commit()
+    logger.info(f"Backfilled month buckets: {updated}")
+    return updated
@@ -0,0 +1,20 @@
+from app.utils.exceptions import ValidationError
+from datetime import datetime, date
+import base64
+import json
+
+def encode_cursor(*values):
+    """Opaque, URL-safe cursor holding the sort key of the last row on a page"""
+    payload = [value.isoformat() if isinstance(value, (datetime, date)) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip('=')
+
+def decode_cursor(cursor, size):
+    """Return the list of values in a cursor from encode_cursor, or raise ValidationError"""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (ValueError, TypeError):
+        raise ValidationError('cursor is invalid', 'cursor')
+
+    if not isinstance(values, list) or len(values) != size:
+        raise ValidationError('cursor is invalid', 'cursor')
+    return values
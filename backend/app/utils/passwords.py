@@ -0,0 +1,82 @@
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.security import generate_password_hash, check_password_hash
+from app.utils.exceptions import TooManyRequestsError
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Werkzeug method string per algorithm for a given cost (pbkdf2 iterations, scrypt N)
+HASH_METHODS = {
+    'pbkdf2': lambda cost: f"pbkdf2:sha256:{cost}",
+    'scrypt': lambda cost: f"scrypt:{cost}:8:1"
+}
+DEFAULT_COSTS = {'pbkdf2': 600000, 'scrypt': 32768}
+
+class PasswordHasher:
+    """
+    Hashes and verifies passwords on a bounded worker pool. hashlib's pbkdf2 and scrypt release
+    the GIL, so the pool uses several cores while request threads only wait on the result. At most
+    max_pending hashes are queued or running; beyond that a caller waits up to timeout for a slot
+    and is then refused, so a login burst cannot queue unbounded CPU work.
+    """
+
+    def __init__(self, app=None):
+        self.algorithm = 'pbkdf2'
+        self.cost = DEFAULT_COSTS['pbkdf2']
+        self.max_workers = 4
+        self.timeout = 10
+        self._slots = threading.BoundedSemaphore(32)
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.algorithm = app.config.get('PASSWORD_HASH_ALGORITHM', 'pbkdf2')
+        if self.algorithm not in HASH_METHODS:
+            raise ValueError(f"Unknown PASSWORD_HASH_ALGORITHM: {self.algorithm}")
+        self.cost = app.config.get('PASSWORD_HASH_COST') or DEFAULT_COSTS[self.algorithm]
+        self.max_workers = app.config.get('PASSWORD_HASH_WORKERS', 4)
+        self.timeout = app.config.get('PASSWORD_HASH_TIMEOUT', 10)
+        self._slots = threading.BoundedSemaphore(app.config.get('PASSWORD_HASH_MAX_PENDING', 32))
+        app.extensions['password_hasher'] = self
+
+    @property
+    def method(self):
+        return HASH_METHODS[self.algorithm](self.cost)
+
+    @property
+    def pool(self):
+        # Created on first use so forked workers don't inherit the parent's threads
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='password-hash')
+        return self._pool
+
+    def hash(self, password):
+        """Hash with the configured algorithm and cost"""
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, password_hash, password):
+        """Check a password against any hash werkzeug understands, whatever its algorithm or cost"""
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """True when a stored hash was made with another algorithm or cost than the configured one"""
+        return password_hash.split('$', 1)[0] != self.method
+
+    def _run(self, func, *args):
+        if not self._slots.acquire(timeout=self.timeout):
+            logger.warning("Password hashing pool is saturated; refusing request")
+            raise TooManyRequestsError('Too many concurrent logins, please retry', retry_after=1)
+        try:
+            future = self.pool.submit(func, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future.result()
+
+password_hasher = PasswordHasher()
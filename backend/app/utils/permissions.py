@@ -0,0 +1,188 @@
+from app import db
+from app.models.role_permission import RolePermission
+from app.utils import change_tracking
+from app.utils.data_versions import data_versions
+from types import MappingProxyType
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# The permission table the store is seeded with, and the fallback while it is unreadable
+DEFAULT_PERMISSIONS = {
+    'leadership': {
+        'users': {'read': True, 'write': True, 'delete': True},
+        'resources': {'read': True, 'write': True, 'delete': True},
+        'projects': {'read': True, 'write': True, 'delete': True},
+        'financials': {'read': True, 'write': True, 'delete': True},
+        'escalations': {'read': True, 'write': True, 'delete': True},
+        'kpis': {'read': True, 'write': False, 'delete': False},
+        'settings': {'read': True, 'write': True, 'delete': True}
+    },
+    'finance_head': {
+        'users': {'read': True, 'write': False, 'delete': False},
+        'resources': {'read': True, 'write': False, 'delete': False},
+        'projects': {'read': True, 'write': True, 'delete': False},
+        'financials': {'read': True, 'write': True, 'delete': True},
+        'escalations': {'read': True, 'write': False, 'delete': False},
+        'kpis': {'read': True, 'write': False, 'delete': False},
+        'settings': {'read': False, 'write': False, 'delete': False}
+    },
+    'delivery_owner': {
+        'users': {'read': True, 'write': False, 'delete': False},
+        'resources': {'read': True, 'write': True, 'delete': False},
+        'projects': {'read': True, 'write': True, 'delete': False},
+        'financials': {'read': True, 'write': False, 'delete': False},
+        'escalations': {'read': True, 'write': True, 'delete': True},
+        'kpis': {'read': True, 'write': False, 'delete': False},
+        'settings': {'read': False, 'write': False, 'delete': False}
+    },
+    'resource_manager': {
+        'users': {'read': True, 'write': False, 'delete': False},
+        'resources': {'read': True, 'write': True, 'delete': True},
+        'projects': {'read': True, 'write': False, 'delete': False},
+        'financials': {'read': False, 'write': False, 'delete': False},
+        'escalations': {'read': True, 'write': False, 'delete': False},
+        'kpis': {'read': True, 'write': False, 'delete': False},
+        'settings': {'read': False, 'write': False, 'delete': False}
+    },
+    'hr': {
+        'users': {'read': True, 'write': True, 'delete': True},
+        'resources': {'read': True, 'write': True, 'delete': False},
+        'projects': {'read': True, 'write': False, 'delete': False},
+        'financials': {'read': False, 'write': False, 'delete': False},
+        'escalations': {'read': True, 'write': False, 'delete': False},
+        'kpis': {'read': True, 'write': False, 'delete': False},
+        'settings': {'read': False, 'write': False, 'delete': False}
+    },
+    'employee': {
+        'users': {'read': False, 'write': False, 'delete': False},
+        'resources': {'read': True, 'write': False, 'delete': False},
+        'projects': {'read': True, 'write': False, 'delete': False},
+        'financials': {'read': False, 'write': False, 'delete': False},
+        'escalations': {'read': True, 'write': False, 'delete': False},
+        'kpis': {'read': True, 'write': False, 'delete': False},
+        'settings': {'read': False, 'write': False, 'delete': False}
+    }
+}
+
+ROLES = tuple(DEFAULT_PERMISSIONS)
+RESOURCES = ('users', 'resources', 'projects', 'financials', 'escalations', 'kpis', 'settings')
+ACTIONS = ('read', 'write', 'delete')
+
+# One bit per (resource, action); a role's permissions are the OR of its bits
+PERMISSION_BITS = MappingProxyType({
+    (resource, action): 1 << (index * len(ACTIONS) + offset)
+    for index, resource in enumerate(RESOURCES)
+    for offset, action in enumerate(ACTIONS)
+})
+
+def default_grants():
+    """(role, resource, action) for every action DEFAULT_PERMISSIONS allows"""
+    return [
+        (role, resource, action)
+        for role, resources in DEFAULT_PERMISSIONS.items()
+        for resource, actions in resources.items()
+        for action, allowed in actions.items() if allowed
+    ]
+
+class PermissionMatrix:
+    """Immutable role -> bitmask table; a check is one dict lookup and one AND"""
+    __slots__ = ('_masks',)
+
+    def __init__(self, grants):
+        masks = {}
+        for role, resource, action in grants:
+            bit = PERMISSION_BITS.get((resource, action))
+            if bit is None:
+                logger.warning(f"Ignoring unknown permission {action} on {resource} for {role}")
+                continue
+            masks[role] = masks.get(role, 0) | bit
+        object.__setattr__(self, '_masks', MappingProxyType(masks))
+
+    def __setattr__(self, name, value):
+        raise AttributeError('PermissionMatrix is immutable')
+
+    def allows(self, role, resource, action):
+        return bool(self._masks.get(role, 0) & PERMISSION_BITS.get((resource, action), 0))
+
+    def mask(self, role):
+        return self._masks.get(role, 0)
+
+    def as_dict(self, role):
+        """The role's permissions in the nested {resource: {action: bool}} shape clients use"""
+        mask = self.mask(role)
+        return {
+            resource: {action: bool(mask & PERMISSION_BITS[(resource, action)]) for action in ACTIONS}
+            for resource in RESOURCES
+        }
+
+    @property
+    def roles(self):
+        return tuple(dict.fromkeys(ROLES + tuple(self._masks)))
+
+class PermissionStore:
+    """
+    The role_permissions table compiled into a PermissionMatrix. The compiled matrix is swapped
+    whole when the table's data version moves, when this worker commits to it, or at least every
+    refresh_seconds, so permission changes apply without a deploy.
+    """
+
+    def __init__(self, app=None):
+        self.refresh_seconds = 30
+        self._matrix = PermissionMatrix(default_grants())
+        self._version = None
+        self._loaded_at = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.refresh_seconds = app.config.get('PERMISSIONS_REFRESH_SECONDS', 30)
+        app.extensions['permission_store'] = self
+        change_tracking.subscribe(self._on_commit)
+
+    @property
+    def matrix(self):
+        self._refresh_if_stale()
+        return self._matrix
+
+    def allows(self, role, resource, action):
+        return self.matrix.allows(role, resource, action)
+
+    def reload(self, version=None):
+        """Compile the stored permissions; an empty store means the defaults"""
+        grants = db.session.query(RolePermission.role, RolePermission.resource, RolePermission.action).all()
+        matrix = PermissionMatrix(grants or default_grants())
+        with self._lock:
+            self._matrix = matrix
+            self._version = version
+            self._loaded_at = time.monotonic()
+        return matrix
+
+    def _on_commit(self, tables):
+        if RolePermission.__tablename__ in tables:
+            self._loaded_at = None
+
+    def _refresh_if_stale(self):
+        try:
+            version = data_versions.get((RolePermission.__tablename__,))
+        except Exception as e:
+            logger.error(f"Could not read the role_permissions table version: {e}")
+            version = None
+
+        if (
+            self._loaded_at is not None and version == self._version and
+            time.monotonic() - self._loaded_at < self.refresh_seconds
+        ):
+            return
+
+        try:
+            self.reload(version)
+        except Exception as e:
+            # Keep checking against the last compiled matrix rather than failing every request
+            logger.error(f"Error reloading role permissions: {e}")
+            self._loaded_at = time.monotonic()
+
+permission_store = PermissionStore()
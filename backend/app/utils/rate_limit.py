@@ -0,0 +1,234 @@
+from functools import wraps
+from flask import g, request, jsonify
+from app import db
+import math
+import threading
+import time
+import logging
+
+try:
+    import redis
+except ImportError:  # Only needed for the redis backend
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+def parse_limit(spec):
+    """'30/60' -> (capacity 30, refill 0.5 tokens per second); empty or '0' means unlimited"""
+    if not spec or str(spec).strip() in ('0', 'none', 'off'):
+        return None
+    try:
+        count, _, seconds = str(spec).partition('/')
+        capacity, period = int(count), float(seconds or 1)
+    except ValueError:
+        raise ValueError(f"Invalid rate limit {spec!r}; expected '<requests>/<seconds>'")
+    if capacity <= 0 or period <= 0:
+        return None
+    return capacity, capacity / period
+
+class MemoryBucketBackend:
+    """Token buckets for a single worker; each bucket is (tokens, last refill time, time it is full again)"""
+
+    def __init__(self, max_buckets=10000):
+        self.max_buckets = max_buckets
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def take(self, key, capacity, rate, cost=1):
+        """
+        Take cost tokens; returns 0 when allowed, else the seconds until enough have refilled.
+        A negative cost refunds tokens, up to the bucket's capacity.
+        """
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated, _ = self._buckets.get(key, (capacity, now, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            wait = 0
+            if tokens >= cost:
+                tokens = min(capacity, tokens - cost)
+            else:
+                wait = (cost - tokens) / rate
+            self._buckets[key] = (tokens, now, now + (capacity - tokens) / rate)
+
+            if len(self._buckets) > self.max_buckets:
+                # A bucket that has refilled is the same as a missing one
+                for stale in [name for name, bucket in self._buckets.items() if bucket[2] <= now]:
+                    del self._buckets[stale]
+        return wait
+
+    def reset(self, key):
+        with self._lock:
+            self._buckets.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+# Refill and take in one round trip so workers sharing a bucket cannot both spend the last token
+TAKE_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local now = redis.call('TIME')
+now = tonumber(now[1]) + tonumber(now[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(bucket[1]) or capacity
+local updated = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+local wait = 0
+if tokens >= cost then
+    tokens = math.min(capacity, tokens - cost)
+else
+    wait = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return tostring(wait)
+"""
+
+
+class RedisBucketBackend:
+    """Token buckets shared by every worker using the same Redis"""
+
+    def __init__(self, client, prefix='ratelimit'):
+        self.client = client
+        self.prefix = prefix
+        self._take = client.register_script(TAKE_SCRIPT)
+
+    def take(self, key, capacity, rate, cost=1):
+        return float(self._take(keys=[f"{self.prefix}:{key}"], args=[capacity, rate, cost]))
+
+    def reset(self, key):
+        self.client.delete(f"{self.prefix}:{key}")
+
+    def clear(self):
+        keys = list(self.client.scan_iter(f"{self.prefix}:*"))
+        if keys:
+            self.client.delete(*keys)
+
+class RateLimiter:
+    """
+    Token-bucket limits for expensive read endpoints. Each route class has a bucket per user and
+    one shared by all users; a request takes a token from both. Requests over either limit, or
+    arriving while the connection pool is nearly exhausted, are refused with 429 and Retry-After
+    before the view runs any query.
+
+    Not built on flask-limiter: its limits backends offer fixed and moving windows only, not a
+    continuously refilling bucket with an exact Retry-After, and the moving window keeps one Redis
+    entry per request where a bucket keeps two fields. It is also only in requirements-prod.txt,
+    so development and test installs would run without limits.
+    """
+
+    def __init__(self, app=None):
+        self.backend = None
+        self.limits = {}
+        self.shed_pool_utilization = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.limits = {
+            route_class: {scope: parse_limit(spec) for scope, spec in scopes.items()}
+            for route_class, scopes in app.config.get('RATE_LIMITS', {}).items()
+        }
+        self.shed_pool_utilization = app.config.get('LOAD_SHED_POOL_UTILIZATION')
+        self.backend = self._create_backend(app.config)
+        app.extensions['rate_limiter'] = self
+
+    @staticmethod
+    def _create_backend(config):
+        backend = config.get('RATE_LIMIT_BACKEND', 'memory')
+        if backend == 'none':
+            return None
+        if backend == 'memory':
+            return MemoryBucketBackend()
+        if backend == 'redis':
+            if redis is None:
+                raise RuntimeError("RATE_LIMIT_BACKEND=redis requires the redis package")
+            return RedisBucketBackend(
+                redis.Redis.from_url(config.get('RATE_LIMIT_REDIS_URL') or config['CACHE_REDIS_URL']),
+                config.get('RATE_LIMIT_KEY_PREFIX', 'ratelimit')
+            )
+        raise ValueError(f"Unknown RATE_LIMIT_BACKEND: {backend}")
+
+    def check(self, route_class):
+        """Seconds the caller should wait before retrying, or 0 if the request may proceed"""
+        if self.backend is None:
+            return 0
+
+        if self._pool_saturated():
+            return 1
+
+        limits = self.limits.get(route_class, {})
+        current_user = g.get('current_user')
+        caller = f"user:{current_user.id}" if current_user else f"ip:{request.remote_addr}"
+
+        try:
+            # The caller's own bucket first, so one client looping does not drain the shared bucket
+            for key, limit in ((f"{route_class}:{caller}", limits.get('user')), (route_class, limits.get('total'))):
+                if limit is None:
+                    continue
+                wait = self.backend.take(key, *limit)
+                if wait > 0:
+                    return wait
+        except Exception as e:
+            # A broken shared backend must not take the endpoints down with it
+            logger.error(f"Rate limit check failed for {route_class}: {e}")
+        return 0
+
+    def take(self, route_class, scope, key, cost=1):
+        """Take a token from one caller-keyed bucket, e.g. login attempts per IP; returns the wait"""
+        limit = self.limits.get(route_class, {}).get(scope)
+        if self.backend is None or limit is None:
+            return 0
+        try:
+            return self.backend.take(f"{route_class}:{scope}:{key}", *limit, cost)
+        except Exception as e:
+            logger.error(f"Rate limit check failed for {route_class} {scope}: {e}")
+            return 0
+
+    def refund(self, route_class, scope, key):
+        """Give back a token taken with take(), e.g. once a reserved login attempt succeeds"""
+        self.take(route_class, scope, key, cost=-1)
+
+    def reset(self, route_class, scope, key):
+        """Refill a bucket taken from with take(), e.g. after a successful login"""
+        if self.backend is None:
+            return
+        try:
+            self.backend.reset(f"{route_class}:{scope}:{key}")
+        except Exception as e:
+            logger.error(f"Rate limit reset failed for {route_class} {scope}: {e}")
+
+    def _pool_saturated(self):
+        if not self.shed_pool_utilization:
+            return False
+        pool = db.engine.pool
+        try:
+            capacity = pool.size() + max(getattr(pool, '_max_overflow', 0), 0)
+            return capacity > 0 and pool.checkedout() >= capacity * self.shed_pool_utilization
+        except (AttributeError, TypeError):
+            # Pools without a fixed size (e.g. SQLite's) are never considered saturated
+            return False
+
+    def limit(self, route_class):
+        """
+        Decorator applying a route class's limits. Must be applied inside role_required so the
+        caller is known, and outside data_versions.conditional and response_cache.cached so a
+        refused request never reaches the database or the cache.
+        """
+        def decorator(f):
+            @wraps(f)
+            def decorated_function(*args, **kwargs):
+                wait = self.check(route_class)
+                if wait > 0:
+                    retry_after = max(1, math.ceil(wait))
+                    response = jsonify({'error': 'Too many requests', 'retry_after': retry_after})
+                    response.status_code = 429
+                    response.headers['Retry-After'] = str(retry_after)
+                    return response
+                return f(*args, **kwargs)
+            return decorated_function
+        return decorator
+
+rate_limiter = RateLimiter()
@@ -1,5 +1,33 @@
 
-from flask import jsonify
+from flask import jsonify, request, g, current_app
+import hashlib
+import math
+
+# Browsers may store the response but must revalidate it (If-None-Match) before reuse
+REVALIDATE_CACHE_CONTROL = 'private, no-cache'
+
+def not_modified_response(etag):
+    """Generate an empty 304 response for a matching If-None-Match"""
+    response = current_app.response_class(status=304)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = REVALIDATE_CACHE_CONTROL
+    return response
+
+def conditional_response(response):
+    """
+    Tag a successful GET response with an ETag and answer a matching If-None-Match with 304.
+    Uses the version-based ETag set by data_versions.conditional when present, else hashes the body.
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return response
+    
+    etag = g.get('etag') or hashlib.sha1(response.get_data()).hexdigest()
+    if request.if_none_match.contains(etag):
+        return not_modified_response(etag)
+    
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = REVALIDATE_CACHE_CONTROL
+    return response
 
 def success_response(data=None, message="Success", status_code=200):
     """Generate standardized success response"""
@@ -11,6 +39,8 @@ def success_response(data=None, message="Success", status_code=200):
     if data is not None:
         response['data'] = data
     
+    if status_code == 200:
+        return conditional_response(jsonify(response))
     return jsonify(response), status_code
 
 def error_response(message="Error occurred", status_code=400, errors=None):
@@ -25,9 +55,15 @@ def error_response(message="Error occurred", status_code=400, errors=None):
     
     return jsonify(response), status_code
 
+def retry_later_response(message, retry_after):
+    """Generate a 429 error response telling the client when to retry"""
+    response, status_code = error_response(message, 429)
+    response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+    return response, status_code
+
 def paginated_response(data, page, per_page, total, message="Success"):
     """Generate paginated response"""
-    return jsonify({
+    return conditional_response(jsonify({
         'success': True,
         'message': message,
         'data': data,
@@ -37,4 +73,17 @@ def paginated_response(data, page, per_page, total, message="Success"):
             'total': total,
             'pages': (total + per_page - 1) // per_page
         }
-    })
+    }))
+
+def cursor_paginated_response(data, next_cursor, limit, message="Success"):
+    """Generate keyset-paginated response; pass next_cursor back as ?cursor= for the following page"""
+    return conditional_response(jsonify({
+        'success': True,
+        'message': message,
+        'data': data,
+        'pagination': {
+            'limit': limit,
+            'next_cursor': next_cursor,
+            'has_more': next_cursor is not None
+        }
+    }))
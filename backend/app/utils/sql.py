@@ -0,0 +1,68 @@
+from sqlalchemy import func, case, Float, Integer
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import FunctionElement
+
+def count_where(condition):
+    """Conditional COUNT(*) that works on every dialect we run against"""
+    return func.count(case((condition, 1)))
+
+# Dialects with INSERT ... ON CONFLICT DO UPDATE
+UPSERT_INSERTS = {'postgresql': postgresql.insert, 'sqlite': sqlite.insert}
+
+def upsert_insert(table, dialect_name):
+    """INSERT for `table` supporting on_conflict_do_update on the given dialect"""
+    if dialect_name not in UPSERT_INSERTS:
+        raise RuntimeError(f"Upserts are not supported on {dialect_name}")
+    return UPSERT_INSERTS[dialect_name](table)
+
+def month_bucket(value):
+    """yyyymm integer for a date or datetime (2024-05-17 -> 202405); None passes through"""
+    if value is None:
+        return None
+    return value.year * 100 + value.month
+
+def shift_month_bucket(bucket, months):
+    """Bucket `months` later (negative for earlier)"""
+    year, month = divmod(bucket // 100 * 12 + bucket % 100 - 1 + months, 12)
+    return year * 100 + month + 1
+
+class hours_between(FunctionElement):
+    """Hours from start to end as a float, e.g. hours_between(Escalation.raised_date, Escalation.resolved_date)"""
+    type = Float()
+    inherit_cache = True
+    name = 'hours_between'
+
+    def __init__(self, start, end):
+        super().__init__(start, end)
+
+@compiles(hours_between)
+def _hours_between_default(element, compiler, **kw):
+    start, end = list(element.clauses)
+    return f"TIMESTAMPDIFF(SECOND, {compiler.process(start, **kw)}, {compiler.process(end, **kw)}) / 3600.0"
+
+@compiles(hours_between, 'postgresql')
+def _hours_between_postgresql(element, compiler, **kw):
+    start, end = list(element.clauses)
+    return f"EXTRACT(EPOCH FROM ({compiler.process(end, **kw)} - {compiler.process(start, **kw)})) / 3600.0"
+
+@compiles(hours_between, 'sqlite')
+def _hours_between_sqlite(element, compiler, **kw):
+    start, end = list(element.clauses)
+    return f"(julianday({compiler.process(end, **kw)}) - julianday({compiler.process(start, **kw)})) * 24.0"
+
+class month_bucket_of(FunctionElement):
+    """SQL counterpart of month_bucket(), used to backfill stored bucket columns"""
+    type = Integer()
+    inherit_cache = True
+    name = 'month_bucket_of'
+
+@compiles(month_bucket_of)
+def _month_bucket_of_default(element, compiler, **kw):
+    value = compiler.process(list(element.clauses)[0], **kw)
+    return f"CAST(EXTRACT(YEAR FROM {value}) * 100 + EXTRACT(MONTH FROM {value}) AS INTEGER)"
+
+@compiles(month_bucket_of, 'sqlite')
+def _month_bucket_of_sqlite(element, compiler, **kw):
+    value = compiler.process(list(element.clauses)[0], **kw)
+    return f"CAST(strftime('%Y%m', {value}) AS INTEGER)"
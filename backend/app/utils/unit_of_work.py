@@ -0,0 +1,103 @@
+from app import db
+from sqlalchemy import event, inspect, select
+
+# Stages of the before_flush and before_commit hooks. Every hook of a stage runs before any hook of
+# the next, whatever order the services registered in: columns derived from others (month buckets,
+# SLA state) are settled before the listeners that fold rows into deltas read them, and every delta
+# is written before anything that publishes the transaction's changes (data versions).
+DERIVE = 0
+FOLD = 1
+PUBLISH = 2
+
+_hooks = {'before_flush': [], 'before_commit': []}  # event -> [(stage, hook)], in stage then registration order
+_transaction_states = []
+
+class TransactionState:
+    """
+    A value kept in session.info for the current transaction, such as a pending delta or a set of
+    ids to process at commit. It is created on first use and dropped when the transaction rolls back.
+    """
+
+    def __init__(self, key, factory):
+        self.key = key
+        self.factory = factory
+
+    def get(self, session):
+        return session.info.setdefault(self.key, self.factory())
+
+    def pop(self, session):
+        return session.info.pop(self.key, None)
+
+def _before_flush(session, flush_context, instances):
+    for _, hook in list(_hooks['before_flush']):
+        hook(session, flush_context, instances)
+
+def _before_commit(session):
+    for _, hook in list(_hooks['before_commit']):
+        hook(session)
+
+def _after_rollback(session):
+    for state in _transaction_states:
+        state.pop(session)
+
+def _add_hook(name, hook, stage):
+    hooks = _hooks[name]
+    if all(existing != hook for _, existing in hooks):
+        hooks.append((stage, hook))
+        hooks.sort(key=lambda entry: entry[0])
+
+def register_listeners(listeners=(), before_flush=None, before_commit=None, stage=FOLD, states=(), session=None):
+    """
+    Attach (event name, listener) pairs to a session once. before_flush and before_commit hooks run
+    at their stage through one shared session listener per event, and the given TransactionStates
+    are dropped on rollback.
+    """
+    session = session or db.session
+    listeners = list(listeners)
+    for name, hook, dispatcher in (
+        ('before_flush', before_flush, _before_flush),
+        ('before_commit', before_commit, _before_commit)
+    ):
+        if hook is not None:
+            _add_hook(name, hook, stage)
+            listeners.append((name, dispatcher))
+    for state in states:
+        if state not in _transaction_states:
+            _transaction_states.append(state)
+    if states:
+        listeners.append(('after_rollback', _after_rollback))
+
+    for name, listener in listeners:
+        if not event.contains(session, name, listener):
+            event.listen(session, name, listener)
+
+def committed_getter(obj):
+    """
+    Read the value an attribute had before the changes being flushed. An attribute assigned while
+    expired (as every attribute is after a commit) keeps no old value in its history, so for those
+    the row as last flushed is loaded from the database.
+    """
+    state = inspect(obj)
+    flushed = {}
+
+    def get(key):
+        history = state.attrs[key].history
+        if history.deleted:
+            return history.deleted[0]
+        if history.added and state.has_identity:
+            if not flushed:
+                flushed.update(_flushed_row(state))
+            return flushed[key]
+        return getattr(obj, key)
+    return get
+
+def _flushed_row(state):
+    """Column values of a persistent object's row as the database holds them in this transaction"""
+    mapper = state.mapper
+    columns = {prop.key: prop.columns[0] for prop in mapper.column_attrs}
+    identity = zip(mapper.primary_key, state.identity)
+    with state.session.no_autoflush:
+        row = state.session.execute(
+            select(*columns.values()).where(*(column == value for column, value in identity))
+        ).one()
+    return dict(zip(columns, row))
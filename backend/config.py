@@ -18,6 +18,10 @@ class Config:
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'your-secret-key-change-in-production')
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=24)
     JWT_ALGORITHM = 'HS256'
+    # Requests are authorized from token claims; deactivations and revocations are reloaded when
+    # the users table changes, and at least this often to pick up other workers' writes
+    AUTH_REVOCATION_REFRESH_SECONDS = int(os.getenv('AUTH_REVOCATION_REFRESH_SECONDS', 30))
+    PERMISSIONS_REFRESH_SECONDS = int(os.getenv('PERMISSIONS_REFRESH_SECONDS', 30))
     
     # CORS configuration
     CORS_ORIGINS = os.getenv('CORS_ORIGINS', 'http://localhost:5173,http://localhost:3000').split(',')
@@ -25,6 +29,86 @@ class Config:
     # Security
     SECRET_KEY = os.getenv('SECRET_KEY', 'your-secret-key-change-in-production')
     
+    # KPI snapshot: how often clock-dependent figures (overdue, current month) are refreshed
+    KPI_SNAPSHOT_REFRESH_SECONDS = int(os.getenv('KPI_SNAPSHOT_REFRESH_SECONDS', 300))
+    
+    # Response cache: memory (single node), redis (multi-worker), local-redis (tests) or none
+    CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'memory')
+    CACHE_REDIS_URL = os.getenv('CACHE_REDIS_URL', 'redis://localhost:6379/0')
+    CACHE_KEY_PREFIX = 'it-delivery-cache'
+    CACHE_DEFAULT_TTL = int(os.getenv('CACHE_DEFAULT_TTL', 60))
+    CACHE_MAX_ENTRIES = int(os.getenv('CACHE_MAX_ENTRIES', 1024))
+    
+    # Longest time a version-based ETag stays valid without any write to its tables
+    ETAG_MAX_AGE = int(os.getenv('ETAG_MAX_AGE', 300))
+    
+    # Dashboard fan-out: worker threads shared by all requests (each holds one pooled connection
+    # while running, so keep this below pool_size) and the per-request wait for slow sections
+    DASHBOARD_MAX_WORKERS = int(os.getenv('DASHBOARD_MAX_WORKERS', 4))
+    DASHBOARD_SECTION_TIMEOUT = float(os.getenv('DASHBOARD_SECTION_TIMEOUT', 10))
+    DASHBOARD_STALE_MAX_AGE = int(os.getenv('DASHBOARD_STALE_MAX_AGE', 300))
+    
+    # Password hashing: pbkdf2 (cost = iterations, default 600000) or scrypt (cost = N, default 32768).
+    # Hashes run on a pool of PASSWORD_HASH_WORKERS threads with at most PASSWORD_HASH_MAX_PENDING
+    # queued; stored hashes are upgraded to the configured algorithm and cost on the next login
+    PASSWORD_HASH_ALGORITHM = os.getenv('PASSWORD_HASH_ALGORITHM', 'pbkdf2')
+    PASSWORD_HASH_COST = int(os.getenv('PASSWORD_HASH_COST') or 0) or None
+    PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', 4))
+    PASSWORD_HASH_MAX_PENDING = int(os.getenv('PASSWORD_HASH_MAX_PENDING', 32))
+    PASSWORD_HASH_TIMEOUT = float(os.getenv('PASSWORD_HASH_TIMEOUT', 10))
+    
+    # Rate limits for expensive reads, as '<requests>/<seconds>' token buckets per user and for all
+    # users of a route class ('0' turns one off). Backend: memory (single node), redis (shared by
+    # workers) or none. Limited routes are also shed while LOAD_SHED_POOL_UTILIZATION of the
+    # connection pool (pool_size + max_overflow) is checked out
+    RATE_LIMIT_BACKEND = os.getenv('RATE_LIMIT_BACKEND', 'memory')
+    RATE_LIMIT_REDIS_URL = os.getenv('RATE_LIMIT_REDIS_URL')
+    RATE_LIMIT_KEY_PREFIX = 'it-delivery-ratelimit'
+    RATE_LIMITS = {
+        'dashboard': {
+            'user': os.getenv('RATE_LIMIT_DASHBOARD_USER', '10/60'),
+            'total': os.getenv('RATE_LIMIT_DASHBOARD_TOTAL', '120/60')
+        },
+        'listing': {
+            'user': os.getenv('RATE_LIMIT_LISTING_USER', '30/60'),
+            'total': os.getenv('RATE_LIMIT_LISTING_TOTAL', '300/60')
+        },
+        # Failed logins per account and client IP, per account across IPs, and per IP across accounts.
+        # Each attempt reserves a token before the password is hashed; a success gives them back
+        'login': {
+            'account_ip': os.getenv('LOGIN_ATTEMPT_LIMIT', '5/300'),
+            'account': os.getenv('LOGIN_ACCOUNT_ATTEMPT_LIMIT', '50/900'),
+            'ip': os.getenv('LOGIN_IP_ATTEMPT_LIMIT', '20/300')
+        }
+    }
+    LOAD_SHED_POOL_UTILIZATION = float(os.getenv('LOAD_SHED_POOL_UTILIZATION', 0.9))
+    
+    # KPI event stream: each open stream holds a worker thread, so serve with gthread/gevent workers
+    KPI_STREAM_MAX_SUBSCRIBERS = int(os.getenv('KPI_STREAM_MAX_SUBSCRIBERS', 500))
+    KPI_STREAM_HEARTBEAT_SECONDS = int(os.getenv('KPI_STREAM_HEARTBEAT_SECONDS', 15))
+    KPI_STREAM_POLL_SECONDS = int(os.getenv('KPI_STREAM_POLL_SECONDS', 5))  # Picks up other workers' commits
+    KPI_STREAM_MAX_SECONDS = int(os.getenv('KPI_STREAM_MAX_SECONDS', 3600))  # Clients reconnect after this
+    
+    # Escalation SLA tracking: hours before the target an escalation counts as at risk, and how
+    # often each worker rechecks every open escalation to pick up other workers' writes
+    SLA_TRACKER_ENABLED = os.getenv('SLA_TRACKER_ENABLED', 'True').lower() == 'true'
+    SLA_AT_RISK_HOURS = int(os.getenv('SLA_AT_RISK_HOURS', 24))
+    SLA_RESYNC_SECONDS = int(os.getenv('SLA_RESYNC_SECONDS', 300))
+    
+    # Escalation auto-assignment: new escalations without an assignee go to the least-loaded member
+    # of the project's team; loads are reloaded this often to pick up other workers' writes
+    ESCALATION_AUTO_ASSIGN = os.getenv('ESCALATION_AUTO_ASSIGN', 'True').lower() == 'true'
+    ASSIGNMENT_RESYNC_SECONDS = int(os.getenv('ASSIGNMENT_RESYNC_SECONDS', 60))
+    
+    # Audit trail: events are queued in memory and inserted by a background writer every
+    # AUDIT_BATCH_SIZE events or AUDIT_FLUSH_MS; when the queue is full a request waits at most
+    # AUDIT_ENQUEUE_TIMEOUT_MS for room before the event is dropped
+    AUDIT_WRITER_ENABLED = os.getenv('AUDIT_WRITER_ENABLED', 'True').lower() == 'true'
+    AUDIT_QUEUE_SIZE = int(os.getenv('AUDIT_QUEUE_SIZE', 10000))
+    AUDIT_BATCH_SIZE = int(os.getenv('AUDIT_BATCH_SIZE', 200))
+    AUDIT_FLUSH_MS = int(os.getenv('AUDIT_FLUSH_MS', 500))
+    AUDIT_ENQUEUE_TIMEOUT_MS = int(os.getenv('AUDIT_ENQUEUE_TIMEOUT_MS', 50))
+    
     # Application settings
     DEBUG = os.getenv('FLASK_DEBUG', 'False').lower() == 'true'
     TESTING = False
@@ -49,7 +133,13 @@ class ProductionConfig(Config):
 class TestingConfig(Config):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    # SQLite's in-memory pool takes no pool sizing options
+    SQLALCHEMY_ENGINE_OPTIONS = {}
     WTF_CSRF_ENABLED = False
+    CACHE_BACKEND = 'local-redis'
+    SLA_TRACKER_ENABLED = False
+    AUDIT_WRITER_ENABLED = False
+    RATE_LIMIT_BACKEND = 'none'
 
 # Configuration dictionary
 config = {
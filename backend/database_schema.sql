@@ -486,3 +486,244 @@ SELECT
     ROUND(AVG(on_time_percentage), 2) as avg_on_time_percentage,
     ROUND(AVG(utilization_rate), 2) as avg_utilization_rate
 FROM projects;
+
+-- Materialized dashboard KPIs, maintained incrementally on write (single row)
+CREATE TABLE kpi_snapshots (
+    id INTEGER PRIMARY KEY,
+    total_resources INTEGER NOT NULL DEFAULT 0,
+    billable_resources INTEGER NOT NULL DEFAULT 0,
+    bench_resources INTEGER NOT NULL DEFAULT 0,
+    intern_resources INTEGER NOT NULL DEFAULT 0,
+    contractor_resources INTEGER NOT NULL DEFAULT 0,
+    training_resources INTEGER NOT NULL DEFAULT 0,
+    bench_count INTEGER NOT NULL DEFAULT 0,
+    bench_days_total INTEGER NOT NULL DEFAULT 0,
+    active_projects INTEGER NOT NULL DEFAULT 0,
+    completed_projects INTEGER NOT NULL DEFAULT 0,
+    delayed_projects INTEGER NOT NULL DEFAULT 0,
+    at_risk_projects INTEGER NOT NULL DEFAULT 0,
+    on_time_projects INTEGER NOT NULL DEFAULT 0,
+    active_health_total INTEGER NOT NULL DEFAULT 0,
+    financial_month DATE,
+    monthly_revenue DECIMAL(15, 2) NOT NULL DEFAULT 0,
+    monthly_cost DECIMAL(15, 2) NOT NULL DEFAULT 0,
+    total_escalations INTEGER NOT NULL DEFAULT 0,
+    open_escalations INTEGER NOT NULL DEFAULT 0,
+    critical_escalations INTEGER NOT NULL DEFAULT 0,
+    overdue_escalations INTEGER NOT NULL DEFAULT 0,
+    time_refreshed_at TIMESTAMP,
+    rebuilt_at TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Daily history of summary KPIs, one row per metric per day
+CREATE TABLE kpi_daily_snapshots (
+    id SERIAL PRIMARY KEY,
+    metric VARCHAR(64) NOT NULL,
+    snapshot_date DATE NOT NULL,
+    value DOUBLE PRECISION NOT NULL DEFAULT 0,
+    source VARCHAR(20) NOT NULL DEFAULT 'capture',
+    captured_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT unique_kpi_metric_date UNIQUE (metric, snapshot_date)
+);
+
+-- Stored yyyymm month buckets so monthly trends are index range scans on every dialect.
+-- The application keeps them current on write; the trigger covers rows written with plain SQL.
+ALTER TABLE escalations ADD COLUMN raised_month INTEGER;
+ALTER TABLE resource_resignations ADD COLUMN resignation_month INTEGER;
+
+UPDATE escalations SET raised_month = CAST(EXTRACT(YEAR FROM raised_date) * 100 + EXTRACT(MONTH FROM raised_date) AS INTEGER);
+UPDATE resource_resignations SET resignation_month = CAST(EXTRACT(YEAR FROM date_of_resignation) * 100 + EXTRACT(MONTH FROM date_of_resignation) AS INTEGER);
+
+CREATE INDEX idx_escalations_raised_month_status ON escalations(raised_month, status);
+CREATE INDEX ix_resource_resignations_resignation_month ON resource_resignations(resignation_month);
+
+CREATE OR REPLACE FUNCTION set_escalation_raised_month()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.raised_month = CAST(EXTRACT(YEAR FROM NEW.raised_date) * 100 + EXTRACT(MONTH FROM NEW.raised_date) AS INTEGER);
+    RETURN NEW;
+END;
+$$ language 'plpgsql';
+
+CREATE OR REPLACE FUNCTION set_resignation_month()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.resignation_month = CAST(EXTRACT(YEAR FROM NEW.date_of_resignation) * 100 + EXTRACT(MONTH FROM NEW.date_of_resignation) AS INTEGER);
+    RETURN NEW;
+END;
+$$ language 'plpgsql';
+
+CREATE TRIGGER set_escalations_raised_month BEFORE INSERT OR UPDATE OF raised_date ON escalations FOR EACH ROW EXECUTE FUNCTION set_escalation_raised_month();
+CREATE TRIGGER set_resource_resignations_month BEFORE INSERT OR UPDATE OF date_of_resignation ON resource_resignations FOR EACH ROW EXECUTE FUNCTION set_resignation_month();
+
+-- Keyset for the paginated escalation list: ORDER BY raised_date, id with a (raised_date, id) < (?, ?) seek
+CREATE INDEX idx_escalations_raised_date_id ON escalations(raised_date, id);
+
+-- Composite indexes for the filters the KPI and list queries run.
+-- Verify with: flask --app wsgi query-plans check
+ALTER TABLE resources ADD COLUMN IF NOT EXISTS employment_status VARCHAR(20) DEFAULT 'ACTIVE';
+ALTER TABLE escalations ADD COLUMN IF NOT EXISTS target_resolution_date TIMESTAMP;
+CREATE INDEX idx_resources_employment_status_department ON resources(employment_status, department);
+CREATE INDEX idx_resources_status_employment_status ON resources(status, employment_status);
+CREATE INDEX idx_escalations_status_target ON escalations(status, target_resolution_date);
+CREATE INDEX idx_escalations_priority_status ON escalations(priority, status);
+CREATE INDEX idx_escalations_project_raised ON escalations(project_id, raised_date);
+CREATE INDEX idx_escalations_assigned_raised ON escalations(assigned_to, raised_date);
+CREATE INDEX idx_project_allocations_resource_status ON project_allocations(resource_id, status);
+CREATE INDEX idx_project_allocations_project_status ON project_allocations(project_id, status);
+CREATE INDEX idx_projects_status_health_status ON projects(status, health_status);
+CREATE INDEX idx_financials_month_project ON financials(month_year, project_id);
+CREATE INDEX idx_bench_costing_month ON bench_costing(month_year);
+
+-- Escalation SLA state (ON_TRACK, AT_RISK, BREACHED; NULL once closed), kept current by the SLA tracker.
+-- Populate existing rows with: flask --app wsgi sla resync
+ALTER TABLE escalations ADD COLUMN sla_state VARCHAR(20);
+CREATE INDEX idx_escalations_sla_state_target ON escalations(sla_state, target_resolution_date);
+
+-- Escalation communication log, one row per entry (replaces the escalations.communication_log JSON array).
+-- Databases that have that column: run `flask --app wsgi escalation-communications migrate`,
+-- then ALTER TABLE escalations DROP COLUMN communication_log;
+CREATE TABLE escalation_communications (
+    id SERIAL PRIMARY KEY,
+    escalation_id INTEGER NOT NULL,
+    channel VARCHAR(50),
+    author VARCHAR(100),
+    recipients VARCHAR(500),
+    subject VARCHAR(200),
+    message TEXT,
+    details JSON,
+    occurred_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    created_by INTEGER,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    
+    FOREIGN KEY (escalation_id) REFERENCES escalations(id) ON DELETE CASCADE,
+    FOREIGN KEY (created_by) REFERENCES users(id)
+);
+
+CREATE INDEX idx_escalation_communications_escalation_occurred ON escalation_communications(escalation_id, occurred_at, id);
+
+-- Escalation full-text search: a weighted tsvector kept current by PostgreSQL on every write, behind a GIN index
+ALTER TABLE escalations ADD COLUMN IF NOT EXISTS root_cause TEXT;
+ALTER TABLE escalations ADD COLUMN IF NOT EXISTS resolution_summary TEXT;
+ALTER TABLE escalations ADD COLUMN IF NOT EXISTS business_impact TEXT;
+ALTER TABLE escalations ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+    setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+    setweight(to_tsvector('english', coalesce(root_cause, '')), 'B') ||
+    setweight(to_tsvector('english', coalesce(description, '')), 'B') ||
+    setweight(to_tsvector('english', coalesce(resolution_summary, '')), 'C') ||
+    setweight(to_tsvector('english', coalesce(business_impact, '')), 'D')
+) STORED;
+CREATE INDEX idx_escalations_search_vector ON escalations USING GIN (search_vector);
+
+-- Ticket ID from the client's ticketing system, the key bulk imports upsert on
+ALTER TABLE escalations ADD COLUMN external_id VARCHAR(100);
+CREATE UNIQUE INDEX idx_escalations_external_id ON escalations(external_id);
+
+-- Escalation status history and timing rollups. Response and resolution hours are derived on each status change.
+-- Existing databases: run `flask --app wsgi escalation-rollups rebuild` afterwards
+ALTER TABLE escalations ADD COLUMN IF NOT EXISTS date_acknowledged TIMESTAMP;
+ALTER TABLE escalations ADD COLUMN IF NOT EXISTS response_time_hours DECIMAL(8,2);
+ALTER TABLE escalations ADD COLUMN IF NOT EXISTS resolution_time_hours DECIMAL(8,2);
+ALTER TABLE escalations ADD COLUMN status_changed_at TIMESTAMP;
+
+CREATE TABLE escalation_events (
+    id SERIAL PRIMARY KEY,
+    escalation_id INTEGER NOT NULL,
+    from_status VARCHAR(20),
+    to_status VARCHAR(20) NOT NULL,
+    occurred_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    hours_in_previous_status DOUBLE PRECISION,
+    changed_by VARCHAR(100),
+    
+    FOREIGN KEY (escalation_id) REFERENCES escalations(id) ON DELETE CASCADE
+);
+
+CREATE INDEX idx_escalation_events_escalation_occurred ON escalation_events(escalation_id, occurred_at, id);
+
+CREATE TABLE escalation_monthly_rollups (
+    month INTEGER NOT NULL,
+    project_id INTEGER NOT NULL,
+    raised_count INTEGER NOT NULL DEFAULT 0,
+    resolved_count INTEGER NOT NULL DEFAULT 0,
+    resolution_hours_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+    responded_count INTEGER NOT NULL DEFAULT 0,
+    response_hours_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    
+    PRIMARY KEY (month, project_id),
+    FOREIGN KEY (project_id) REFERENCES projects(id) ON DELETE CASCADE
+);
+
+CREATE TABLE escalation_resolution_buckets (
+    month INTEGER NOT NULL,
+    project_id INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    count INTEGER NOT NULL DEFAULT 0,
+    
+    PRIMARY KEY (month, project_id, bucket),
+    FOREIGN KEY (project_id) REFERENCES projects(id) ON DELETE CASCADE
+);
+
+-- Near-duplicate detection: MinHash signatures and their LSH bands (app.services.escalation_duplicate_service)
+ALTER TABLE escalations ADD COLUMN possible_duplicate_of INTEGER REFERENCES escalations(id) ON DELETE SET NULL;
+
+CREATE TABLE escalation_signatures (
+    escalation_id INTEGER PRIMARY KEY,
+    project_id INTEGER NOT NULL,
+    customer VARCHAR(200),
+    minhash BYTEA NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    
+    FOREIGN KEY (escalation_id) REFERENCES escalations(id) ON DELETE CASCADE
+);
+
+CREATE TABLE escalation_lsh_bands (
+    band_hash BIGINT NOT NULL,
+    escalation_id INTEGER NOT NULL,
+    
+    PRIMARY KEY (band_hash, escalation_id),
+    FOREIGN KEY (escalation_id) REFERENCES escalation_signatures(escalation_id) ON DELETE CASCADE
+);
+
+CREATE INDEX idx_escalation_lsh_bands_escalation ON escalation_lsh_bands(escalation_id);
+
+-- Access tokens issued before this are refused (role, password or active flag changed, or logout)
+ALTER TABLE users ADD COLUMN tokens_valid_after TIMESTAMP;
+
+-- Role permissions (seeded from app.utils.permissions.DEFAULT_PERMISSIONS; a missing row denies the action)
+CREATE TABLE role_permissions (
+    role VARCHAR(50) NOT NULL,
+    resource VARCHAR(50) NOT NULL,
+    action VARCHAR(20) NOT NULL,
+    updated_by VARCHAR(120),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    
+    PRIMARY KEY (role, resource, action)
+);
+
+-- Audit trail, inserted in batches by app.services.audit_service.AuditWriter
+CREATE TABLE audit_events (
+    id BIGSERIAL PRIMARY KEY,
+    occurred_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    user_id INTEGER,
+    user_email VARCHAR(120),
+    action VARCHAR(50) NOT NULL,
+    resource_type VARCHAR(50) NOT NULL,
+    resource_id VARCHAR(100),
+    details TEXT,
+    method VARCHAR(10),
+    path VARCHAR(255),
+    ip_address VARCHAR(45)
+);
+
+CREATE INDEX idx_audit_events_user_occurred ON audit_events(user_id, occurred_at, id);
+CREATE INDEX idx_audit_events_resource_occurred ON audit_events(resource_type, occurred_at, id);
+CREATE INDEX idx_audit_events_occurred ON audit_events(occurred_at, id);
+
+-- Version counter per table behind the conditional-request ETags, bumped by app.utils.data_versions
+-- in the same transaction as each write
+CREATE TABLE data_versions (
+    table_name VARCHAR(100) PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0
+);
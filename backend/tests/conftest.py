@@ -0,0 +1,20 @@
+import pytest
+from datetime import date
+from app import create_app, db
+from app.models.project import Project
+
+@pytest.fixture(scope='module')
+def app():
+    app = create_app('testing')
+    with app.app_context():
+        yield app
+        db.session.remove()
+
+@pytest.fixture
+def project(app):
+    """A fresh project, so each test's escalations are counted apart from the others'"""
+    count = Project.query.count()
+    project = Project(project_code=f'T{count + 1}', project_name='Test', client_name='Client', start_date=date(2024, 1, 1))
+    db.session.add(project)
+    db.session.commit()
+    return project
@@ -0,0 +1,42 @@
+"""Table versions in the database: bumped with the write's own commit and answering 304s before the view runs"""
+import pytest
+from app import db
+from app.models.escalation import Escalation
+from app.models.user import User
+from app.services.kpi_service import KPIService
+from app.utils.auth import issue_access_token
+from app.utils.cache import response_cache
+from app.utils.data_versions import data_versions, DatabaseVersionStore
+
+@pytest.fixture
+def database_store(app, monkeypatch):
+    monkeypatch.setattr(data_versions, 'store', DatabaseVersionStore())
+
+def _version(table):
+    return data_versions.get([table])[1][table]
+
+def test_commit_bumps_the_version(database_store, project):
+    before = _version('escalations')
+    db.session.add(Escalation(title='Invoices missing', description='No invoices for May', project_id=project.id))
+    db.session.commit()
+    assert _version('escalations') == before + 1
+
+def test_rollback_keeps_the_version(database_store, project):
+    before = _version('escalations')
+    db.session.add(Escalation(title='Invoices missing', description='No invoices for May', project_id=project.id))
+    db.session.flush()
+    db.session.rollback()
+    assert _version('escalations') == before
+
+def test_not_modified_without_running_the_view(database_store, app, monkeypatch):
+    client = app.test_client()
+    client.environ_base['HTTP_AUTHORIZATION'] = 'Bearer ' + issue_access_token(User.query.filter_by(email='admin@zapcg.com').first())
+    response = client.get('/api/kpis/summary')
+    assert response.status_code == 200
+
+    def fail():
+        raise AssertionError('the view ran for a matching If-None-Match')
+    monkeypatch.setattr(KPIService, 'get_kpi_summary', staticmethod(fail))
+    response_cache.clear()
+    revalidated = client.get('/api/kpis/summary', headers={'If-None-Match': response.headers['ETag']})
+    assert revalidated.status_code == 304
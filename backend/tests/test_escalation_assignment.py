@@ -0,0 +1,40 @@
+"""Assignee loads kept in memory by the assignment engine must match a resync from the database"""
+import pytest
+from app import db
+from app.models.escalation import Escalation, EscalationStatus, EscalationPriority
+from app.services.escalation_assignment_service import assignment_engine
+
+def _loads():
+    return {row['assignee']: (row['open_load'], row['open_escalations']) for row in assignment_engine.workload()}
+
+def assert_matches_resync():
+    incremental = _loads()
+    assignment_engine.resync()
+    assert incremental == _loads()
+
+@pytest.fixture
+def escalation(project):
+    assignment_engine.resync()
+    escalation = Escalation(
+        title='Search is slow', description='Queries take seconds', project_id=project.id,
+        priority=EscalationPriority.HIGH, assigned_to='first@zapcg.com'
+    )
+    db.session.add(escalation)
+    db.session.commit()
+    assert_matches_resync()
+    return escalation
+
+def test_reassign_on_expired_instance(escalation):
+    # The commit above expired every attribute, so assigned_to is set without its old value loaded
+    escalation.assigned_to = 'second@zapcg.com'
+    db.session.commit()
+    assert_matches_resync()
+
+def test_priority_and_status_change_on_expired_instance(escalation):
+    escalation.priority = EscalationPriority.CRITICAL
+    db.session.commit()
+    assert_matches_resync()
+
+    escalation.status = EscalationStatus.RESOLVED
+    db.session.commit()
+    assert_matches_resync()
@@ -0,0 +1,29 @@
+"""Status history and monthly rollups kept by the escalation flush listener"""
+from datetime import datetime, timedelta
+from app import db
+from app.models.escalation import Escalation, EscalationStatus
+from app.models.escalation_event import EscalationEvent
+from app.models.escalation_rollup import EscalationMonthlyRollup
+from app.utils.sql import month_bucket
+
+def test_status_change_on_expired_instance(project):
+    raised = datetime.utcnow() - timedelta(hours=5)
+    escalation = Escalation(title='Report export times out', description='Large exports fail', project_id=project.id, raised_date=raised)
+    db.session.add(escalation)
+    db.session.commit()
+
+    # The commit above expired every attribute, so status is assigned without its old value loaded
+    escalation.status = EscalationStatus.RESOLVED
+    db.session.commit()
+
+    events = EscalationEvent.query.filter_by(escalation_id=escalation.id).order_by(EscalationEvent.id).all()
+    assert [(event.from_status, event.to_status) for event in events] == [
+        (None, EscalationStatus.OPEN), (EscalationStatus.OPEN, EscalationStatus.RESOLVED)
+    ]
+    assert events[1].hours_in_previous_status is not None
+    assert escalation.status_changed_at == events[1].occurred_at
+    assert escalation.resolution_time_hours is not None
+
+    rollup = db.session.get(EscalationMonthlyRollup, (month_bucket(escalation.resolved_date), project.id))
+    assert rollup.resolved_count == 1
+    assert rollup.resolution_hours_sum == escalation.resolution_time_hours
@@ -0,0 +1,53 @@
+"""The KPI snapshot is kept up to date with deltas; after any write it must equal a rebuild"""
+import pytest
+from datetime import datetime, timedelta
+from app import db
+from app.models.escalation import Escalation, EscalationStatus, EscalationPriority
+from app.models.kpi_snapshot import KPISnapshot
+from app.services.kpi_snapshot_service import KPISnapshotService, SNAPSHOT_ID
+
+def _counters(snapshot):
+    return {field: getattr(snapshot, field) or 0 for field in KPISnapshot.COUNTER_FIELDS}
+
+def assert_matches_rebuild():
+    snapshot = db.session.get(KPISnapshot, SNAPSHOT_ID)
+    db.session.refresh(snapshot)
+    incremental = _counters(snapshot)
+    assert incremental == _counters(KPISnapshotService.rebuild())
+
+@pytest.fixture
+def escalation(project):
+    KPISnapshotService.rebuild()
+    escalation = Escalation(
+        title='Checkout fails', description='Payment step errors', project_id=project.id,
+        priority=EscalationPriority.CRITICAL, target_resolution_date=datetime.utcnow() - timedelta(hours=1)
+    )
+    db.session.add(escalation)
+    db.session.commit()
+    assert_matches_rebuild()
+    return escalation
+
+def test_status_change_on_expired_instance(escalation):
+    # The commit above expired every attribute, so status is assigned without its old value loaded
+    escalation.status = EscalationStatus.RESOLVED
+    db.session.commit()
+    assert_matches_rebuild()
+
+def test_priority_and_target_change_on_expired_instance(escalation):
+    escalation.priority = EscalationPriority.LOW
+    escalation.target_resolution_date = datetime.utcnow() + timedelta(days=3)
+    db.session.commit()
+    assert_matches_rebuild()
+
+def test_changes_across_flushes_in_one_transaction(escalation):
+    escalation.status = EscalationStatus.IN_PROGRESS
+    db.session.flush()
+    escalation.status = EscalationStatus.CLOSED
+    db.session.commit()
+    assert_matches_rebuild()
+
+def test_delete_after_expired_change(escalation):
+    escalation.status = EscalationStatus.RESOLVED
+    db.session.delete(escalation)
+    db.session.commit()
+    assert_matches_rebuild()
@@ -0,0 +1,55 @@
+"""Login throttling: failures counted per account across IPs, and successes never charged"""
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from app.services.user_service import UserService
+from app.utils.exceptions import TooManyRequestsError
+from app.utils.rate_limit import rate_limiter, parse_limit, MemoryBucketBackend
+
+@pytest.fixture
+def limiter(app, monkeypatch):
+    monkeypatch.setattr(rate_limiter, 'backend', MemoryBucketBackend())
+    monkeypatch.setattr(rate_limiter, 'limits', {'login': {
+        'account_ip': parse_limit('3/3600'), 'account': parse_limit('5/3600'), 'ip': parse_limit('20/3600')
+    }})
+
+@pytest.fixture
+def user(app):
+    count = len(UserService.get_all_users())
+    return UserService.create_user(f'login{count}@zapcg.com', 'correct-horse', 'Login Test')
+
+def test_failures_from_many_ips_throttle_the_account(limiter, user):
+    for attempt in range(5):
+        assert UserService.authenticate_user(user.email, 'wrong', f'10.0.0.{attempt}') is None
+    with pytest.raises(TooManyRequestsError):
+        UserService.authenticate_user(user.email, 'wrong', '10.0.1.1')
+
+def test_successful_logins_are_not_charged(limiter, user):
+    for _ in range(10):
+        assert UserService.authenticate_user(user.email, 'correct-horse', '10.0.2.1') == user
+    for _ in range(3):
+        assert UserService.authenticate_user(user.email, 'wrong', '10.0.2.1') is None
+    with pytest.raises(TooManyRequestsError):
+        UserService.authenticate_user(user.email, 'wrong', '10.0.2.1')
+
+def test_refused_attempts_do_not_drain_other_buckets(limiter, user):
+    for _ in range(3):
+        UserService.authenticate_user(user.email, 'wrong', '10.0.3.1')
+    for _ in range(10):
+        with pytest.raises(TooManyRequestsError):
+            UserService.authenticate_user(user.email, 'wrong', '10.0.3.1')
+    # The account bucket still holds the tokens the refused attempts briefly reserved
+    assert UserService.authenticate_user(user.email, 'wrong', '10.0.3.2') is None
+    assert UserService.authenticate_user(user.email, 'correct-horse', '10.0.3.2') == user
+
+def test_concurrent_guesses_are_bounded(limiter, user, app):
+    def guess(attempt):
+        with app.app_context():
+            try:
+                UserService.authenticate_user(user.email, 'wrong', f'10.0.4.{attempt}')
+                return 'checked'
+            except TooManyRequestsError:
+                return 'refused'
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(guess, range(16)))
+    assert results.count('checked') == 5
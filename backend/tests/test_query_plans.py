@@ -0,0 +1,15 @@
+"""Query-plan regression check: every hot query must reach its table through an index"""
+import pytest
+from app.services.query_plan_service import QueryPlanService, HOT_QUERIES
+
+@pytest.fixture(scope='module')
+def plans(app):
+    return {result['name']: result for result in QueryPlanService.check()}
+
+def test_every_hot_query_is_checked(plans):
+    assert sorted(plans) == sorted(name for name, _, _ in HOT_QUERIES)
+
+@pytest.mark.parametrize('name', [name for name, _, _ in HOT_QUERIES])
+def test_hot_query_uses_an_index(plans, name):
+    result = plans[name]
+    assert result['ok'], f"{name} reads {result['table']} with a full scan:\n" + '\n'.join(result['plan'])
@@ -10,6 +10,7 @@ import type {
   ResourceResponse, 
   FinancialResponse,
   EscalationResponse,
+  EscalationCommunicationResponse,
   BenchCostingResponse,
   ProjectAllocationResponse,
   AuthResponse,
@@ -228,6 +229,17 @@ class ApiService {
     });
   }
 
+  async getEscalationCommunications(id: number): Promise<EscalationCommunicationResponse[]> {
+    return this.request<EscalationCommunicationResponse[]>(`/escalations/${id}/communications`);
+  }
+
+  async addEscalationCommunication(id: number, data: any): Promise<EscalationCommunicationResponse> {
+    return this.request<EscalationCommunicationResponse>(`/escalations/${id}/communications`, {
+      method: 'POST',
+      body: JSON.stringify(data),
+    });
+  }
+
   async getKPISummary(): Promise<KPISummaryResponse> {
     return this.request<KPISummaryResponse>('/kpis/summary');
   }
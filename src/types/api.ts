@@ -221,7 +221,7 @@ export interface EscalationResponse {
   preventive_measures?: string;
   client_communication?: string;
   internal_notes?: string;
-  communication_log?: string; // JSON array
+  // The communication log is served separately: GET/POST /escalations/{id}/communications
   client_signoff_required?: boolean;
   client_signoff_date?: string;
   client_satisfaction_rating?: number;
@@ -234,6 +234,20 @@ export interface EscalationResponse {
   updated_at: string;
 }
 
+export interface EscalationCommunicationResponse {
+  id: number;
+  escalation_id: number;
+  channel?: string;
+  author?: string;
+  recipients?: string;
+  subject?: string;
+  message?: string;
+  details?: Record<string, unknown>;
+  occurred_at: string;
+  created_by?: number;
+  created_at: string;
+}
+
 export interface BenchCostingResponse {
   id: number;
   resource_id: number;
@@ -363,7 +363,7 @@ export interface Escalation {
   // Communication
   client_communication?: string;
   internal_notes?: string;
-  communication_log?: string; // JSON array
+  // Communication log entries: GET/POST /escalations/{id}/communications (EscalationCommunication)
   
   // Approval and Sign-off
   client_signoff_required?: boolean;
@@ -374,6 +374,20 @@ export interface Escalation {
   updated_at: string;
 }
 
+export interface EscalationCommunication {
+  id: number;
+  escalation_id: number;
+  channel?: string; // email, call, meeting, note, ...
+  author?: string;
+  recipients?: string;
+  subject?: string;
+  message?: string;
+  details?: Record<string, unknown>;
+  occurred_at: string;
+  created_by?: number;
+  created_at: string;
+}
+
 // Enhanced KPI Summary interface
 export interface KPISummary {
   // Resource KPIs